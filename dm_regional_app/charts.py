@@ -1,12 +1,13 @@
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 
 from dm_regional_app.utils import (
     add_ci_traces,
     add_traces,
     apply_variances,
     care_type_organiser,
+    chart_dates,
+    chart_values,
+    new_chart,
     rate_table_sort,
     remove_age_transitions,
     weekly_care_type_dfs,
@@ -21,28 +22,82 @@ def year_one_costs(df: CostForecast):
     """
     This function takes a CostForecast and filters to only values in the first year, returning a single sum of those values.
     """
+    periods = df.periods
+    if len(periods.dates) == 0:
+        return 0.0
 
-    df = df.costs
+    # Sum the costs from the first date up to one year later, round to 2 decimal places
+    end_date = periods.dates[0] + pd.DateOffset(years=1)
+    return periods.total(end=end_date).sum().round(2)
 
-    # Ensure the index is a DatetimeIndex
-    df.index = pd.to_datetime(df.index)
 
-    # Find the first date in the DataFrame index
-    first_date = df.index.min()
-
-    # Calculate the end date (one year from the first date)
-    end_date = first_date + pd.DateOffset(years=1)
+def reference_period_shape(reference_start_date, reference_end_date) -> dict:
+    """
+    Returns a shaded rectangle showing the reference period of a forecast
+    """
+    return dict(
+        type="rect",
+        xref="x",
+        yref="paper",
+        x0=pd.Timestamp(reference_start_date).strftime("%Y-%m-%d"),
+        y0=0,
+        x1=pd.Timestamp(reference_end_date).strftime("%Y-%m-%d"),
+        y1=1,
+        line=dict(
+            width=0,
+        ),
+        label=dict(
+            text="Reference period", textposition="top center", font=dict(size=14)
+        ),
+        fillcolor="rgba(105,105,105,0.1)",
+        layer="above",
+    )
 
-    # Filter the DataFrame
-    df = df[(df.index >= first_date) & (df.index < end_date)]
 
-    # Sum all values in the DataFrame, round to 2 decimal places
-    total_sum = df.to_numpy().sum().round(2)
+def area_chart(
+    df: pd.DataFrame,
+    prediction_start_date,
+    *,
+    title: str,
+    yaxis_title: str,
+    hovertemplate: str,
+    decimals: int,
+) -> dict:
+    """
+    Returns a stacked area chart of each column of a dataframe, with a line at the start of the forecast
+    """
+    chart = new_chart(title, "Date", yaxis_title, legend=dict(title=dict(text="")))
+    x = chart_dates(chart, df.index)
+    for column in df.columns:
+        chart["traces"].append(
+            {
+                "x": x,
+                "y": chart_values(df[column], decimals=decimals),
+                "name": column,
+                "legendgroup": column,
+                "stackgroup": "1",
+                "mode": "lines",
+                "hovertemplate": hovertemplate,
+            }
+        )
 
-    return total_sum
+    prediction_start_date = pd.Timestamp(prediction_start_date).strftime("%Y-%m-%d")
+    chart["layout"]["shapes"].append(
+        dict(
+            type="line",
+            xref="x",
+            yref="y domain",
+            x0=prediction_start_date,
+            y0=0,
+            x1=prediction_start_date,
+            y1=1,
+            line=dict(width=1, dash="dash", color="black"),
+        )
+    )
+    return chart
 
 
-def area_chart_cost(df_historic, prediction: CostForecast):
+def area_chart_cost(df_historic, prediction: CostForecast) -> dict:
     df_forecast = prediction.costs
     prediction_start_date = df_forecast.index[0]
 
@@ -54,41 +109,28 @@ def area_chart_cost(df_historic, prediction: CostForecast):
 
     combined_df_weekly = combined_df.resample("7D").first()
 
-    fig = px.area(
+    return area_chart(
         combined_df_weekly,
-        x=combined_df_weekly.index,
-        y=combined_df_weekly.columns,
-        labels={"variable": "", "value": "Cost in £", "index": "Date"},
-    )
-
-    fig.add_vline(
-        x=prediction_start_date,
-        line_width=1,
-        line_dash="dash",
-        line_color="black",
-    )
-    fig.update_traces(
+        prediction_start_date,
+        title="Child placement costs",
+        yaxis_title="Cost in £",
         hovertemplate="%{fullData.name}<br>"
         "<b>Date:</b> %{x|%d %B %Y}<br>"
-        "<b>Cost:</b> £%{y:,.2f}<extra></extra>"
+        "<b>Cost:</b> £%{y:,.2f}<extra></extra>",
+        decimals=2,
     )
 
-    fig.update_layout(title="Child placement costs")
-    # Set hover label to show full placement type without truncation
-    fig.update_layout(hoverlabel=dict(namelength=-1))
-    fig_html = fig.to_html(full_html=False, include_plotlyjs="cdn")
 
-    return fig_html
-
-
-def area_chart_population(historic_data: pd.DataFrame, prediction: CostForecast):
+def area_chart_population(
+    historic_data: pd.DataFrame, prediction: CostForecast
+) -> dict:
     # Forecast
     df_forecast = prediction.proportional_population.round()
     df_forecast.index = pd.to_datetime(df_forecast.index)
     weekly_forecast = df_forecast.resample("7D").first()
 
     # Historic
-    df_historic = historic_data
+    df_historic = historic_data.copy()
     df_historic.index = pd.to_datetime(df_historic.index)
     weekly_historic = df_historic.resample("7D").first()
 
@@ -99,33 +141,17 @@ def area_chart_population(historic_data: pd.DataFrame, prediction: CostForecast)
     # Combine
     combined_df = pd.concat([weekly_historic, weekly_forecast], copy=False)
 
-    # Plot (wide-form)
-    fig = px.area(
+    return area_chart(
         combined_df,
-        x=combined_df.index,
-        y=combined_df.columns,
-        labels={"variable": "", "value": "Population", "index": "Date"},
-    )
-
-    fig.add_vline(
-        x=prediction_start_date, line_width=1, line_dash="dash", line_color="black"
-    )
-
-    fig.update_traces(
+        prediction_start_date,
+        title="Child placement numbers",
+        yaxis_title="Population",
         hovertemplate="%{fullData.name}<br>"
         "<b>Date:</b> %{x|%d %B %Y}<br>"
-        "<b>Children:</b> %{y:,}<extra></extra>"
+        "<b>Children:</b> %{y:,}<extra></extra>",
+        decimals=0,
     )
 
-    fig.update_layout(title="Child placement numbers")
-    # Set hover label to show full placement type without truncation
-    fig.update_layout(hoverlabel=dict(namelength=-1))
-
-    # Fast HTML generation with CDN
-    fig_html = fig.to_html(full_html=False, include_plotlyjs="cdn")
-
-    return fig_html
-
 
 def placement_proportion_table(historic_proportions, forecast_proportion: CostForecast):
     categories = {item.value.label: item.value.category.label for item in Costs}
@@ -190,19 +216,22 @@ def summary_tables(df):
 
 def prediction_chart(
     historic_data: PopulationStats, prediction: Prediction, **kwargs
-) -> str:
+) -> dict:
     """
-    Outputs an html figure showing the historic and forecast (with CIs) child populations split by placement type
+    Outputs a chart showing the historic and forecast (with CIs) child populations split by placement type
     """
     # Pop start and end dates to visualise reference period
     reference_start_date = kwargs.pop("reference_start_date")
     reference_end_date = kwargs.pop("reference_end_date")
 
-    prediction.population.index = pd.to_datetime(prediction.population.index)
-    prediction_start_date = prediction.population.index.min()
+    # the prediction may be shared through the prediction cache, so it is not changed here
+    population = prediction.population.set_axis(
+        pd.to_datetime(prediction.population.index)
+    )
+    prediction_start_date = population.index.min()
 
     forecast_care_by_type_dfs = weekly_care_type_dfs(
-        prediction.population,
+        population,
         value_col="pop_size",
         round_int=True,
         prediction_start_date=prediction_start_date,
@@ -225,7 +254,12 @@ def prediction_chart(
     df_ci = apply_variances(forecast_care_by_type_dfs, df_ci)
 
     # Visualise prediction using unstacked dataframe
-    fig = go.Figure()
+    chart = new_chart(
+        "Forecast child population over time",
+        "Date",
+        "Number of children",
+        hovermode="x unified",
+    )
 
     # Append graph info to population data dictionaries
     historic_care_by_type_dfs["type"] = "Historic"
@@ -235,50 +269,24 @@ def prediction_chart(
     forecast_care_by_type_dfs["dash"] = None
 
     # Add forecast and historical traces
-    fig = add_traces(fig, [historic_care_by_type_dfs, forecast_care_by_type_dfs])
+    chart = add_traces(chart, [historic_care_by_type_dfs, forecast_care_by_type_dfs])
 
     # Append graph info to ci data dictionaries
     df_ci["type"] = "Base forecast"
 
     # Display confidence interval as filled shape
-    fig = add_ci_traces(fig, [df_ci])
+    chart = add_ci_traces(chart, [df_ci])
 
     # add shaded reference period
-    fig.add_shape(
-        type="rect",
-        xref="x",
-        yref="paper",
-        x0=reference_start_date,
-        y0=0,
-        x1=reference_end_date,
-        y1=1,
-        line=dict(
-            width=0,
-        ),
-        label=dict(
-            text="Reference period", textposition="top center", font=dict(size=14)
-        ),
-        fillcolor="rgba(105,105,105,0.1)",
-        layer="above",
+    chart["layout"]["shapes"].append(
+        reference_period_shape(reference_start_date, reference_end_date)
     )
-
-    fig.update_layout(
-        title="Forecast child population over time",
-        xaxis_title="Date",
-        yaxis_title="Number of children",
-        hovermode="x unified",
-    )
-    fig.update_traces(xhoverformat="%d %b %Y")
-    fig.update_yaxes(rangemode="tozero")
-    # Set hover label to show full placement type without truncation
-    fig.update_layout(hoverlabel=dict(namelength=-1))
-    fig_html = fig.to_html(full_html=False)
-    return fig_html
+    return chart
 
 
-def historic_chart(data: PopulationStats) -> str:
+def historic_chart(data: PopulationStats) -> dict:
     """
-    Outputs an html figure of the historic child population over time from the stock in population stats
+    Outputs a chart of the historic child population over time from the stock in population stats
     """
     # Organise the stock dataframe into a dictionary of dataframes split by the categories in an enum
     historic_care_by_type_dfs = weekly_care_type_dfs(
@@ -286,32 +294,24 @@ def historic_chart(data: PopulationStats) -> str:
         value_col="pop_size",
     )
 
-    fig = go.Figure()
+    chart = new_chart(
+        "Historic child population over time",
+        "Date",
+        "Number of children",
+        hovermode="x unified",
+    )
 
     # Append graph info to historic data dictionary
     historic_care_by_type_dfs["type"] = "Historic"
     historic_care_by_type_dfs["dash"] = "dot"
 
     # Add historical traces
-    fig = add_traces(fig, [historic_care_by_type_dfs])
-
-    fig.update_layout(
-        title="Historic child population over time",
-        xaxis_title="Date",
-        yaxis_title="Number of children",
-        hovermode="x unified",
-    )
-    # Set hover label to show full placement type without truncation
-    fig.update_layout(hoverlabel=dict(namelength=-1))
-    fig.update_traces(xhoverformat="%d %b %Y")
-    fig.update_yaxes(rangemode="tozero")
-    fig_html = fig.to_html(full_html=False)
-    return fig_html
+    return add_traces(chart, [historic_care_by_type_dfs])
 
 
-def placement_starts_chart(data: PopulationStats) -> str:
+def placement_starts_chart(data: PopulationStats) -> dict:
     """
-    Outputs an html figure of placement counts over time from the stock in population stats
+    Outputs a chart of placement counts over time from the stock in population stats
     """
     df = data.df.copy()
 
@@ -329,48 +329,28 @@ def placement_starts_chart(data: PopulationStats) -> str:
     # all months in the range
     all_months = pd.date_range(df["date"].min(), df["date"].max(), freq="MS")
 
-    # all unique placement types
-    all_types = df["placement_type"].unique()
-
-    # create full combination
-    full_index = pd.MultiIndex.from_product(
-        [all_months, all_types], names=["date", "placement_type"]
-    )
-
-    # group and reindex to full grid, fill missing with 0
+    # count by month and placement type
     monthly_counts = (
         df.groupby(["date", "placement_type"])
         .size()
-        .reindex(full_index, fill_value=0)
-        .reset_index(name="count")
+        .unstack(fill_value=0)
+        .reindex(all_months, fill_value=0)
     )
 
-    monthly_counts.columns = ["date", "bin", "pop_size"]
-
-    monthly_counts_org = care_type_organiser(monthly_counts, "pop_size", "bin")
+    monthly_counts_org = care_type_organiser(monthly_counts, "pop_size")
 
     # Append graph info to historic data dictionary
     monthly_counts_org["type"] = "Placement starts"
     monthly_counts_org["dash"] = "dot"
 
-    fig = go.Figure()
-
-    fig = add_traces(fig, [monthly_counts_org])
-
-    fig.update_yaxes(rangemode="tozero")
-
-    fig.update_layout(
-        title="Placement starts per month",
-        xaxis_title="Month",
-        yaxis_title="Placements",
+    chart = new_chart(
+        "Placement starts per month",
+        "Month",
+        "Placements",
         hovermode="x unified",
     )
-    # Set hover label to show full placement type without truncation
-    fig.update_layout(hoverlabel=dict(namelength=-1))
-    fig.update_traces(xhoverformat="%d %b %Y")
 
-    fig_html = fig.to_html(full_html=False)
-    return fig_html
+    return add_traces(chart, [monthly_counts_org])
 
 
 def transition_rate_table(data):
@@ -496,9 +476,9 @@ def compare_forecast(
     base_forecast: Prediction,
     adjusted_forecast: Prediction,
     **kwargs,
-) -> str:
+) -> dict:
     """
-    Returns an html graph that is shown to the user when adjustments to transition rates have been made.
+    Returns a chart that is shown to the user when adjustments to transition rates have been made.
     It shows the historic data, the base forecast (with CIs) and the adjusted forecast (with CIs) by placement type.
     """
     # pop start and end dates to visualise reference period
@@ -545,7 +525,11 @@ def compare_forecast(
     df_af_ci = apply_variances(adjusted_care_by_type_dfs, df_af_ci)
 
     # visualise prediction using unstacked dataframe
-    fig = go.Figure()
+    chart = new_chart(
+        "Base and adjusted child population over time",
+        "Date",
+        "Number of children",
+    )
 
     # Append graph info to population data dictionaries
     for d, label, dash in [
@@ -556,9 +540,9 @@ def compare_forecast(
         d["type"] = label
         d["dash"] = dash
 
-    # Add historical and forecast data to figure
-    fig = add_traces(
-        fig,
+    # Add historical and forecast data to chart
+    chart = add_traces(
+        chart,
         [
             historic_care_by_type_dfs,
             forecast_care_by_type_dfs,
@@ -571,38 +555,13 @@ def compare_forecast(
     df_af_ci["type"] = "Adjusted forecast"
 
     # Display confidence interval as filled shape
-    fig = add_ci_traces(fig, [df_ci, df_af_ci])
+    chart = add_ci_traces(chart, [df_ci, df_af_ci])
 
     # add shaded reference period
-    fig.add_shape(
-        type="rect",
-        xref="x",
-        yref="paper",
-        x0=reference_start_date,
-        y0=0,
-        x1=reference_end_date,
-        y1=1,
-        line=dict(
-            width=0,
-        ),
-        label=dict(
-            text="Reference period", textposition="top center", font=dict(size=14)
-        ),
-        fillcolor="rgba(105,105,105,0.1)",
-        layer="above",
-    )
-    fig.update_traces(xhoverformat="%d %b %Y")
-
-    fig.update_layout(
-        title="Base and adjusted child population over time",
-        xaxis_title="Date",
-        yaxis_title="Number of children",
+    chart["layout"]["shapes"].append(
+        reference_period_shape(reference_start_date, reference_end_date)
     )
-    # Set hover label to show full placement type without truncation
-    fig.update_layout(hoverlabel=dict(namelength=-1))
-    fig.update_yaxes(rangemode="tozero")
-    fig_html = fig.to_html(full_html=False)
-    return fig_html
+    return chart
 
 
 def transition_rate_changes(base, adjusted):
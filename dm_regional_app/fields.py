@@ -0,0 +1,52 @@
+import json
+
+from django.db import models
+from django.db.models.fields.json import KeyTransform
+from django.db.models.query_utils import DeferredAttribute
+
+
+class EncodedJSON:
+    """
+    The JSON of a LazyJSONField as read from the database, before it is decoded.
+    """
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class LazyJSONDescriptor(DeferredAttribute):
+    # DeferredAttribute is only used until the field is loaded, after which the value in the instance
+    # dictionary is read directly. Defining __set__ makes this a data descriptor, so it is always used.
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+    def __get__(self, instance, cls=None):
+        value = super().__get__(instance, cls)
+        if isinstance(value, EncodedJSON):
+            value = self.field.decode(value.text)
+            instance.__dict__[self.field.attname] = value
+        return value
+
+
+class LazyJSONField(models.JSONField):
+    """
+    A JSONField which is decoded when it is first read from a model instance rather than when the row
+    is loaded, so that pages using a few fields of a scenario do not decode all of its frames.
+
+    Values fetched with QuerySet.values() are left encoded, as EncodedJSON.
+    """
+
+    descriptor_class = LazyJSONDescriptor
+
+    def from_db_value(self, value, expression, connection):
+        if not isinstance(value, str) or isinstance(expression, KeyTransform):
+            return super().from_db_value(value, expression, connection)
+        return EncodedJSON(value)
+
+    def decode(self, text: str):
+        try:
+            return json.loads(text, cls=self.decoder)
+        except json.JSONDecodeError:
+            return text
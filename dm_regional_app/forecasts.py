@@ -0,0 +1,403 @@
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable, Optional
+
+import pandas as pd
+
+from dm_regional_app.models import (
+    AbstractScenario,
+    SavedScenario,
+    ScenarioForecast,
+    SessionScenario,
+)
+from dm_regional_app.utils import apply_filters
+from ssda903 import serialization
+from ssda903.cache import ComputationCache, historic_data_key, stable_hash
+from ssda903.costs import (
+    CostForecast,
+    convert_historic_population_to_cost,
+    convert_population_to_cost,
+)
+from ssda903.datacontainer import DemandModellingDataContainer
+from ssda903.multinomial import Prediction
+from ssda903.parallel import run_concurrently
+from ssda903.population_stats import PopulationStats
+from ssda903.predictor import MODEL_VERSION, cache_prediction, cached_predict
+
+
+@dataclass
+class ScenarioOutputs:
+    base_prediction: Prediction
+    prediction: Prediction
+    costs: CostForecast
+
+
+_stage_cache = ComputationCache(
+    "scenario stage", max_entries=128, max_bytes=256 * 2**20
+)
+
+
+class Stage:
+    """
+    A step in computing the outputs of a scenario, which depends on some fields of the scenario
+    and on the results of other stages.
+    """
+
+    def __init__(
+        self,
+        compute: Callable[["ScenarioComputation"], Any],
+        fields: tuple[str, ...],
+        inputs: tuple[str, ...],
+    ):
+        self.compute = compute
+        self.fields = fields
+        self.inputs = inputs
+        self.__doc__ = compute.__doc__
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance: Optional["ScenarioComputation"], owner):
+        if instance is None:
+            return self
+        return instance.result(self.name)
+
+
+def stage(*fields: str, inputs: tuple[str, ...] = ()):
+    """
+    Declares a stage of ScenarioComputation, depending on the given scenario fields and input stages.
+    """
+    return lambda compute: Stage(compute, fields, inputs)
+
+
+class ScenarioComputation:
+    """
+    Computes the outputs of a scenario on demand, as a graph of stages.
+
+    The result of each stage is cached under a key made from the data fingerprint, the scenario fields
+    the stage depends on and the keys of its inputs. Changing a field therefore only recomputes the stages
+    downstream of it, e.g. changing the adjusted costs reuses the predictions while changing the historic
+    filters recomputes everything. Results are shared between scenarios with the same inputs, and are only
+    kept for the lifetime of the object if the data has no fingerprint.
+    """
+
+    def __init__(
+        self, scenario: AbstractScenario, datacontainer: DemandModellingDataContainer
+    ):
+        self.scenario = scenario
+        self.datacontainer = datacontainer
+        self._results = {}
+
+    def key(self, name: str) -> str:
+        """
+        Returns the key identifying the result of a stage for the current values of the scenario fields.
+        """
+        stage = getattr(type(self), name)
+        fields = {
+            field: historic_data_key(
+                self.datacontainer.fingerprint, self.scenario.historic_filters
+            )
+            if field == "historic_filters"
+            else getattr(self.scenario, field)
+            for field in stage.fields
+        }
+        inputs = [self.key(input_name) for input_name in stage.inputs]
+        return stable_hash(name, self.datacontainer.fingerprint, fields, inputs)
+
+    def result(self, name: str) -> Any:
+        """
+        Returns the result of a stage, computing it and the stages it depends on if needed.
+        """
+        stage = getattr(type(self), name)
+        key = self.key(name)
+        if key not in self._results:
+            if self.datacontainer.fingerprint is None:
+                self._results[key] = stage.compute(self)
+            else:
+                self._results[key] = _stage_cache.get_or_set(
+                    key, lambda: stage.compute(self)
+                )
+        return self._results[key]
+
+    def compute(self, *names: str) -> dict[str, float]:
+        """
+        Computes the given stages and the stages they depend on. Stages whose inputs are ready are
+        computed concurrently, so e.g. the base and adjusted predictions run side by side.
+
+        :return: The time taken by each stage, in seconds
+        """
+        pending, stack = set(), list(names)
+        while stack:
+            name = stack.pop()
+            if name not in pending:
+                pending.add(name)
+                stack.extend(getattr(type(self), name).inputs)
+
+        timings = {}
+        while pending:
+            ready = [
+                name
+                for name in pending
+                if not pending.intersection(getattr(type(self), name).inputs)
+            ]
+            results = run_concurrently(
+                {name: partial(self.result, name) for name in ready}
+            )
+            timings.update({name: result.seconds for name, result in results.items()})
+            pending.difference_update(ready)
+        return timings
+
+    @property
+    def is_empty(self) -> bool:
+        """
+        Whether the historic filters leave no historic data, in which case nothing can be forecast.
+        """
+        return self.historic_data.empty
+
+    @stage("historic_filters")
+    def historic_data(self) -> pd.DataFrame:
+        """
+        The episodes left after applying the historic filters.
+        """
+        return apply_filters(
+            self.datacontainer.enriched_view, self.scenario.historic_filters
+        )
+
+    @stage(inputs=("historic_data",))
+    def stats(self) -> PopulationStats:
+        return PopulationStats(
+            df=self.historic_data,
+            data_start_date=self.datacontainer.data_start_date,
+            data_end_date=self.datacontainer.data_end_date,
+            cache_key=historic_data_key(
+                self.datacontainer.fingerprint, self.scenario.historic_filters
+            ),
+        )
+
+    @stage("prediction_parameters", inputs=("stats",))
+    def base_prediction(self) -> Prediction:
+        """
+        The forecast without any rate or number adjustments.
+        """
+        return cached_predict(
+            stats=self.stats,
+            data_fingerprint=self.datacontainer.fingerprint,
+            historic_filters=self.scenario.historic_filters,
+            **self.scenario.prediction_parameters,
+        )
+
+    @stage(
+        "prediction_parameters",
+        "adjusted_rates",
+        "adjusted_numbers",
+        inputs=("stats",),
+    )
+    def prediction(self) -> Prediction:
+        """
+        The forecast with the rate and number adjustments of the scenario.
+        """
+        return cached_predict(
+            stats=self.stats,
+            data_fingerprint=self.datacontainer.fingerprint,
+            historic_filters=self.scenario.historic_filters,
+            **self.scenario.prediction_parameters,
+            rate_adjustment=self.scenario.adjusted_rates,
+            number_adjustment=self.scenario.adjusted_numbers,
+        )
+
+    @stage("prediction_parameters", inputs=("stats",))
+    def placement_proportions(self) -> tuple[pd.Series, pd.DataFrame]:
+        """
+        The historic placement proportions and the historic population by placement.
+        """
+        return self.stats.placement_proportions(**self.scenario.prediction_parameters)
+
+    @stage(
+        "adjusted_costs",
+        "adjusted_proportions",
+        "inflation_parameters",
+        inputs=("prediction", "placement_proportions"),
+    )
+    def costs(self) -> CostForecast:
+        """
+        The costs of the adjusted forecast.
+        """
+        return convert_population_to_cost(
+            self.prediction,
+            self.placement_proportions[0],
+            self.scenario.adjusted_costs,
+            self.scenario.adjusted_proportions,
+            **(self.scenario.inflation_parameters or {}),
+        )
+
+    @stage(
+        "adjusted_costs",
+        "inflation_parameters",
+        inputs=("base_prediction", "placement_proportions"),
+    )
+    def base_costs(self) -> CostForecast:
+        """
+        The costs of the base forecast, with the historic placement proportions.
+        """
+        return convert_population_to_cost(
+            self.base_prediction,
+            self.placement_proportions[0],
+            self.scenario.adjusted_costs,
+            **(self.scenario.inflation_parameters or {}),
+        )
+
+    @stage(
+        "adjusted_costs",
+        "adjusted_proportions",
+        inputs=("base_prediction", "placement_proportions"),
+    )
+    def uninflated_costs(self) -> CostForecast:
+        """
+        The costs of the base forecast with the adjusted costs and proportions but without inflation,
+        as shown when adjusting the weekly costs and placement proportions.
+        """
+        return convert_population_to_cost(
+            self.base_prediction,
+            self.placement_proportions[0],
+            self.scenario.adjusted_costs,
+            self.scenario.adjusted_proportions,
+        )
+
+    @stage("adjusted_costs", inputs=("placement_proportions",))
+    def historic_costs(self) -> pd.DataFrame:
+        return convert_historic_population_to_cost(
+            self.placement_proportions[1], self.scenario.adjusted_costs
+        )
+
+
+def default_historic_filters() -> dict:
+    """
+    The historic filters of a new session scenario, which leave all of the data.
+    """
+    return {
+        "la": [],
+        "ethnicity": [],
+        "sex": "all",
+        "uasc": "all",
+    }
+
+
+def warm_up(datacontainer: DemandModellingDataContainer):
+    """
+    Prepares the enriched data and the statistics of the unfiltered data, which every new session
+    scenario starts from, so that the first pages viewed do not wait for them.
+    """
+    # the statistics may already be cached from an earlier container for the same data
+    datacontainer.enriched_view
+    stats = ScenarioComputation(
+        SessionScenario(historic_filters=default_historic_filters()), datacontainer
+    ).stats
+    stats.stock
+    stats.unique_transitions
+    stats.detailed_stock
+
+
+def is_warm(datacontainer: DemandModellingDataContainer) -> bool:
+    """
+    Whether the data prepared by warm_up is ready in this process.
+    """
+    computation = ScenarioComputation(
+        SessionScenario(historic_filters=default_historic_filters()), datacontainer
+    )
+    return (
+        "enriched_view" in vars(datacontainer)
+        and computation.key("stats") in _stage_cache
+    )
+
+
+def compute_forecast(
+    scenario: AbstractScenario, datacontainer: DemandModellingDataContainer
+) -> Optional[ScenarioOutputs]:
+    """
+    Runs the model for a scenario, returning None if its filters leave no historic data.
+    """
+    computation = ScenarioComputation(scenario, datacontainer)
+    if computation.is_empty:
+        return None
+    computation.compute("base_prediction", "prediction", "costs")
+    return ScenarioOutputs(
+        computation.base_prediction, computation.prediction, computation.costs
+    )
+
+
+def save_forecast(
+    scenario: SavedScenario, datacontainer: DemandModellingDataContainer
+) -> Optional[ScenarioForecast]:
+    """
+    Computes the outputs of a saved scenario and stores them with it, replacing any stored earlier.
+    """
+    outputs = compute_forecast(scenario, datacontainer)
+    if outputs is None or datacontainer.fingerprint is None:
+        ScenarioForecast.objects.filter(scenario=scenario).delete()
+        return None
+
+    forecast, _ = ScenarioForecast.objects.update_or_create(
+        scenario=scenario,
+        defaults=dict(
+            data_fingerprint=datacontainer.fingerprint,
+            model_version=MODEL_VERSION,
+            data=serialization.dumps(
+                {
+                    "base_prediction": outputs.base_prediction,
+                    "prediction": outputs.prediction,
+                    "costs": outputs.costs,
+                }
+            ),
+        ),
+    )
+    return forecast
+
+
+def load_forecast(
+    scenario: SavedScenario, data_fingerprint: str
+) -> Optional[ScenarioOutputs]:
+    """
+    Returns the outputs stored with a saved scenario, or None if there are none or they were
+    computed from other data or by another version of the model. Outdated outputs are left to be
+    replaced by save_forecast, and are removed when data is uploaded.
+    """
+    try:
+        forecast = scenario.forecast
+    except ScenarioForecast.DoesNotExist:
+        return None
+
+    if (
+        forecast.data_fingerprint != data_fingerprint
+        or forecast.model_version != MODEL_VERSION
+    ):
+        return None
+
+    objects = serialization.loads(bytes(forecast.data))
+    return ScenarioOutputs(
+        base_prediction=Prediction(**objects["base_prediction"]),
+        prediction=Prediction(**objects["prediction"]),
+        costs=CostForecast(**objects["costs"]),
+    )
+
+
+def prime_prediction_cache(
+    scenario: AbstractScenario, outputs: ScenarioOutputs, data_fingerprint: str
+):
+    """
+    Makes the stored predictions of a scenario available to cached_predict, so that views showing
+    the scenario do not have to run the model again.
+    """
+    cache_prediction(
+        outputs.base_prediction,
+        data_fingerprint,
+        scenario.historic_filters,
+        **scenario.prediction_parameters,
+    )
+    cache_prediction(
+        outputs.prediction,
+        data_fingerprint,
+        scenario.historic_filters,
+        **scenario.prediction_parameters,
+        rate_adjustment=scenario.adjusted_rates,
+        number_adjustment=scenario.adjusted_numbers,
+    )
@@ -0,0 +1,261 @@
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Optional, Union
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+
+from dm_regional_app.forecasts import save_forecast
+from dm_regional_app.models import (
+    DataSource,
+    ForecastJob,
+    SavedScenario,
+    ScenarioForecast,
+    SessionScenario,
+    UploadJob,
+)
+from ssda903.datacontainer import DemandModellingDataContainer
+from ssda903.datastore import StorageDataStore
+from ssda903.population_stats import PopulationStats
+from ssda903.predictor import predict
+from ssda903.reader import read_data
+
+log = logging.getLogger(__name__)
+
+LOCAL_RUNNER = "local"
+
+
+def validate_with_prediction(path: str):
+    """Validate the files at path creating a prediction."""
+    try:
+        datacontainer = DemandModellingDataContainer(
+            StorageDataStore(default_storage, path)
+        )
+        stats = PopulationStats(
+            df=datacontainer.enriched_view,
+            data_start_date=datacontainer.data_start_date,
+            data_end_date=datacontainer.data_end_date,
+        )
+        predict(
+            stats=stats,
+            reference_start_date=datacontainer.data_start_date,
+            reference_end_date=datacontainer.data_end_date,
+            prediction_start_date=datacontainer.data_end_date,
+        )
+    except ValueError as e:
+        log.error(f"Upload validation failed: {e}")
+        return None, "At least one file is invalid."
+    else:
+        return datacontainer, "Successful prediction created."
+
+
+def enqueue_upload(user, files: dict) -> UploadJob:
+    """
+    Stores the uploaded files and queues a job to validate them and replace the data source.
+    With the local runner the job is run straight away, in this process, and only validates and
+    writes the files: the forecasts of saved scenarios are left to be computed when they are viewed.
+
+    :param user: The user uploading the files
+    :param files: The uploaded files by name
+    :return: The job processing the upload
+    """
+    job = UploadJob.objects.create(uploaded_by=user)
+    job.staging_path = str(Path(settings.UPLOAD_STAGING_PATH, str(job.pk)))
+    for name, file in files.items():
+        path = str(Path(job.staging_path, f"{name}.csv"))
+        if default_storage.exists(path):
+            default_storage.delete(path)
+        default_storage.save(path, file)
+    job.save(update_fields=["staging_path"])
+
+    if settings.JOB_RUNNER == LOCAL_RUNNER:
+        _update(job, status=UploadJob.Status.RUNNING)
+        run_upload_job(job, store_forecasts=False)
+    return job
+
+
+def enqueue_forecast(scenario: SavedScenario) -> ForecastJob:
+    """
+    Queues a job to compute and store the forecast of a saved scenario, removing the forecast stored
+    for its previous settings. With the local runner the job is run in a thread of this process once
+    the scenario has been committed, so that the request saving it does not wait for the model.
+
+    :param scenario: The saved scenario, with its new settings saved
+    :return: The job computing the forecast, which may have been queued by an earlier save
+    """
+    ScenarioForecast.objects.filter(scenario=scenario).delete()
+    job, _ = ForecastJob.objects.get_or_create(
+        scenario=scenario, status=ForecastJob.Status.QUEUED
+    )
+    if settings.JOB_RUNNER == LOCAL_RUNNER:
+        transaction.on_commit(
+            threading.Thread(target=_run_forecast_job_thread, args=(job.pk,)).start
+        )
+    return job
+
+
+def _run_forecast_job_thread(pk: int):
+    try:
+        job = claim_next_job(ForecastJob, pk=pk)
+        if job is not None:
+            run_forecast_job(job)
+    finally:
+        # the thread's connections are not closed by the request
+        connections.close_all()
+
+
+def claim_next_job(
+    model=UploadJob, **filters
+) -> Optional[Union[UploadJob, ForecastJob]]:
+    """
+    Marks the oldest queued job as running and returns it, or returns None if there are no queued jobs.
+    Jobs locked by another worker are skipped so that each job is only run once.
+
+    :param model: The model of the jobs, UploadJob or ForecastJob
+    :param filters: Filters limiting the jobs which may be claimed
+    """
+    with transaction.atomic():
+        job = (
+            model.objects.select_for_update(skip_locked=True)
+            .filter(status=model.Status.QUEUED, **filters)
+            .order_by("created_at")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = model.Status.RUNNING
+        job.save(update_fields=["status", "updated_at"])
+    return job
+
+
+def run_next_job() -> Optional[Union[UploadJob, ForecastJob]]:
+    """
+    Runs the oldest queued job, if there is one, and returns it. Upload jobs are run first, as they
+    replace the data which forecasts are computed from.
+    """
+    job = claim_next_job(UploadJob)
+    if job is not None:
+        run_upload_job(job)
+        return job
+
+    job = claim_next_job(ForecastJob)
+    if job is not None:
+        run_forecast_job(job)
+    return job
+
+
+def _update(job: UploadJob, **fields):
+    for name, value in fields.items():
+        setattr(job, name, value)
+    job.save(update_fields=[*fields, "updated_at"])
+
+
+def run_upload_job(job: UploadJob, store_forecasts: bool = True):
+    """
+    Validates the staged files of a job and replaces the data source with them.
+
+    :param store_forecasts: Whether to also compute and store the forecasts of saved scenarios for the
+                            new data, which takes a while so is only done by the worker runner
+    """
+    try:
+        _update(job, stage=UploadJob.Stage.VALIDATE, progress=0)
+        datacontainer, msg = validate_with_prediction(job.staging_path)
+        if datacontainer is None:
+            _update(job, status=UploadJob.Status.FAILED, message=msg)
+            return
+
+        _update(job, stage=UploadJob.Stage.WRITE, progress=40)
+        data_source = write_data_source(job, datacontainer)
+        _update(job, data_source=data_source)
+
+        if store_forecasts:
+            _update(job, stage=UploadJob.Stage.FORECAST, progress=60)
+            store_saved_forecasts(job)
+
+        _update(
+            job,
+            status=UploadJob.Status.SUCCEEDED,
+            progress=100,
+            message="Data uploaded successfully",
+        )
+    except Exception:
+        log.exception("Upload job %s failed", job.pk)
+        _update(
+            job,
+            status=UploadJob.Status.FAILED,
+            message="An unexpected error occurred while processing the files.",
+        )
+    finally:
+        _remove_staged_files(job)
+
+
+def write_data_source(
+    job: UploadJob, datacontainer: DemandModellingDataContainer
+) -> DataSource:
+    """
+    Moves the staged files of a job to the data source, clearing session scenarios and stored
+    forecasts which were based on the previous data.
+    """
+    for filename in default_storage.listdir(job.staging_path)[1]:
+        full_path = str(Path(settings.DATA_SOURCE, filename))
+        # Overwrite files if they already exist
+        if default_storage.exists(full_path):
+            default_storage.delete(full_path)
+        with default_storage.open(os.path.join(job.staging_path, filename)) as file:
+            default_storage.save(full_path, file)
+
+    data_source = DataSource.objects.create(
+        uploaded_by=job.uploaded_by,
+        data_start_date=datacontainer.data_start_date,
+        data_end_date=datacontainer.data_end_date,
+    )
+    SessionScenario.objects.all().delete()
+    ScenarioForecast.objects.all().delete()
+    return data_source
+
+
+def store_saved_forecasts(job: UploadJob):
+    """
+    Computes the forecasts of saved scenarios for the new data and stores them in the database, so
+    that users opening a saved scenario do not wait for the model.
+    """
+    datacontainer = read_data(source=settings.DATA_SOURCE)
+    scenarios = SavedScenario.objects.all()
+    total = scenarios.count()
+    for count, scenario in enumerate(scenarios.iterator(), start=1):
+        try:
+            save_forecast(scenario, datacontainer)
+        except Exception:
+            log.exception(
+                "Could not prepare the forecast of saved scenario %s", scenario.pk
+            )
+        _update(job, progress=60 + 40 * count // (total + 1))
+
+
+def run_forecast_job(job: ForecastJob):
+    """
+    Computes the forecast of a saved scenario for the current data and stores it in the database.
+    """
+    try:
+        save_forecast(job.scenario, read_data(source=settings.DATA_SOURCE))
+        _update(job, status=ForecastJob.Status.SUCCEEDED)
+    except Exception:
+        log.exception("Forecast job %s failed", job.pk)
+        _update(
+            job,
+            status=ForecastJob.Status.FAILED,
+            message="An unexpected error occurred while computing the forecast.",
+        )
+
+
+def _remove_staged_files(job: UploadJob):
+    if not job.staging_path:
+        return
+    try:
+        for filename in default_storage.listdir(job.staging_path)[1]:
+            default_storage.delete(os.path.join(job.staging_path, filename))
+    except FileNotFoundError:
+        pass
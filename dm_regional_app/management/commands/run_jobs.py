@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from dm_regional_app.jobs import run_next_job
+
+
+class Command(BaseCommand):
+    help = "Runs queued upload and forecast jobs, polling the database for new ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds to wait between checks for new jobs",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run the jobs which are queued and exit",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            job = run_next_job()
+            if job is not None:
+                kind = job._meta.verbose_name.capitalize()
+                self.stdout.write(f"{kind} {job.pk}: {job.get_status_display()}")
+            elif options["once"]:
+                return
+            else:
+                time.sleep(options["interval"])
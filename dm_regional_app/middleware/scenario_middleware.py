@@ -1,10 +1,50 @@
 import re
+from typing import Optional
 
+from django.conf import settings
 from django.contrib import messages
+from django.core.cache import cache
 from django.shortcuts import redirect
+from django.utils.functional import SimpleLazyObject
 
+from dm_regional_app.forecasts import default_historic_filters
 from dm_regional_app.models import DataSource, SessionScenario
 
+# The default cache holds the id of the latest DataSource (0 if there is none), which is cleared when
+# data is uploaded. Each process keeps the DataSource itself and only reads it again when the id
+# changes or is cleared. Processes which do not share the default cache see an upload once the id
+# expires, or sooner when they find that the upload has deleted a session scenario.
+DATA_SOURCE_VERSION_KEY = "latest_data_source_version"
+_latest_data_source = (None, None)
+
+
+def latest_data_source(refresh: bool = False) -> Optional[DataSource]:
+    """
+    Returns the most recently uploaded DataSource, or None if no data has been uploaded.
+
+    :param refresh: Read the DataSource from the database even if this process has the latest version
+    """
+    global _latest_data_source
+    version = cache.get(DATA_SOURCE_VERSION_KEY)
+    cached_version, data_source = _latest_data_source
+    if not refresh and version is not None and version == cached_version:
+        return data_source
+
+    data_source = DataSource.objects.order_by("-uploaded").first()
+    version = data_source.pk if data_source else 0
+    cache.set(
+        DATA_SOURCE_VERSION_KEY, version, timeout=settings.DATA_SOURCE_VERSION_TIMEOUT
+    )
+    _latest_data_source = (version, data_source)
+    return data_source
+
+
+def clear_latest_data_source():
+    """
+    Makes processes sharing the default cache read the latest DataSource again.
+    """
+    cache.delete(DATA_SOURCE_VERSION_KEY)
+
 
 class SessionScenarioMiddleware:
     PATHS_TO_IGNORE = re.compile(
@@ -16,54 +56,13 @@ class SessionScenarioMiddleware:
         self.get_response = get_response
 
     def __call__(self, request):
-        # Initialise a SessionScenario
-        session_scenario_id = request.session.get("session_scenario_id", None)
         current_user = request.user
 
         if not current_user.is_authenticated:
             return self.get_response(request)
 
-        if DataSource.objects.exists():
-            historic_filters = {
-                "la": [],
-                "ethnicity": [],
-                "sex": "all",
-                "uasc": "all",
-            }
-
-            data = DataSource.objects.latest("uploaded")
-            prediction_parameters = {
-                "reference_start_date": data.data_start_date,
-                "reference_end_date": data.data_end_date,
-                "prediction_start_date": data.data_end_date,
-                "prediction_end_date": None,
-            }
-            historic_stock = {
-                "population": {},
-                "base_rates": [],
-            }
-            inflation_parameters = {
-                "inflation": False,
-                "inflation_rate": 0.1,
-            }
-
-            # default_values should define the model default parameters
-            session_scenario, created = SessionScenario.objects.get_or_create(
-                id=session_scenario_id,
-                defaults={
-                    "user_id": current_user.id,
-                    "historic_filters": historic_filters,
-                    "prediction_parameters": prediction_parameters,
-                    "historic_stock": historic_stock,
-                    "adjusted_costs": None,
-                    "adjusted_rates": None,
-                    "adjusted_proportions": None,
-                    "inflation_parameters": inflation_parameters,
-                },
-            )
-
-            request.session["session_scenario_id"] = session_scenario.pk
-        else:
+        data = latest_data_source()
+        if data is None:
             if self.PATHS_TO_IGNORE.match(request.path_info):
                 return self.get_response(request)
 
@@ -74,4 +73,56 @@ class SessionScenarioMiddleware:
             )
             return redirect("home")
 
+        # Only views which use the scenario look it up, so other requests make no scenario queries
+        request.session_scenario = SimpleLazyObject(
+            lambda: self.session_scenario(request, data)
+        )
         return self.get_response(request)
+
+    def session_scenario(self, request, data: DataSource) -> SessionScenario:
+        """
+        Returns the scenario of the session, creating it if the session has none or it has been
+        deleted, as session scenarios are when data is uploaded.
+        """
+        session_scenario_id = request.session.get("session_scenario_id", None)
+        if session_scenario_id is not None:
+            session_scenario = SessionScenario.objects.filter(
+                id=session_scenario_id
+            ).first()
+            if session_scenario is not None:
+                return session_scenario
+            # the upload which deleted it may not have reached this process yet
+            data = latest_data_source(refresh=True) or data
+
+        # concurrent requests of the session may both find the scenario missing, so only one creates it
+        session_scenario, _ = SessionScenario.objects.get_or_create(
+            id=session_scenario_id,
+            defaults=self.scenario_defaults(request.user, data),
+        )
+        if session_scenario.pk != session_scenario_id:
+            request.session["session_scenario_id"] = session_scenario.pk
+        return session_scenario
+
+    def scenario_defaults(self, user, data: DataSource) -> dict:
+        # default values should define the model default parameters
+        return dict(
+            user_id=user.id,
+            historic_filters=default_historic_filters(),
+            prediction_parameters={
+                "reference_start_date": data.data_start_date,
+                "reference_end_date": data.data_end_date,
+                "prediction_start_date": data.data_end_date,
+                "prediction_end_date": None,
+            },
+            historic_stock={
+                "population": {},
+                "base_rates": [],
+            },
+            adjusted_costs=None,
+            adjusted_rates=None,
+            adjusted_proportions=None,
+            inflation_parameters={
+                "inflation": False,
+                "inflation_rate": 0.1,
+            },
+        )
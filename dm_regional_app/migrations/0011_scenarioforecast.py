@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-19 01:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dm_regional_app", "0010_rename_end_date_datasource_data_end_date_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScenarioForecast",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("data_fingerprint", models.CharField(max_length=64)),
+                ("model_version", models.CharField(max_length=32)),
+                ("data", models.BinaryField()),
+                (
+                    "scenario",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="forecast",
+                        to="dm_regional_app.savedscenario",
+                    ),
+                ),
+            ],
+        ),
+    ]
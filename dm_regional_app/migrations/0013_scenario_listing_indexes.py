@@ -0,0 +1,166 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:13
+
+from django.db import migrations, models
+
+import dm_regional_app.fields
+import dm_regional_app.utils
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dm_regional_app", "0012_uploadjob"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="profile",
+            name="la",
+            field=models.CharField(
+                blank=True, db_index=True, max_length=100, null=True
+            ),
+        ),
+        migrations.AlterField(
+            model_name="savedscenario",
+            name="adjusted_costs",
+            field=dm_regional_app.fields.LazyJSONField(
+                decoder=dm_regional_app.utils.DateAwareJSONDecoder,
+                encoder=dm_regional_app.utils.SeriesAwareJSONEncoder,
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="savedscenario",
+            name="adjusted_numbers",
+            field=dm_regional_app.fields.LazyJSONField(
+                decoder=dm_regional_app.utils.DateAwareJSONDecoder,
+                encoder=dm_regional_app.utils.SeriesAwareJSONEncoder,
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="savedscenario",
+            name="adjusted_proportions",
+            field=dm_regional_app.fields.LazyJSONField(
+                decoder=dm_regional_app.utils.DateAwareJSONDecoder,
+                encoder=dm_regional_app.utils.SeriesAwareJSONEncoder,
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="savedscenario",
+            name="adjusted_rates",
+            field=dm_regional_app.fields.LazyJSONField(
+                decoder=dm_regional_app.utils.DateAwareJSONDecoder,
+                encoder=dm_regional_app.utils.SeriesAwareJSONEncoder,
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="savedscenario",
+            name="historic_filters",
+            field=dm_regional_app.fields.LazyJSONField(
+                decoder=dm_regional_app.utils.DateAwareJSONDecoder,
+                encoder=dm_regional_app.utils.SeriesAwareJSONEncoder,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="savedscenario",
+            name="historic_stock",
+            field=dm_regional_app.fields.LazyJSONField(
+                decoder=dm_regional_app.utils.DateAwareJSONDecoder,
+                encoder=dm_regional_app.utils.SeriesAwareJSONEncoder,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="savedscenario",
+            name="inflation_parameters",
+            field=dm_regional_app.fields.LazyJSONField(
+                decoder=dm_regional_app.utils.DateAwareJSONDecoder,
+                encoder=dm_regional_app.utils.SeriesAwareJSONEncoder,
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="savedscenario",
+            name="prediction_parameters",
+            field=dm_regional_app.fields.LazyJSONField(
+                decoder=dm_regional_app.utils.DateAwareJSONDecoder,
+                encoder=dm_regional_app.utils.SeriesAwareJSONEncoder,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="sessionscenario",
+            name="adjusted_costs",
+            field=dm_regional_app.fields.LazyJSONField(
+                decoder=dm_regional_app.utils.DateAwareJSONDecoder,
+                encoder=dm_regional_app.utils.SeriesAwareJSONEncoder,
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="sessionscenario",
+            name="adjusted_numbers",
+            field=dm_regional_app.fields.LazyJSONField(
+                decoder=dm_regional_app.utils.DateAwareJSONDecoder,
+                encoder=dm_regional_app.utils.SeriesAwareJSONEncoder,
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="sessionscenario",
+            name="adjusted_proportions",
+            field=dm_regional_app.fields.LazyJSONField(
+                decoder=dm_regional_app.utils.DateAwareJSONDecoder,
+                encoder=dm_regional_app.utils.SeriesAwareJSONEncoder,
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="sessionscenario",
+            name="adjusted_rates",
+            field=dm_regional_app.fields.LazyJSONField(
+                decoder=dm_regional_app.utils.DateAwareJSONDecoder,
+                encoder=dm_regional_app.utils.SeriesAwareJSONEncoder,
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="sessionscenario",
+            name="historic_filters",
+            field=dm_regional_app.fields.LazyJSONField(
+                decoder=dm_regional_app.utils.DateAwareJSONDecoder,
+                encoder=dm_regional_app.utils.SeriesAwareJSONEncoder,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="sessionscenario",
+            name="historic_stock",
+            field=dm_regional_app.fields.LazyJSONField(
+                decoder=dm_regional_app.utils.DateAwareJSONDecoder,
+                encoder=dm_regional_app.utils.SeriesAwareJSONEncoder,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="sessionscenario",
+            name="inflation_parameters",
+            field=dm_regional_app.fields.LazyJSONField(
+                decoder=dm_regional_app.utils.DateAwareJSONDecoder,
+                encoder=dm_regional_app.utils.SeriesAwareJSONEncoder,
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="sessionscenario",
+            name="prediction_parameters",
+            field=dm_regional_app.fields.LazyJSONField(
+                decoder=dm_regional_app.utils.DateAwareJSONDecoder,
+                encoder=dm_regional_app.utils.SeriesAwareJSONEncoder,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="savedscenario",
+            index=models.Index(
+                fields=["-updated_at"], name="savedscenario_updated_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations, models
+
+
+def rename_stage(apps, old, new):
+    UploadJob = apps.get_model("dm_regional_app", "UploadJob")
+    UploadJob.objects.filter(stage=old).update(stage=new)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dm_regional_app", "0013_scenario_listing_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="uploadjob",
+            name="stage",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("validate", "Validating files"),
+                    ("write", "Saving files"),
+                    ("forecast", "Storing saved scenario forecasts"),
+                ],
+                max_length=16,
+            ),
+        ),
+        migrations.RunPython(
+            lambda apps, schema_editor: rename_stage(apps, "prewarm", "forecast"),
+            lambda apps, schema_editor: rename_stage(apps, "forecast", "prewarm"),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from dm_regional_app.fields import LazyJSONField
 from dm_regional_app.utils import DateAwareJSONDecoder, SeriesAwareJSONEncoder
 
 User = get_user_model()
@@ -10,28 +11,28 @@ class AbstractScenario(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    historic_filters = models.JSONField(
+    historic_filters = LazyJSONField(
         encoder=SeriesAwareJSONEncoder, decoder=DateAwareJSONDecoder
     )
-    prediction_parameters = models.JSONField(
+    prediction_parameters = LazyJSONField(
         encoder=SeriesAwareJSONEncoder, decoder=DateAwareJSONDecoder
     )
-    adjusted_rates = models.JSONField(
+    adjusted_rates = LazyJSONField(
         encoder=SeriesAwareJSONEncoder, decoder=DateAwareJSONDecoder, null=True
     )
-    adjusted_numbers = models.JSONField(
+    adjusted_numbers = LazyJSONField(
         encoder=SeriesAwareJSONEncoder, decoder=DateAwareJSONDecoder, null=True
     )
-    historic_stock = models.JSONField(
+    historic_stock = LazyJSONField(
         encoder=SeriesAwareJSONEncoder, decoder=DateAwareJSONDecoder
     )
-    adjusted_costs = models.JSONField(
+    adjusted_costs = LazyJSONField(
         encoder=SeriesAwareJSONEncoder, decoder=DateAwareJSONDecoder, null=True
     )
-    adjusted_proportions = models.JSONField(
+    adjusted_proportions = LazyJSONField(
         encoder=SeriesAwareJSONEncoder, decoder=DateAwareJSONDecoder, null=True
     )
-    inflation_parameters = models.JSONField(
+    inflation_parameters = LazyJSONField(
         encoder=SeriesAwareJSONEncoder, decoder=DateAwareJSONDecoder, null=True
     )
 
@@ -44,10 +45,28 @@ class SavedScenario(AbstractScenario):
     name = models.CharField(max_length=255)
     description = models.TextField(null=True, blank=True)
 
+    class Meta:
+        # scenarios are listed by local authority, most recently updated first
+        indexes = [
+            models.Index(fields=["-updated_at"], name="savedscenario_updated_idx")
+        ]
+
     def __str__(self):
         return self.name
 
 
+class ScenarioForecast(models.Model):
+    # model outputs for a saved scenario, stored so that they do not have to be recomputed
+    scenario = models.OneToOneField(
+        SavedScenario, on_delete=models.CASCADE, related_name="forecast"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+    # the data and model version the outputs were computed with, if either changes they are stale
+    data_fingerprint = models.CharField(max_length=64)
+    model_version = models.CharField(max_length=32)
+    data = models.BinaryField()
+
+
 class SessionScenario(AbstractScenario):
     # optional foreign key to saved scenario - so that we can update it when the user is done navigating between pages
     saved_scenario = models.ForeignKey(
@@ -58,7 +77,7 @@ class SessionScenario(AbstractScenario):
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="profile")
     show_filtering_instructions = models.BooleanField(default=True)
-    la = models.CharField(max_length=100, null=True, blank=True)
+    la = models.CharField(max_length=100, null=True, blank=True, db_index=True)
     show_rate_adjustment_instructions = models.BooleanField(default=True)
 
 
@@ -67,3 +86,55 @@ class DataSource(models.Model):
     uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE)
     data_start_date = models.DateTimeField(null=True, blank=True)
     data_end_date = models.DateTimeField(null=True, blank=True)
+
+
+class UploadJob(models.Model):
+    # processing of an uploaded data source, run in the background by a worker
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        RUNNING = "running", "Running"
+        SUCCEEDED = "succeeded", "Succeeded"
+        FAILED = "failed", "Failed"
+
+    class Stage(models.TextChoices):
+        VALIDATE = "validate", "Validating files"
+        WRITE = "write", "Saving files"
+        FORECAST = "forecast", "Storing saved scenario forecasts"
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    # where the uploaded files are kept until they have been validated
+    staging_path = models.CharField(max_length=255, blank=True)
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.QUEUED
+    )
+    stage = models.CharField(max_length=16, choices=Stage.choices, blank=True)
+    progress = models.PositiveSmallIntegerField(default=0)
+    message = models.TextField(blank=True)
+    data_source = models.ForeignKey(
+        DataSource, null=True, blank=True, on_delete=models.SET_NULL
+    )
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (self.Status.SUCCEEDED, self.Status.FAILED)
+
+
+class ForecastJob(models.Model):
+    # computation of the stored forecast of a saved scenario, run in the background by a worker
+    Status = UploadJob.Status
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    scenario = models.ForeignKey(
+        SavedScenario, on_delete=models.CASCADE, related_name="forecast_jobs"
+    )
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.QUEUED
+    )
+    message = models.TextField(blank=True)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (self.Status.SUCCEEDED, self.Status.FAILED)
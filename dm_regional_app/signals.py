@@ -1,8 +1,9 @@
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from dm_regional_app.models import Profile
+from dm_regional_app.middleware.scenario_middleware import clear_latest_data_source
+from dm_regional_app.models import DataSource, Profile
 
 User = get_user_model()
 
@@ -15,3 +16,9 @@ def create_user_profile(sender, instance, created, **kwargs):
         else:
             la = None
         Profile.objects.create(user=instance, la=la)
+
+
+@receiver(post_save, sender=DataSource)
+@receiver(post_delete, sender=DataSource)
+def update_latest_data_source(sender, instance, **kwargs):
+    clear_latest_data_source()
@@ -0,0 +1,41 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from dm_regional_app.utils import care_type_organiser
+
+
+class CareTypeOrganiserTestCase(SimpleTestCase):
+    def setUp(self):
+        self.df = pd.DataFrame(
+            {
+                "5 to 10 - Fostering": [1, 2],
+                "10 to 16 - Fostering": [3, np.nan],
+                "10 to 16 - Residential": [5, 6],
+                "10 to 16 - Not in care": [100, 100],
+            },
+            index=pd.to_datetime(["2024-01-01", "2024-01-08"]),
+        )
+
+    def test_totals_by_care_type(self):
+        organised = care_type_organiser(self.df, "pop_size")
+
+        self.assertEqual(
+            list(organised),
+            ["Fostering", "Residential", "Supported", "Other", "Total"],
+        )
+        self.assertEqual(
+            list(organised["Fostering"]["date"]),
+            [date(2024, 1, 1), date(2024, 1, 8)],
+        )
+        self.assertEqual(list(organised["Fostering"]["pop_size"]), [4, 2])
+        self.assertEqual(list(organised["Residential"]["pop_size"]), [5, 6])
+        self.assertEqual(list(organised["Total"]["pop_size"]), [9, 8])
+
+    def test_care_type_without_columns_is_empty(self):
+        organised = care_type_organiser(self.df, "pop_size")
+
+        self.assertTrue(organised["Supported"].empty)
+        self.assertEqual(list(organised["Supported"].columns), ["date", "pop_size"])
@@ -0,0 +1,123 @@
+from datetime import date
+from unittest.mock import PropertyMock, patch
+
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+
+from dm_regional_app import views
+from dm_regional_app.builder import Builder
+from dm_regional_app.models import DataSource, SessionScenario
+from ssda903.datastore import StorageDataStore
+
+
+class ChartTestCase(TestCase):
+    builder = Builder()
+
+    def setUp(self):
+        self.user = self.builder.user(email="testuser", password="testpassword")
+        self.client.login(username="testuser", password="testpassword")
+        DataSource.objects.create(
+            uploaded_by=self.user,
+            data_start_date=date(2017, 4, 1),
+            data_end_date=date(2020, 3, 31),
+        )
+        self.scenario = SessionScenario.objects.create(
+            user=self.user,
+            historic_filters={"la": [], "ethnicity": [], "sex": "all", "uasc": "all"},
+            prediction_parameters={
+                "reference_start_date": date(2017, 4, 1),
+                "reference_end_date": date(2020, 3, 31),
+                "prediction_start_date": date(2020, 3, 31),
+                "prediction_end_date": None,
+            },
+            historic_stock={},
+            adjusted_costs=None,
+            inflation_parameters={"inflation": False, "inflation_rate": 0.1},
+        )
+        session = self.client.session
+        session["session_scenario_id"] = self.scenario.pk
+        session.save()
+        caches["charts"].clear()
+
+    def get_chart(self, chart):
+        response = self.client.get(reverse("chart_data", args=[chart]))
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+
+class ChartDataViewTestCase(ChartTestCase):
+    def test_traces_refer_to_shared_dates(self):
+        chart = self.get_chart("prediction")
+        self.assertEqual(
+            chart["layout"]["title"]["text"], "Forecast child population over time"
+        )
+        # historic and forecast populations, and the forecast confidence intervals
+        self.assertEqual(len(chart["dates"]), 2)
+        for trace in chart["traces"]:
+            self.assertEqual(len(trace["y"]), len(chart["dates"][trace["x"]]))
+
+    def test_reference_period_is_shaded(self):
+        shape = self.get_chart("compare")["layout"]["shapes"][0]
+        self.assertEqual((shape["x0"], shape["x1"]), ("2017-04-01", "2020-03-31"))
+
+    def test_all_charts(self):
+        for chart in [
+            "historic",
+            "placement_starts",
+            "prediction",
+            "compare",
+            "population",
+            "costs",
+        ]:
+            with self.subTest(chart=chart):
+                self.assertTrue(self.get_chart(chart)["traces"])
+
+    def test_unknown_chart(self):
+        response = self.client.get(reverse("chart_data", args=["unknown"]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_empty_filters(self):
+        self.scenario.historic_filters["la"] = ["Nowhere"]
+        self.scenario.save()
+        response = self.client.get(reverse("chart_data", args=["historic"]))
+        self.assertEqual(response.status_code, 404)
+
+
+class ChartCacheTestCase(ChartTestCase):
+    def test_chart_is_cached(self):
+        chart = self.get_chart("historic")
+        with patch.object(views, "historic_chart") as historic_chart:
+            self.assertEqual(self.get_chart("historic"), chart)
+        historic_chart.assert_not_called()
+
+    def test_chart_is_rebuilt_when_its_inputs_change(self):
+        self.get_chart("historic")
+        self.scenario.historic_filters["sex"] = "1"
+        self.scenario.save()
+        with patch.object(
+            views, "historic_chart", wraps=views.historic_chart
+        ) as historic_chart:
+            self.get_chart("historic")
+        historic_chart.assert_called_once()
+
+    def test_chart_is_kept_when_other_inputs_change(self):
+        self.get_chart("prediction")
+        self.scenario.adjusted_costs = {"Fostering (IFA)": 400}
+        self.scenario.save()
+        with patch.object(views, "prediction_chart") as prediction_chart:
+            self.get_chart("prediction")
+        prediction_chart.assert_not_called()
+
+    def test_chart_is_rebuilt_for_new_data(self):
+        self.get_chart("historic")
+        with patch.object(
+            StorageDataStore,
+            "source_fingerprint",
+            new_callable=PropertyMock,
+            return_value="new data",
+        ), patch.object(
+            views, "historic_chart", wraps=views.historic_chart
+        ) as historic_chart:
+            self.get_chart("historic")
+        historic_chart.assert_called_once()
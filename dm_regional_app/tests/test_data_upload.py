@@ -2,13 +2,21 @@ from datetime import datetime
 from unittest import mock
 from unittest.mock import MagicMock, patch
 
+from django.conf import settings
+from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
 from dm_regional_app.builder import Builder
 from dm_regional_app.forms import DataSourceUploadForm
-from dm_regional_app.models import DataSource
+from dm_regional_app.jobs import run_next_job
+from dm_regional_app.models import DataSource, UploadJob
+
+IN_MEMORY_STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
 
 
 class DataUploadTestCase(TestCase):
@@ -51,8 +59,9 @@ class DataUploadTestCase(TestCase):
         self.assertFormError(form, "header", "File must have extension .csv")
         self.assertFormError(form, "uasc", "File must have extension .csv")
 
-    @patch("dm_regional_app.views.validate_with_prediction")
-    def test_data_upload_success(self, prediction):
+    @patch("dm_regional_app.jobs.store_saved_forecasts")
+    @patch("dm_regional_app.jobs.validate_with_prediction")
+    def test_data_upload_success(self, prediction, store_saved_forecasts):
         files = {
             "episodes": SimpleUploadedFile("episodes.csv", b"episodes"),
             "header": SimpleUploadedFile("header.csv", b"header"),
@@ -65,18 +74,72 @@ class DataUploadTestCase(TestCase):
         type(datacontainer).data_end_date = datetime(2024, 12, 1)
         prediction.return_value = datacontainer, None
 
-        with mock.patch("django.core.files.storage.FileSystemStorage") as mock_storage:
+        # overriding STORAGES sets up default_storage again afterwards, so the mock is not kept
+        with override_settings(STORAGES=settings.STORAGES), mock.patch(
+            "django.core.files.storage.FileSystemStorage"
+        ) as mock_storage:
             self.client.post(reverse("upload_data"), files)
             self.assertEqual(DataSource.objects.count(), 1)
             mock_storage.assert_called()
+        # the local runner leaves saved scenario forecasts to be computed when they are viewed
+        store_saved_forecasts.assert_not_called()
+
+        job = UploadJob.objects.get()
+        self.assertEqual(job.status, UploadJob.Status.SUCCEEDED)
+        self.assertEqual(job.progress, 100)
+        self.assertEqual(job.data_source, DataSource.objects.get())
 
-    @patch("dm_regional_app.views.validate_with_prediction")
+    @patch("dm_regional_app.jobs.validate_with_prediction")
     def test_data_upload_failure(self, prediction):
         files = {
             "episodes": SimpleUploadedFile("episodes.csv", b"episodes"),
             "header": SimpleUploadedFile("header.csv", b"header"),
             "uasc": SimpleUploadedFile("uasc.csv", b"uasc"),
         }
-        prediction.return_value = None, None
+        prediction.return_value = None, "At least one file is invalid."
+        with override_settings(STORAGES=IN_MEMORY_STORAGES):
+            self.client.post(reverse("upload_data"), files)
+        self.assertEqual(DataSource.objects.count(), 0)
+
+        job = UploadJob.objects.get()
+        self.assertEqual(job.status, UploadJob.Status.FAILED)
+        self.assertEqual(job.message, "At least one file is invalid.")
+
+    @override_settings(JOB_RUNNER="worker", STORAGES=IN_MEMORY_STORAGES)
+    @patch("dm_regional_app.jobs.store_saved_forecasts")
+    @patch("dm_regional_app.jobs.validate_with_prediction")
+    def test_data_upload_queued_for_worker(self, prediction, store_saved_forecasts):
+        files = {
+            "episodes": SimpleUploadedFile("episodes.csv", b"episodes"),
+            "header": SimpleUploadedFile("header.csv", b"header"),
+            "uasc": SimpleUploadedFile("uasc.csv", b"uasc"),
+        }
+        datacontainer = MagicMock()
+        type(datacontainer).data_start_date = datetime(2024, 1, 1)
+        type(datacontainer).data_end_date = datetime(2024, 12, 1)
+        prediction.return_value = datacontainer, None
+
         self.client.post(reverse("upload_data"), files)
+        job = UploadJob.objects.get()
+        self.assertEqual(job.status, UploadJob.Status.QUEUED)
         self.assertEqual(DataSource.objects.count(), 0)
+
+        response = self.client.get(reverse("upload_job_status", args=[job.pk]))
+        self.assertEqual(response.json()["status"], UploadJob.Status.QUEUED)
+        self.assertFalse(response.json()["finished"])
+
+        self.assertEqual(run_next_job(), job)
+        self.assertIsNone(run_next_job())
+        store_saved_forecasts.assert_called_once_with(job)
+
+        response = self.client.get(reverse("upload_job_status", args=[job.pk]))
+        self.assertEqual(response.json()["status"], UploadJob.Status.SUCCEEDED)
+        self.assertTrue(response.json()["finished"])
+        self.assertEqual(DataSource.objects.count(), 1)
+
+        # the staged files are moved to the data source
+        self.assertEqual(
+            sorted(default_storage.listdir(settings.DATA_SOURCE)[1]),
+            ["episodes.csv", "header.csv", "uasc.csv"],
+        )
+        self.assertEqual(default_storage.listdir(job.staging_path)[1], [])
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from dm_regional_app.utils import chart_dates, downsample_chart, lttb_indices, new_chart
+
+
+class LttbTestCase(SimpleTestCase):
+    def test_keeps_short_lines(self):
+        x = np.arange(5, dtype=float)
+        np.testing.assert_array_equal(lttb_indices(x, x, 10), np.arange(5))
+
+    def test_keeps_ends_and_peaks(self):
+        x = np.arange(1000, dtype=float)
+        y = np.zeros(1000)
+        y[500] = 10
+        y[750] = -10
+
+        indices = lttb_indices(x, y, 50)
+
+        self.assertEqual(len(indices), 50)
+        self.assertEqual((indices[0], indices[-1]), (0, 999))
+        self.assertTrue(np.all(np.diff(indices) > 0))
+        self.assertIn(500, indices)
+        self.assertIn(750, indices)
+
+    def test_missing_values(self):
+        x = np.arange(100, dtype=float)
+        y = np.full(100, np.nan)
+        self.assertEqual(len(lttb_indices(x, y, 10)), 10)
+
+
+class DownsampleChartTestCase(SimpleTestCase):
+    def setUp(self):
+        self.chart = new_chart("Chart", "Date", "Children")
+        dates = pd.date_range("2015-01-01", periods=500, freq="7D")
+        x = chart_dates(self.chart, dates)
+        values = list(np.sin(np.arange(500) / 10))
+        self.chart["traces"] = [
+            {"x": x, "y": values, "name": "Line"},
+            {"x": x, "y": values},
+            {"x": x, "y": [value + 1 for value in values], "fill": "tonexty"},
+            {"x": x, "y": values, "stackgroup": "1"},
+            {"x": x, "y": values, "stackgroup": "1"},
+        ]
+
+    def test_traces_are_limited(self):
+        chart = downsample_chart(self.chart, 100)
+        for trace in chart["traces"]:
+            self.assertEqual(len(trace["y"]), 100)
+            self.assertEqual(len(chart["dates"][trace["x"]]), 100)
+        self.assertEqual(chart["dates"][0][0], "2015-01-01")
+
+    def test_grouped_traces_stay_aligned(self):
+        chart = downsample_chart(self.chart, 100)
+        traces = chart["traces"]
+        self.assertEqual(traces[1]["x"], traces[2]["x"])
+        self.assertEqual(traces[3]["x"], traces[4]["x"])
+
+    def test_unused_dates_are_removed(self):
+        chart = downsample_chart(self.chart, 100)
+        self.assertEqual(
+            sorted({trace["x"] for trace in chart["traces"]}),
+            list(range(len(chart["dates"]))),
+        )
+
+    def test_short_charts_are_unchanged(self):
+        chart = downsample_chart(self.chart, 1000)
+        self.assertEqual(len(chart["dates"]), 1)
+        self.assertEqual(len(chart["traces"][0]["y"]), 500)
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.test import TestCase
+from django.urls import reverse
+
+from dm_regional_app.forecasts import warm_up
+from ssda903 import reader
+from ssda903.reader import read_data
+
+
+class HealthViewTestCase(TestCase):
+    def setUp(self):
+        reader._container_cache.clear()
+
+    def test_cold_process(self):
+        response = self.client.get(reverse("health"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"status": "ok", "warm": False})
+
+    def test_read_data_is_not_warm(self):
+        read_data(source=settings.DATA_SOURCE)
+        response = self.client.get(reverse("health"))
+        self.assertFalse(response.json()["warm"])
+
+    def test_warm_process(self):
+        warm_up(read_data(source=settings.DATA_SOURCE))
+        response = self.client.get(reverse("health"))
+        self.assertEqual(response.json(), {"status": "ok", "warm": True})
@@ -0,0 +1,79 @@
+import json
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+from django.test import SimpleTestCase
+
+from dm_regional_app.utils import DateAwareJSONDecoder, SeriesAwareJSONEncoder
+
+
+def round_trip(value):
+    return json.loads(
+        json.dumps(value, cls=SeriesAwareJSONEncoder), cls=DateAwareJSONDecoder
+    )
+
+
+class JSONEncodingTestCase(SimpleTestCase):
+    def test_series_with_multiindex(self):
+        series = pd.Series(
+            [0.1, np.nan, 0.3],
+            index=pd.MultiIndex.from_tuples(
+                [("a", "b"), ("a", "c"), ("b", "c")], names=["from", "to"]
+            ),
+            name="rates",
+        )
+        pdt.assert_series_equal(round_trip(series), series)
+
+    def test_dataframe_with_missing_values(self):
+        df = pd.DataFrame(
+            {"multiply_value": [1.5, None], "add_value": [None, 2.0]},
+            index=pd.Index(["a", "b"], name="transition"),
+        )
+        pdt.assert_frame_equal(round_trip(df), df)
+
+    def test_long_arrays_are_compact(self):
+        df = pd.DataFrame(
+            {
+                "bin": ["Fostering", "Residential"] * 100,
+                "value": np.arange(200, dtype=float),
+            },
+            index=pd.date_range("2020-01-01", periods=200),
+        )
+        encoded = json.loads(json.dumps(df, cls=SeriesAwareJSONEncoder))
+        self.assertEqual(encoded["columns"]["arrays"][0]["values"], ["bin", "value"])
+        self.assertEqual(
+            encoded["data"][0]["categories"]["values"], ["Fostering", "Residential"]
+        )
+        self.assertIn("base64", encoded["data"][1])
+        self.assertIn("base64", encoded["index"]["arrays"][0])
+
+        pdt.assert_frame_equal(round_trip(df), df, check_freq=False)
+
+    def test_dates_in_parameters(self):
+        parameters = {"reference_start_date": date(2020, 1, 1), "other": "2020-01-01"}
+        self.assertEqual(round_trip(parameters), parameters)
+
+    def test_earlier_encoding_is_read(self):
+        series = json.loads(
+            '{"__type__": "pd.Series", "data": [0.1, 0.2], "index": [["a", "b"], ["a", "c"]],'
+            ' "is_multiindex": true}',
+            cls=DateAwareJSONDecoder,
+        )
+        pdt.assert_series_equal(
+            series,
+            pd.Series(
+                [0.1, 0.2], index=pd.MultiIndex.from_tuples([("a", "b"), ("a", "c")])
+            ),
+        )
+
+        df = json.loads(
+            '{"__type__": "pd.DataFrame", "data": [{"multiply_value": 1.5, "add_value": null}],'
+            ' "columns": ["multiply_value", "add_value"], "index": ["a"], "index_names": [null],'
+            ' "is_multiindex": false}',
+            cls=DateAwareJSONDecoder,
+        )
+        self.assertEqual(list(df.columns), ["multiply_value", "add_value"])
+        self.assertEqual(df.loc["a", "multiply_value"], 1.5)
+        self.assertTrue(pd.isna(df.loc["a", "add_value"]))
@@ -0,0 +1,56 @@
+from unittest.mock import patch
+
+import pandas as pd
+import pandas.testing as pdt
+from django.test import TestCase
+
+from dm_regional_app.builder import Builder
+from dm_regional_app.models import SavedScenario
+from dm_regional_app.utils import DateAwareJSONDecoder
+
+
+class LazyJSONFieldTestCase(TestCase):
+    builder = Builder()
+
+    def setUp(self):
+        self.rates = pd.Series(
+            [1.5], index=pd.MultiIndex.from_tuples([("a", "b")], names=["from", "to"])
+        )
+        self.scenario = self.builder.scenario(
+            historic_filters={"la": [], "ethnicity": [], "sex": "all", "uasc": "all"},
+        )
+        self.scenario.adjusted_rates = self.rates
+        self.scenario.save()
+
+    def test_fields_are_decoded_on_first_access(self):
+        with patch.object(
+            DateAwareJSONDecoder,
+            "parse_object",
+            autospec=True,
+            side_effect=DateAwareJSONDecoder.parse_object,
+        ) as parse_object:
+            scenario = SavedScenario.objects.get(pk=self.scenario.pk)
+            parse_object.assert_not_called()
+
+            self.assertEqual(scenario.historic_filters["sex"], "all")
+            calls = parse_object.call_count
+            self.assertGreater(calls, 0)
+
+            # decoded values are kept
+            scenario.historic_filters
+            self.assertEqual(parse_object.call_count, calls)
+
+        pdt.assert_series_equal(scenario.adjusted_rates, self.rates)
+
+    def test_saving_keeps_values(self):
+        scenario = SavedScenario.objects.get(pk=self.scenario.pk)
+        scenario.name = "Renamed"
+        scenario.save()
+
+        scenario = SavedScenario.objects.get(pk=self.scenario.pk)
+        self.assertEqual(scenario.name, "Renamed")
+        pdt.assert_series_equal(scenario.adjusted_rates, self.rates)
+
+    def test_deferred_fields_are_loaded_and_decoded(self):
+        scenario = SavedScenario.objects.only("name").get(pk=self.scenario.pk)
+        pdt.assert_series_equal(scenario.adjusted_rates, self.rates)
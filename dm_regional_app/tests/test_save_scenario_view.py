@@ -0,0 +1,79 @@
+from unittest.mock import patch
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from dm_regional_app.builder import Builder
+from dm_regional_app.forecasts import load_forecast
+from dm_regional_app.jobs import _run_forecast_job_thread, run_next_job
+from dm_regional_app.models import (
+    DataSource,
+    ForecastJob,
+    SavedScenario,
+    ScenarioForecast,
+)
+from ssda903.reader import data_fingerprint, read_data
+
+
+class SaveScenarioViewTestCase(TestCase):
+    builder = Builder()
+
+    def setUp(self):
+        self.user = self.builder.user(email="testuser", password="testpassword")
+        self.client.login(username="testuser", password="testpassword")
+        datacontainer = read_data(source=settings.DATA_SOURCE)
+        DataSource.objects.create(
+            uploaded_by=self.user,
+            data_start_date=datacontainer.data_start_date,
+            data_end_date=datacontainer.data_end_date,
+        )
+
+    def save(self, **data):
+        return self.client.post(
+            reverse("save_scenario"), {"name": "Scenario", "description": "", **data}
+        )
+
+    @override_settings(JOB_RUNNER="worker")
+    def test_forecast_is_queued_for_worker(self):
+        with patch("dm_regional_app.jobs.save_forecast") as save_forecast:
+            response = self.save()
+        self.assertRedirects(response, reverse("scenarios"))
+        save_forecast.assert_not_called()
+
+        scenario = SavedScenario.objects.get()
+        job = ForecastJob.objects.get()
+        self.assertEqual(job.scenario, scenario)
+        self.assertEqual(job.status, ForecastJob.Status.QUEUED)
+
+        self.assertEqual(run_next_job(), job)
+        self.assertIsNone(run_next_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, ForecastJob.Status.SUCCEEDED)
+        scenario.refresh_from_db()
+        self.assertIsNotNone(
+            load_forecast(scenario, data_fingerprint(settings.DATA_SOURCE))
+        )
+
+    @override_settings(JOB_RUNNER="worker")
+    def test_update_removes_outdated_forecast(self):
+        self.save()
+        run_next_job()
+        scenario = SavedScenario.objects.get()
+        self.assertTrue(ScenarioForecast.objects.filter(scenario=scenario).exists())
+
+        self.save(update="")
+        self.assertFalse(ScenarioForecast.objects.filter(scenario=scenario).exists())
+        # the queued job is reused by later saves
+        self.save(update="")
+        self.assertEqual(
+            ForecastJob.objects.filter(status=ForecastJob.Status.QUEUED).count(), 1
+        )
+
+    def test_local_runner_runs_forecast_in_thread(self):
+        with patch("dm_regional_app.jobs.threading.Thread") as thread:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.save()
+        job = ForecastJob.objects.get()
+        thread.assert_called_once_with(target=_run_forecast_job_thread, args=(job.pk,))
+        thread.return_value.start.assert_called_once_with()
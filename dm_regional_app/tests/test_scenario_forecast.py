@@ -0,0 +1,155 @@
+import pandas as pd
+import pandas.testing as pdt
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.test import TestCase
+from django.urls import reverse
+
+from dm_regional_app.builder import Builder
+from dm_regional_app.forecasts import (
+    ScenarioComputation,
+    compute_forecast,
+    load_forecast,
+    save_forecast,
+)
+from dm_regional_app.jobs import store_saved_forecasts
+from dm_regional_app.models import DataSource, ScenarioForecast, UploadJob
+from ssda903.config import Costs
+from ssda903.datacontainer import DemandModellingDataContainer
+from ssda903.datastore import StorageDataStore
+from ssda903.predictor import MODEL_VERSION
+from ssda903.reader import data_fingerprint
+
+
+class ScenarioTestCase(TestCase):
+    builder = Builder()
+
+    def setUp(self):
+        self.datacontainer = DemandModellingDataContainer(
+            StorageDataStore(FileSystemStorage(settings.BASE_DIR), "samples/v1"),
+            fingerprint="samples",
+        )
+        self.scenario = self.builder.scenario(
+            historic_filters={"la": [], "ethnicity": [], "sex": "all", "uasc": "all"},
+            prediction_parameters={
+                "reference_start_date": self.datacontainer.data_start_date,
+                "reference_end_date": self.datacontainer.data_end_date,
+                "prediction_start_date": self.datacontainer.data_end_date,
+                "prediction_end_date": None,
+            },
+            inflation_parameters={"inflation": False, "inflation_rate": 0.1},
+        )
+        self.scenario.adjusted_rates = None
+        self.scenario.adjusted_numbers = None
+        self.scenario.adjusted_costs = None
+        self.scenario.save()
+
+
+class ScenarioForecastTestCase(ScenarioTestCase):
+    def test_saved_forecast_is_loaded(self):
+        forecast = save_forecast(self.scenario, self.datacontainer)
+        self.assertEqual(forecast.model_version, MODEL_VERSION)
+        self.assertEqual(forecast.data_fingerprint, self.datacontainer.fingerprint)
+
+        self.scenario.refresh_from_db()
+        outputs = load_forecast(self.scenario, self.datacontainer.fingerprint)
+        self.assertIsNotNone(outputs)
+        pdt.assert_frame_equal(
+            outputs.prediction.population,
+            compute_forecast(self.scenario, self.datacontainer).prediction.population,
+        )
+
+    def test_forecast_for_other_data_is_ignored(self):
+        save_forecast(self.scenario, self.datacontainer)
+        self.scenario.refresh_from_db()
+        with self.assertNumQueries(1):
+            self.assertIsNone(load_forecast(self.scenario, "other"))
+        self.assertTrue(ScenarioForecast.objects.exists())
+
+    def test_forecast_for_other_model_version_is_ignored(self):
+        forecast = save_forecast(self.scenario, self.datacontainer)
+        forecast.model_version = "0"
+        forecast.save()
+        self.scenario.refresh_from_db()
+        self.assertIsNone(load_forecast(self.scenario, self.datacontainer.fingerprint))
+        self.assertTrue(ScenarioForecast.objects.exists())
+
+
+class StoreSavedForecastsTestCase(ScenarioTestCase):
+    def test_upload_job_stores_forecasts_for_views(self):
+        data_source = DataSource.objects.create(
+            uploaded_by=self.scenario.user,
+            data_start_date=self.datacontainer.data_start_date,
+            data_end_date=self.datacontainer.data_end_date,
+        )
+        job = UploadJob.objects.create(
+            uploaded_by=self.scenario.user, data_source=data_source
+        )
+        store_saved_forecasts(job)
+
+        # the forecast is stored for the data which views read
+        self.scenario.refresh_from_db()
+        outputs = load_forecast(self.scenario, data_fingerprint(settings.DATA_SOURCE))
+        self.assertIsNotNone(outputs)
+
+        self.client.force_login(self.scenario.user)
+        response = self.client.get(reverse("scenario_detail", args=[self.scenario.pk]))
+        self.assertEqual(
+            response.context["forecast_cost"], outputs.costs.costs.sum().sum()
+        )
+
+
+class ScenarioComputationTestCase(ScenarioTestCase):
+    stages = [
+        "historic_data",
+        "stats",
+        "base_prediction",
+        "prediction",
+        "placement_proportions",
+        "costs",
+        "base_costs",
+        "uninflated_costs",
+        "historic_costs",
+    ]
+
+    def keys(self, computation):
+        return {name: computation.key(name) for name in self.stages}
+
+    def test_cost_adjustments_reuse_predictions(self):
+        computation = ScenarioComputation(self.scenario, self.datacontainer)
+        prediction = computation.prediction
+        costs = computation.costs
+        before = self.keys(computation)
+
+        self.scenario.adjusted_costs = pd.Series(
+            {Costs.FOSTER_IN_HOUSE.value.label: 1000.0}
+        )
+        after = self.keys(computation)
+        changed = {name for name in self.stages if before[name] != after[name]}
+
+        self.assertEqual(
+            changed, {"costs", "base_costs", "uninflated_costs", "historic_costs"}
+        )
+        self.assertIs(computation.prediction, prediction)
+        self.assertIsNot(computation.costs, costs)
+
+    def test_historic_filters_invalidate_everything(self):
+        computation = ScenarioComputation(self.scenario, self.datacontainer)
+        before = self.keys(computation)
+
+        self.scenario.historic_filters = {**self.scenario.historic_filters, "sex": "1"}
+        after = self.keys(computation)
+
+        for name in self.stages:
+            self.assertNotEqual(before[name], after[name], name)
+
+    def test_results_are_shared(self):
+        first = ScenarioComputation(self.scenario, self.datacontainer)
+        second = ScenarioComputation(self.scenario, self.datacontainer)
+        self.assertIs(first.stats, second.stats)
+        self.assertIs(first.base_prediction, second.base_prediction)
+
+    def test_compute_forecast(self):
+        outputs = compute_forecast(self.scenario, self.datacontainer)
+        computation = ScenarioComputation(self.scenario, self.datacontainer)
+        self.assertIs(outputs.costs, computation.costs)
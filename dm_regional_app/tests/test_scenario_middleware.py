@@ -0,0 +1,144 @@
+import time
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from dm_regional_app.builder import Builder
+from dm_regional_app.middleware.scenario_middleware import (
+    SessionScenarioMiddleware,
+    latest_data_source,
+)
+from dm_regional_app.models import DataSource, SessionScenario
+
+
+class SessionScenarioMiddlewareTestCase(TestCase):
+    builder = Builder()
+
+    def setUp(self):
+        cache.clear()
+        self.user = self.builder.user(email="testuser", password="testpassword")
+        self.client.login(username="testuser", password="testpassword")
+        self.session = SessionStore()
+
+    def upload(self, end_year):
+        return DataSource.objects.create(
+            uploaded_by=self.user,
+            data_start_date=datetime(end_year - 3, 4, 1, tzinfo=timezone.utc),
+            data_end_date=datetime(end_year, 3, 31, tzinfo=timezone.utc),
+        )
+
+    def session_scenario(self) -> SessionScenario:
+        """
+        Runs the middleware for a view which uses the session scenario, and returns the scenario.
+        """
+        request = RequestFactory().get(reverse("faq"))
+        request.user = self.user
+        request.session = self.session
+
+        def view(request):
+            request.session_scenario.pk
+            return HttpResponse()
+
+        SessionScenarioMiddleware(view)(request)
+        return request.session_scenario
+
+    def test_redirects_without_data(self):
+        response = self.client.get(reverse("faq"))
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse("scenarios"))
+        self.assertRedirects(response, reverse("home"))
+
+    def test_scenario_is_created(self):
+        self.upload(2020)
+        self.session_scenario()
+
+        scenario = SessionScenario.objects.get(pk=self.session["session_scenario_id"])
+        self.assertEqual(scenario.user, self.user)
+        self.assertEqual(
+            scenario.prediction_parameters["reference_end_date"].year, 2020
+        )
+
+    def test_scenario_is_kept(self):
+        self.upload(2020)
+        first = self.session_scenario()
+        self.assertEqual(self.session_scenario().pk, first.pk)
+        self.assertEqual(SessionScenario.objects.count(), 1)
+
+    def test_requests_which_do_not_use_the_scenario_do_not_query(self):
+        self.upload(2020)
+        self.client.get(reverse("faq"))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("faq"))
+        tables = " ".join(query["sql"] for query in queries.captured_queries)
+        self.assertNotIn("dm_regional_app_datasource", tables)
+        self.assertNotIn("dm_regional_app_sessionscenario", tables)
+        self.assertNotIn("UPDATE", tables)
+
+    def test_upload_replaces_scenario(self):
+        self.upload(2020)
+        self.session_scenario()
+        SessionScenario.objects.all().delete()
+
+        self.upload(2021)
+        scenario = self.session_scenario()
+        self.assertEqual(scenario.pk, self.session["session_scenario_id"])
+        self.assertEqual(
+            scenario.prediction_parameters["reference_end_date"].year, 2021
+        )
+
+    def upload_from_another_process(self, end_year):
+        """
+        Uploads data without clearing this process's version of the latest data source.
+        """
+        DataSource.objects.bulk_create(
+            [
+                DataSource(
+                    uploaded_by=self.user,
+                    data_start_date=datetime(end_year - 3, 4, 1, tzinfo=timezone.utc),
+                    data_end_date=datetime(end_year, 3, 31, tzinfo=timezone.utc),
+                )
+            ]
+        )
+
+    def test_upload_by_another_process_is_seen_once_version_expires(self):
+        self.upload(2020)
+        self.assertEqual(latest_data_source().data_end_date.year, 2020)
+
+        self.upload_from_another_process(2021)
+        self.assertEqual(latest_data_source().data_end_date.year, 2020)
+
+        expired = time.time() + settings.DATA_SOURCE_VERSION_TIMEOUT + 1
+        with patch("time.time", return_value=expired):
+            self.assertEqual(latest_data_source().data_end_date.year, 2021)
+
+    def test_scenario_deleted_by_another_process(self):
+        self.upload(2020)
+        self.session_scenario()
+
+        self.upload_from_another_process(2021)
+        SessionScenario.objects.all().delete()
+
+        scenario = self.session_scenario()
+        self.assertEqual(scenario.pk, self.session["session_scenario_id"])
+        self.assertEqual(
+            scenario.prediction_parameters["reference_end_date"].year, 2021
+        )
+
+    def test_scenario_created_by_concurrent_request(self):
+        self.upload(2020)
+        scenario = self.session_scenario()
+
+        # a concurrent request of the session creates the scenario after this one found it missing
+        with patch.object(QuerySet, "first", return_value=None):
+            self.assertEqual(self.session_scenario().pk, scenario.pk)
+        self.assertEqual(SessionScenario.objects.count(), 1)
@@ -1,4 +1,6 @@
+from django.db import connection
 from django.test import TestCase, modify_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from dm_regional_app.builder import Builder
@@ -57,3 +59,18 @@ class ScenariosTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, "dm_regional_app/views/scenarios.html")
         self.assertQuerysetEqual(response.context["scenarios"], [other_scenario])
+
+    def test_scenario_frames_are_not_loaded(self):
+        response = self.client.get(reverse("scenarios"))
+        scenario = response.context["scenarios"][0]
+        self.assertIn("adjusted_rates", scenario.get_deferred_fields())
+        self.assertIn("historic_stock", scenario.get_deferred_fields())
+
+    def test_queries_do_not_grow_with_scenarios(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("scenarios"))
+
+        for count in range(5):
+            self.builder.scenario(name=f"Scenario {count}", user=self.user)
+        with self.assertNumQueries(len(queries)):
+            self.client.get(reverse("scenarios"))
@@ -14,6 +14,7 @@ urlpatterns = [
     path("entry_rates", views.entry_rates, name="entry_rates"),
     path("clear_rates", views.clear_rate_adjustments, name="clear_rates"),
     path("costs", views.costs, name="costs"),
+    path("charts/<str:chart>", views.chart_data, name="chart_data"),
     path("weekly_costs", views.weekly_costs, name="weekly_costs"),
     path(
         "placement_proportions",
@@ -28,6 +29,11 @@ urlpatterns = [
         name="clear_proportions",
     ),
     path("upload_data/", views.upload_data_source, name="upload_data"),
+    path(
+        "upload_data/jobs/<int:pk>",
+        views.upload_job_status,
+        name="upload_job_status",
+    ),
     path(
         "update_modal_preference/",
         views.update_modal_preference,
@@ -38,4 +44,5 @@ urlpatterns = [
         views.faq,
         name="faq",
     ),
+    path("health", views.health, name="health"),
 ]
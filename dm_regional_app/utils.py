@@ -1,10 +1,12 @@
 import ast
+import base64
 import json
+import math
 from datetime import date, datetime
+from functools import lru_cache
 
 import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
 
 from ssda903.config import AgeBrackets, PlacementCategories
 
@@ -31,14 +33,108 @@ def apply_filters(data: pd.DataFrame, filters: dict):
     return data
 
 
+# Version of the columnar encoding of Series and DataFrames. Objects without a version were written
+# by earlier releases, one record per row, and are still read.
+PANDAS_ENCODING_VERSION = 2
+# numeric arrays at least this long are written as base64 encoded binary rather than JSON lists
+BINARY_MIN_LENGTH = 32
+
+
+def encode_array(values) -> dict:
+    """
+    Encodes an array as its dtype and either a base64 encoded binary block, a list of values with
+    missing values as None, or for long arrays of repeated labels the distinct labels and the position
+    of each value in them
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in "mM" or (
+        values.dtype.kind in "biuf" and len(values) >= BINARY_MIN_LENGTH
+    ):
+        return {
+            "dtype": values.dtype.str,
+            "base64": base64.b64encode(np.ascontiguousarray(values).tobytes()).decode(),
+        }
+
+    if values.dtype.kind not in "biuf" and len(values) >= BINARY_MIN_LENGTH:
+        # labels such as the bins of an index repeat, so are written once with the position of each value
+        codes, categories = pd.factorize(values)
+        if len(categories) <= len(values) // 2:
+            return {
+                "dtype": "object",
+                "categories": encode_array(categories),
+                "codes": encode_array(codes),
+            }
+
+    dtype = values.dtype.str if values.dtype.kind in "biuf" else "object"
+    values = values.astype(object)
+    values[pd.isna(values)] = None
+    return {"dtype": dtype, "values": values.tolist()}
+
+
+def decode_array(encoded: dict) -> np.ndarray:
+    """
+    Decodes an array written by encode_array
+    """
+    dtype = np.dtype(encoded["dtype"])
+    if "codes" in encoded:
+        # missing values have code -1, which picks the None added after the categories
+        categories = np.append(decode_array(encoded["categories"]), None)
+        return categories[decode_array(encoded["codes"])]
+    if "base64" in encoded:
+        # bytearray so the array is writeable
+        return np.frombuffer(bytearray(base64.b64decode(encoded["base64"])), dtype)
+    if dtype.kind == "O":
+        # fromiter keeps values which are lists, e.g. tuples in an index, as single items
+        return np.fromiter(encoded["values"], dtype=dtype, count=len(encoded["values"]))
+    return np.array(encoded["values"], dtype=dtype)
+
+
+def encode_index(index: pd.Index) -> dict:
+    if isinstance(index, pd.MultiIndex):
+        arrays = [index.get_level_values(level) for level in range(index.nlevels)]
+    else:
+        arrays = [index]
+    return {
+        "names": list(index.names),
+        "arrays": [encode_array(array) for array in arrays],
+        "is_multiindex": isinstance(index, pd.MultiIndex),
+    }
+
+
+def decode_index(encoded: dict) -> pd.Index:
+    arrays = [decode_array(array) for array in encoded["arrays"]]
+    if encoded["is_multiindex"]:
+        return pd.MultiIndex.from_arrays(arrays, names=encoded["names"])
+    return pd.Index(arrays[0], name=encoded["names"][0])
+
+
 class DateAwareJSONDecoder(json.JSONDecoder):
     def __init__(self, *args, **kwargs):
         super().__init__(object_hook=self.parse_object, *args, **kwargs)
 
     def parse_object(self, obj):
-        obj = self.parse_dates(obj)
+        if "__type__" not in obj:
+            return self.parse_dates(obj)
+
+        # Columnar Series and DataFrames
+        if obj.get("__version__") == PANDAS_ENCODING_VERSION:
+            index = decode_index(obj["index"])
+            if obj["__type__"] == "pd.Series":
+                return pd.Series(
+                    decode_array(obj["data"]), index=index, name=obj["name"]
+                )
+            df = pd.DataFrame(
+                {
+                    position: decode_array(data)
+                    for position, data in enumerate(obj["data"])
+                },
+                index=index,
+            )
+            df.columns = decode_index(obj["columns"])
+            return df
+
         # Check for Series
-        if "__type__" in obj and obj["__type__"] == "pd.Series":
+        if obj["__type__"] == "pd.Series":
             if obj.get("is_multiindex") == True:
                 index = pd.MultiIndex.from_tuples(
                     obj["index"], names=obj.get("index_names")
@@ -48,7 +144,7 @@ class DateAwareJSONDecoder(json.JSONDecoder):
             return pd.Series(obj["data"], index=index)
 
         # Check for DataFrame
-        if "__type__" in obj and obj["__type__"] == "pd.DataFrame":
+        if obj["__type__"] == "pd.DataFrame":
             if obj.get("is_multiindex") == True:
                 index = pd.MultiIndex.from_tuples(
                     obj["index"], names=obj.get("index_names")
@@ -74,50 +170,26 @@ class DateAwareJSONDecoder(json.JSONDecoder):
 class SeriesAwareJSONEncoder(json.JSONEncoder):
     def default(self, obj):
         if isinstance(obj, pd.Series):
-            # Check if the Series has a MultiIndex
-            if isinstance(obj.index, pd.MultiIndex):
-                index = [list(tup) for tup in obj.index]
-            else:
-                index = obj.index.tolist()
             return {
                 "__type__": "pd.Series",
-                "data": obj.tolist(),
-                "index": index,
-                "is_multiindex": isinstance(obj.index, pd.MultiIndex),
+                "__version__": PANDAS_ENCODING_VERSION,
+                "index": encode_index(obj.index),
+                "name": obj.name,
+                "data": encode_array(obj.to_numpy()),
             }
 
         if isinstance(obj, pd.DataFrame):
-            # Handle MultiIndex DataFrame
-            if isinstance(obj.index, pd.MultiIndex):
-                index = [
-                    list(tup) for tup in obj.index
-                ]  # Convert MultiIndex to list of lists
-                index_names = obj.index.names  # Get index names
-            else:
-                index = obj.index.tolist()
-                index_names = obj.index.names  # Get index names
-
-            # Transform NaN to None only when necessary
-            records = []
-            for record in obj.to_dict(orient="records"):
-                transformed_record = {
-                    key: (value if pd.notnull(value) else None)
-                    for key, value in record.items()
-                }
-                records.append(transformed_record)
-            columns = obj.columns.tolist()  # Get column names
-
-            output = {
+            return {
                 "__type__": "pd.DataFrame",
-                "data": records,
-                "columns": columns,
-                "index": index,
-                "index_names": index_names,
-                "is_multiindex": isinstance(obj.index, pd.MultiIndex),
+                "__version__": PANDAS_ENCODING_VERSION,
+                "index": encode_index(obj.index),
+                "columns": encode_index(obj.columns),
+                "data": [
+                    encode_array(obj.iloc[:, position].to_numpy())
+                    for position in range(obj.shape[1])
+                ],
             }
 
-            return output
-
         if isinstance(obj, date):
             return obj.isoformat()
         # Let the base class default method raise the TypeError
@@ -237,30 +309,55 @@ def rate_table_sort(df, bin_col, transition=False):
     return df
 
 
-def care_type_organiser(df: pd.DataFrame, data_type: str, input_col: str) -> dict:
+@lru_cache(maxsize=64)
+def care_type_columns(columns: tuple) -> tuple[list, np.ndarray]:
     """
-    Takes a dataframe of a population over time and splits it into a dictionary of dataframes based on the categories in an enum
+    Maps the columns of a population, e.g. "10 to 16 - Fostering", to the categories in an enum and the total in care.
+    The mapping only depends on the column names, so is computed once for each set of columns.
+
+    :return: The care types, and a matrix with a row for each column and a column for each care type which is 1 if
+        the column is in the care type
     """
     care_types = [e.value.label for e in PlacementCategories]
     care_types.append("Total")
     care_types.remove("Not in care")
 
-    care_type_dict = {}
-
-    for care_type in care_types:
+    names = pd.Index(columns).astype(str)
+    indicator = np.zeros((len(names), len(care_types)))
+    for position, care_type in enumerate(care_types):
         if care_type == "Total":
-            care_type_df = df[
-                df[input_col].apply(lambda x: "Not in care" in x) == False
-            ]
+            indicator[:, position] = ~names.str.contains("Not in care", regex=False)
         else:
-            care_type_df = df[df[input_col].str.contains(care_type)]
+            indicator[:, position] = names.str.contains(care_type, regex=False)
 
-        care_type_df = (
-            care_type_df[["date", data_type]].groupby("date").sum().reset_index()
-        )
-        care_type_df["date"] = pd.to_datetime(care_type_df["date"]).dt.date
+    return care_types, indicator
 
-        care_type_dict[care_type] = care_type_df
+
+def care_type_organiser(df: pd.DataFrame, data_type: str) -> dict:
+    """
+    Takes a dataframe of a population over time, with a column for each bin, and splits it into a dictionary of
+    dataframes of the total in each of the categories in an enum
+    """
+    care_types, indicator = care_type_columns(tuple(df.columns))
+
+    # missing values count as zero, and all the totals come from one product of the values and the mapping
+    values = np.nan_to_num(df.to_numpy(dtype=float))
+    totals = values @ indicator
+    dates = pd.to_datetime(df.index).date
+
+    care_type_dict = {}
+    for position, care_type in enumerate(care_types):
+        if indicator[:, position].any():
+            care_type_dict[care_type] = pd.DataFrame(
+                {"date": dates, data_type: totals[:, position]}
+            )
+        else:
+            care_type_dict[care_type] = pd.DataFrame(
+                {
+                    "date": pd.Series(dtype=object),
+                    data_type: pd.Series(dtype=float),
+                }
+            )
 
     return care_type_dict
 
@@ -288,9 +385,54 @@ def apply_variances(forecast_by_type: dict, ci_by_type: dict) -> dict:
     return ci_by_type
 
 
-def add_traces(fig: go.Figure, traces_list: list) -> go.Figure:
+def new_chart(title: str, xaxis_title: str, yaxis_title: str, **layout) -> dict:
     """
-    Adds list of one or more populations (e.g. historic data, base forecast, adjusted forecast) to graph, with each population split by placement categories
+    Returns the data for an empty chart, to be rendered in the browser by static/js/charts.js.
+
+    Traces are plotly.js traces, except that their x values are the position of a column in "dates".
+    Traces plotted over the same dates share a column, so each date is only sent once.
+    """
+    return {
+        "layout": {
+            "title": {"text": title},
+            "xaxis": {"title": {"text": xaxis_title}},
+            "yaxis": {"title": {"text": yaxis_title}, "rangemode": "tozero"},
+            # Set hover label to show full placement type without truncation
+            "hoverlabel": {"namelength": -1},
+            "shapes": [],
+            **layout,
+        },
+        "dates": [],
+        "traces": [],
+    }
+
+
+def chart_dates(chart: dict, dates) -> int:
+    """
+    Adds a column of dates to a chart if it does not have one with the same dates, returning its position
+    """
+    dates = [pd.Timestamp(d).strftime("%Y-%m-%d") for d in dates]
+    if dates in chart["dates"]:
+        return chart["dates"].index(dates)
+    chart["dates"].append(dates)
+    return len(chart["dates"]) - 1
+
+
+def chart_values(values, decimals: int = 2) -> list:
+    """
+    Converts values to a list for a chart, rounded and with whole numbers as integers to keep the data small.
+    Missing values become None, which plotly.js shows as a gap.
+    """
+    rounded = np.round(np.asarray(values, dtype=float), decimals).tolist()
+    return [
+        None if math.isnan(value) else int(value) if value.is_integer() else value
+        for value in rounded
+    ]
+
+
+def add_traces(chart: dict, traces_list: list) -> dict:
+    """
+    Adds list of one or more populations (e.g. historic data, base forecast, adjusted forecast) to chart, with each population split by placement categories
     """
     care_types = [e.value.label for e in PlacementCategories]
     care_types.append("Total")
@@ -306,22 +448,23 @@ def add_traces(fig: go.Figure, traces_list: list) -> go.Figure:
 
     for care_type, colour in zip(care_types, colours.values()):
         for care_dict in traces_list:
-            fig.add_trace(
-                go.Scatter(
-                    x=care_dict[care_type]["date"],
-                    y=care_dict[care_type]["pop_size"],
-                    name=f"{care_type} ({care_dict['type']})",
-                    legendgroup=f"{care_type} ({care_dict['type']})",
-                    line=dict(color=colour, width=1.5, dash=care_dict["dash"]),
-                )
+            chart["traces"].append(
+                {
+                    "x": chart_dates(chart, care_dict[care_type]["date"]),
+                    "y": chart_values(care_dict[care_type]["pop_size"]),
+                    "name": f"{care_type} ({care_dict['type']})",
+                    "legendgroup": f"{care_type} ({care_dict['type']})",
+                    "line": {"color": colour, "width": 1.5, "dash": care_dict["dash"]},
+                    "xhoverformat": "%d %b %Y",
+                }
             )
 
-    return fig
+    return chart
 
 
-def add_ci_traces(fig: go.Figure, ci_traces_list: list) -> go.Figure:
+def add_ci_traces(chart: dict, ci_traces_list: list) -> dict:
     """
-    Adds confidence interval lines to a plotly graph using data from a dictionary of dataframes split by an enum of placement categories
+    Adds confidence interval lines to a chart using data from a dictionary of dataframes split by an enum of placement categories
     """
     care_types = [e.value.label for e in PlacementCategories]
     care_types.append("Total")
@@ -337,33 +480,112 @@ def add_ci_traces(fig: go.Figure, ci_traces_list: list) -> go.Figure:
 
     for care_type, colour in zip(care_types, colours.values()):
         for ci_dict in ci_traces_list:
+            x = chart_dates(chart, ci_dict[care_type]["date"])
+
             # Add lower bounds for confidence intervals.
-            fig.add_trace(
-                go.Scatter(
-                    x=ci_dict[care_type]["date"],
-                    y=ci_dict[care_type]["lower"],
-                    line_color="rgba(255,255,255,0)",
-                    legendgroup=f"{ci_dict['type']} {care_type}",
-                    showlegend=False,
-                    hoverinfo="skip",
-                )
+            chart["traces"].append(
+                {
+                    "x": x,
+                    "y": chart_values(ci_dict[care_type]["lower"], decimals=1),
+                    "line": {"color": "rgba(255,255,255,0)"},
+                    "legendgroup": f"{ci_dict['type']} {care_type}",
+                    "showlegend": False,
+                    "hoverinfo": "skip",
+                }
             )
 
             # Add upper bounds for confidence intervals.
-            fig.add_trace(
-                go.Scatter(
-                    x=ci_dict[care_type]["date"],
-                    y=ci_dict[care_type]["upper"],
-                    fill="tonexty",
-                    fillcolor=colour,
-                    line_color="rgba(255,255,255,0)",
-                    legendgroup=f"{ci_dict['type']} {care_type}",
-                    showlegend=False,
-                    hoverinfo="skip",
-                )
+            chart["traces"].append(
+                {
+                    "x": x,
+                    "y": chart_values(ci_dict[care_type]["upper"], decimals=1),
+                    "fill": "tonexty",
+                    "fillcolor": colour,
+                    "line": {"color": "rgba(255,255,255,0)"},
+                    "legendgroup": f"{ci_dict['type']} {care_type}",
+                    "showlegend": False,
+                    "hoverinfo": "skip",
+                }
+            )
+
+    return chart
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Picks n_out points of a line with the Largest-Triangle-Three-Buckets algorithm, which keeps the points
+    that contribute most to its shape. The first and last points are always kept, and all the points are
+    kept if there are no more than n_out.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    y = np.nan_to_num(y)
+    # the points between the first and last are split into n_out - 2 buckets, and one point is kept from each
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # the point kept from the next bucket isn't known yet, so its average is used instead
+        if bucket < n_out - 3:
+            next_end = edges[bucket + 2]
+            next_x, next_y = x[end:next_end].mean(), y[end:next_end].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        # keep the point making the largest triangle with the previous point kept and the next bucket
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+
+    return selected
+
+
+def downsample_chart(chart: dict, max_points: int) -> dict:
+    """
+    Limits each trace of a chart to max_points points, keeping the shape of the line with lttb_indices.
+
+    Confidence intervals (traces filled to the trace before them) and stacked traces are downsampled together,
+    on the sum of their values, so that they stay aligned. Dates no trace uses any more are removed.
+    """
+    groups = []
+    for trace in chart["traces"]:
+        stackgroup = trace.get("stackgroup")
+        if groups and (
+            trace.get("fill") == "tonexty"
+            or (
+                stackgroup is not None and stackgroup == groups[-1][0].get("stackgroup")
             )
+        ):
+            groups[-1].append(trace)
+        else:
+            groups.append([trace])
+
+    dates = chart["dates"]
+    for group in groups:
+        group_dates = dates[group[0]["x"]]
+        if len(group_dates) <= max_points:
+            continue
+
+        x = np.array(group_dates, dtype="datetime64[D]").astype(float)
+        y = np.nansum([np.array(trace["y"], dtype=float) for trace in group], axis=0)
+        indices = lttb_indices(x, y, max_points)
+        for trace in group:
+            trace["x"] = chart_dates(chart, [group_dates[i] for i in indices])
+            trace["y"] = [trace["y"][i] for i in indices]
 
-    return fig
+    used = sorted({trace["x"] for trace in chart["traces"]})
+    positions = {old: new for new, old in enumerate(used)}
+    chart["dates"] = [dates[position] for position in used]
+    for trace in chart["traces"]:
+        trace["x"] = positions[trace["x"]]
+
+    return chart
 
 
 def save_data_if_not_empty(session_scenario, data, attribute_name):
@@ -401,7 +623,4 @@ def weekly_care_type_dfs(
     if round_int:
         weekly = weekly.round()
 
-    out = weekly.unstack().reset_index()
-    out.columns = ["bin", "date", value_col]
-
-    return care_type_organiser(out, value_col, "bin")
+    return care_type_organiser(weekly, value_col)
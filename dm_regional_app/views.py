@@ -1,15 +1,14 @@
 import json
 import logging
-from pathlib import Path
 
 import pandas as pd
 from decouple import config
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.core.files.storage import default_storage
+from django.core.cache import caches
 from django.forms.models import model_to_dict
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django_tables2 import RequestConfig
@@ -33,6 +32,12 @@ from dm_regional_app.charts import (
 )
 from dm_regional_app.decorators import user_is_admin
 from dm_regional_app.filters import SavedScenarioFilter
+from dm_regional_app.forecasts import (
+    ScenarioComputation,
+    is_warm,
+    load_forecast,
+    prime_prediction_cache,
+)
 from dm_regional_app.forms import (
     DataSourceUploadForm,
     DynamicForm,
@@ -42,25 +47,40 @@ from dm_regional_app.forms import (
     PredictFilter,
     SavedScenarioForm,
 )
-from dm_regional_app.models import DataSource, Profile, SavedScenario, SessionScenario
+from dm_regional_app.jobs import enqueue_forecast, enqueue_upload
+from dm_regional_app.models import (
+    DataSource,
+    Profile,
+    SavedScenario,
+    SessionScenario,
+    UploadJob,
+)
 from dm_regional_app.tables import SavedScenarioTable
 from dm_regional_app.utils import (
-    apply_filters,
     combine_form_data_with_existing_rates,
+    downsample_chart,
     number_format,
     save_data_if_not_empty,
 )
+from ssda903.cache import stable_hash
 from ssda903.config import PlacementCategories
-from ssda903.costs import (
-    convert_historic_population_to_cost,
-    convert_population_to_cost,
-)
-from ssda903.population_stats import PopulationStats
-from ssda903.predictor import predict
-from ssda903.reader import read_data, read_local_data
+from ssda903.reader import cached_data, data_fingerprint, read_data
 
 log = logging.getLogger(__name__)
 
+# The stages of ScenarioComputation each chart is built from. Their keys identify exactly the inputs of
+# the chart, so are used to cache it.
+CHARTS = {
+    "historic": ("stats",),
+    "placement_starts": ("stats",),
+    "prediction": ("stats", "base_prediction"),
+    "compare": ("stats", "base_prediction", "prediction"),
+    "population": ("placement_proportions", "costs"),
+    "costs": ("historic_costs", "costs"),
+}
+# Change when the data returned for charts changes, so that charts cached by earlier versions are not used
+CHART_VERSION = "1"
+
 
 def home(request):
     try:
@@ -91,8 +111,7 @@ def home(request):
 
 @login_required
 def costs(request):
-    pk = request.session["session_scenario_id"]
-    session_scenario = get_object_or_404(SessionScenario, pk=pk)
+    session_scenario = request.session_scenario
 
     # Used to return user to this page when accessing rate change pages
     request.session["rate_change_origin_page"] = reverse("costs")
@@ -107,14 +126,11 @@ def costs(request):
         inflation_parameters = session_scenario.inflation_parameters.copy()
         form = InflationForm(initial=inflation_parameters)
 
-    # read data
-    datacontainer = read_data(source=settings.DATA_SOURCE)
-
-    historic_data = apply_filters(
-        datacontainer.enriched_view, session_scenario.historic_filters
+    computation = ScenarioComputation(
+        session_scenario, read_data(source=settings.DATA_SOURCE)
     )
 
-    if historic_data.empty:
+    if computation.is_empty:
         messages.warning(
             request,
             "There are no children in the historic dataset that match the current filter selection, costs cannot be calculated. Please adjust the historic filters to include some data.",
@@ -123,45 +139,12 @@ def costs(request):
 
     historic_filters = session_scenario.historic_filters
 
-    stats = PopulationStats(
-        df=historic_data,
-        data_start_date=datacontainer.data_start_date,
-        data_end_date=datacontainer.data_end_date,
-    )
-
-    # Call predict function
-    prediction = predict(
-        stats=stats,
-        **session_scenario.prediction_parameters,
-        rate_adjustment=session_scenario.adjusted_rates,
-        number_adjustment=session_scenario.adjusted_numbers,
-    )
-
-    (
-        historic_placement_proportions,
-        historic_population,
-    ) = stats.placement_proportions(**session_scenario.prediction_parameters)
-
-    costs = convert_population_to_cost(
-        prediction,
-        historic_placement_proportions,
-        session_scenario.adjusted_costs,
-        session_scenario.adjusted_proportions,
-        **session_scenario.inflation_parameters,
-    )
-
-    historic_costs = convert_historic_population_to_cost(
-        historic_population, session_scenario.adjusted_costs
-    )
-
-    base_prediction = predict(stats=stats, **session_scenario.prediction_parameters)
-
-    base_costs = convert_population_to_cost(
-        base_prediction,
-        historic_placement_proportions,
-        session_scenario.adjusted_costs,
-        **session_scenario.inflation_parameters,
-    )
+    computation.compute("costs", "base_costs")
+    prediction = computation.prediction
+    base_prediction = computation.base_prediction
+    historic_placement_proportions = computation.placement_proportions[0]
+    costs = computation.costs
+    base_costs = computation.base_costs
 
     weekly_cost = pd.DataFrame(
         {
@@ -170,10 +153,6 @@ def costs(request):
         }
     )
 
-    area_numbers = area_chart_population(historic_population, costs)
-
-    area_costs = area_chart_cost(historic_costs, costs)
-
     proportions = placement_proportion_table(historic_placement_proportions, costs)
 
     summary_table = summary_tables(costs.summary_table)
@@ -213,8 +192,6 @@ def costs(request):
             "forecast_dates": session_scenario.prediction_parameters,
             "weekly_cost": weekly_cost,
             "proportions": proportions,
-            "area_numbers": area_numbers,
-            "area_costs": area_costs,
             "summary_table": summary_table,
             "summary_table_base": summary_table_base,
             "summary_table_difference": summary_table_difference,
@@ -232,8 +209,7 @@ def costs(request):
 
 @login_required
 def save_scenario(request):
-    pk = request.session["session_scenario_id"]
-    session_scenario = get_object_or_404(SessionScenario, pk=pk)
+    session_scenario = request.session_scenario
     current_user = request.user
 
     if (
@@ -265,6 +241,7 @@ def save_scenario(request):
                 scenario_to_update.name = form.cleaned_data["name"]
                 scenario_to_update.description = form.cleaned_data["description"]
                 scenario_to_update.save()
+                enqueue_forecast(scenario_to_update)
 
                 messages.success(request, "Scenario updated.")
 
@@ -293,6 +270,8 @@ def save_scenario(request):
                 session_scenario.saved_scenario = saved_scenario
                 session_scenario.save()
 
+                enqueue_forecast(saved_scenario)
+
                 messages.success(request, "Scenario saved.")
 
                 return redirect("scenarios")
@@ -309,48 +288,24 @@ def save_scenario(request):
 
 @login_required
 def clear_proportion_adjustments(request):
-    if "session_scenario_id" in request.session:
-        # get next url page
-        next_url_name = request.GET.get("next_url_name")
-        pk = request.session["session_scenario_id"]
-        session_scenario = get_object_or_404(SessionScenario, pk=pk)
-        session_scenario.adjusted_proportions = None
-        session_scenario.save(update_fields=["adjusted_proportions"])
-        messages.success(request, "Proportion adjustments cleared.")
+    # get next url page
+    next_url_name = request.GET.get("next_url_name")
+    session_scenario = request.session_scenario
+    session_scenario.adjusted_proportions = None
+    session_scenario.save(update_fields=["adjusted_proportions"])
+    messages.success(request, "Proportion adjustments cleared.")
     return redirect(next_url_name)
 
 
 @login_required
 def placement_proportions(request):
-    pk = request.session["session_scenario_id"]
-    session_scenario = get_object_or_404(SessionScenario, pk=pk)
-    # read data
-    datacontainer = read_data(source=settings.DATA_SOURCE)
-
-    historic_data = apply_filters(
-        datacontainer.enriched_view, session_scenario.historic_filters
-    )
-
-    stats = PopulationStats(
-        df=historic_data,
-        data_start_date=datacontainer.data_start_date,
-        data_end_date=datacontainer.data_end_date,
+    session_scenario = request.session_scenario
+    computation = ScenarioComputation(
+        session_scenario, read_data(source=settings.DATA_SOURCE)
     )
 
-    # Call predict function
-    prediction = predict(stats=stats, **session_scenario.prediction_parameters)
-
-    (
-        historic_placement_proportions,
-        historic_population,
-    ) = stats.placement_proportions(**session_scenario.prediction_parameters)
-
-    costs = convert_population_to_cost(
-        prediction,
-        historic_placement_proportions,
-        session_scenario.adjusted_costs,
-        session_scenario.adjusted_proportions,
-    )
+    historic_placement_proportions, _ = computation.placement_proportions
+    costs = computation.uninflated_costs
 
     proportions = placement_proportion_table(historic_placement_proportions, costs)
 
@@ -416,34 +371,11 @@ def placement_proportions(request):
 
 @login_required
 def weekly_costs(request):
-    pk = request.session["session_scenario_id"]
-    session_scenario = get_object_or_404(SessionScenario, pk=pk)
-    # read data
-    datacontainer = read_data(source=settings.DATA_SOURCE)
-
-    historic_data = apply_filters(
-        datacontainer.enriched_view, session_scenario.historic_filters
-    )
-
-    stats = PopulationStats(
-        df=historic_data,
-        data_start_date=datacontainer.data_start_date,
-        data_end_date=datacontainer.data_end_date,
-    )
-
-    # Call predict function
-    prediction = predict(stats=stats, **session_scenario.prediction_parameters)
-
-    placement_proportions, historic_population = stats.placement_proportions(
-        **session_scenario.prediction_parameters
-    )
-
-    costs = convert_population_to_cost(
-        prediction,
-        placement_proportions,
-        session_scenario.adjusted_costs,
-        session_scenario.adjusted_proportions,
+    session_scenario = request.session_scenario
+    computation = ScenarioComputation(
+        session_scenario, read_data(source=settings.DATA_SOURCE)
     )
+    costs = computation.uninflated_costs
 
     placement_types = pd.DataFrame(
         {"Placement type": costs.cost_summary.index}, index=costs.cost_summary.index
@@ -523,6 +455,12 @@ def load_saved_scenario(request, pk):
         # update the request session
         request.session["session_scenario_id"] = session_scenario.pk
 
+        # reuse the outputs stored with the scenario rather than running the model again
+        fingerprint = data_fingerprint(settings.DATA_SOURCE)
+        outputs = load_forecast(saved_scenario, fingerprint)
+        if outputs is not None:
+            prime_prediction_cache(saved_scenario, outputs, fingerprint)
+
         most_recent_datasource = DataSource.objects.latest("uploaded")
         data_start_date = most_recent_datasource.data_start_date.date()
         data_end_date = most_recent_datasource.data_end_date.date()
@@ -581,8 +519,7 @@ def load_saved_scenario(request, pk):
 def clear_rate_adjustments(request):
     # get next url page
     next_url_name = request.GET.get("next_url_name")
-    pk = request.session["session_scenario_id"]
-    session_scenario = get_object_or_404(SessionScenario, pk=pk)
+    session_scenario = request.session_scenario
     session_scenario.adjusted_rates = None
     session_scenario.adjusted_numbers = None
     session_scenario.save(update_fields=["adjusted_rates", "adjusted_numbers"])
@@ -592,25 +529,13 @@ def clear_rate_adjustments(request):
 
 @login_required
 def entry_rates(request):
-    pk = request.session["session_scenario_id"]
-    session_scenario = get_object_or_404(SessionScenario, pk=pk)
+    session_scenario = request.session_scenario
     rate_change_origin_page = request.session["rate_change_origin_page"]
 
-    # read data
-    datacontainer = read_data(source=settings.DATA_SOURCE)
-
-    historic_data = apply_filters(
-        datacontainer.enriched_view, session_scenario.historic_filters
-    )
-
-    stats = PopulationStats(
-        df=historic_data,
-        data_start_date=datacontainer.data_start_date,
-        data_end_date=datacontainer.data_end_date,
+    computation = ScenarioComputation(
+        session_scenario, read_data(source=settings.DATA_SOURCE)
     )
-
-    # Call predict function
-    prediction = predict(stats=stats, **session_scenario.prediction_parameters)
+    prediction = computation.base_prediction
 
     entry_rates = entry_rate_table(prediction.entry_rates)
 
@@ -637,21 +562,6 @@ def entry_rates(request):
                 # Check that the dataframe or series saved in the form is not empty, then save
                 save_data_if_not_empty(session_scenario, data, "adjusted_numbers")
 
-            adjusted_prediction = predict(
-                stats=stats,
-                **session_scenario.prediction_parameters,
-                rate_adjustment=session_scenario.adjusted_rates,
-                number_adjustment=session_scenario.adjusted_numbers,
-            )
-
-            # build chart
-            chart = compare_forecast(
-                stats,
-                prediction,
-                adjusted_prediction,
-                **session_scenario.prediction_parameters,
-            )
-
             is_post = True
 
             return render(
@@ -660,7 +570,7 @@ def entry_rates(request):
                 {
                     "entry_rate_table": entry_rates,
                     "form": form,
-                    "chart": chart,
+                    "chart": "compare",
                     "is_post": is_post,
                     "rate_change_origin_page": rate_change_origin_page,
                 },
@@ -710,25 +620,13 @@ def entry_rates(request):
 
 @login_required
 def exit_rates(request):
-    pk = request.session["session_scenario_id"]
-    session_scenario = get_object_or_404(SessionScenario, pk=pk)
+    session_scenario = request.session_scenario
     rate_change_origin_page = request.session["rate_change_origin_page"]
 
-    # read data
-    datacontainer = read_data(source=settings.DATA_SOURCE)
-
-    historic_data = apply_filters(
-        datacontainer.enriched_view, session_scenario.historic_filters
-    )
-
-    stats = PopulationStats(
-        df=historic_data,
-        data_start_date=datacontainer.data_start_date,
-        data_end_date=datacontainer.data_end_date,
+    computation = ScenarioComputation(
+        session_scenario, read_data(source=settings.DATA_SOURCE)
     )
-
-    # Call predict function
-    prediction = predict(stats=stats, **session_scenario.prediction_parameters)
+    prediction = computation.base_prediction
 
     exit_rates = exit_rate_table(prediction.transition_rates)
 
@@ -756,21 +654,6 @@ def exit_rates(request):
                 # Check that the dataframe or series saved in the form is not empty, then save
                 save_data_if_not_empty(session_scenario, data, "adjusted_rates")
 
-            adjusted_prediction = predict(
-                stats=stats,
-                **session_scenario.prediction_parameters,
-                rate_adjustment=session_scenario.adjusted_rates,
-                number_adjustment=session_scenario.adjusted_numbers,
-            )
-
-            # build chart
-            chart = compare_forecast(
-                stats,
-                prediction,
-                adjusted_prediction,
-                **session_scenario.prediction_parameters,
-            )
-
             is_post = True
 
             return render(
@@ -779,7 +662,7 @@ def exit_rates(request):
                 {
                     "exit_rate_table": exit_rates,
                     "form": form,
-                    "chart": chart,
+                    "chart": "compare",
                     "is_post": is_post,
                     "rate_change_origin_page": rate_change_origin_page,
                 },
@@ -830,25 +713,13 @@ def exit_rates(request):
 
 @login_required
 def transition_rates(request):
-    pk = request.session["session_scenario_id"]
-    session_scenario = get_object_or_404(SessionScenario, pk=pk)
+    session_scenario = request.session_scenario
     rate_change_origin_page = request.session["rate_change_origin_page"]
 
-    # read data
-    datacontainer = read_data(source=settings.DATA_SOURCE)
-
-    historic_data = apply_filters(
-        datacontainer.enriched_view, session_scenario.historic_filters
-    )
-
-    stats = PopulationStats(
-        df=historic_data,
-        data_start_date=datacontainer.data_start_date,
-        data_end_date=datacontainer.data_end_date,
+    computation = ScenarioComputation(
+        session_scenario, read_data(source=settings.DATA_SOURCE)
     )
-
-    # Call predict function
-    prediction = predict(stats=stats, **session_scenario.prediction_parameters)
+    prediction = computation.base_prediction
 
     transition_rates = transition_rate_table(prediction.transition_rates)
 
@@ -874,21 +745,6 @@ def transition_rates(request):
                 # Check that the dataframe or series saved in the form is not empty, then save
                 save_data_if_not_empty(session_scenario, data, "adjusted_rates")
 
-            adjusted_prediction = predict(
-                stats=stats,
-                **session_scenario.prediction_parameters,
-                rate_adjustment=session_scenario.adjusted_rates,
-                number_adjustment=session_scenario.adjusted_numbers,
-            )
-
-            # build chart
-            chart = compare_forecast(
-                stats,
-                prediction,
-                adjusted_prediction,
-                **session_scenario.prediction_parameters,
-            )
-
             is_post = True
 
             return render(
@@ -897,7 +753,7 @@ def transition_rates(request):
                 {
                     "transition_rate_table": transition_rates,
                     "form": form,
-                    "chart": chart,
+                    "chart": "compare",
                     "is_post": is_post,
                     "rate_change_origin_page": rate_change_origin_page,
                 },
@@ -948,14 +804,14 @@ def transition_rates(request):
 
 @login_required
 def adjusted(request):
-    pk = request.session["session_scenario_id"]
-    session_scenario = get_object_or_404(SessionScenario, pk=pk)
+    session_scenario = request.session_scenario
 
     # Used to return user to this page when accessing rate change pages
     request.session["rate_change_origin_page"] = reverse("adjusted")
 
     # read data
     datacontainer = read_data(source=settings.DATA_SOURCE)
+    computation = ScenarioComputation(session_scenario, datacontainer)
 
     show_rate_adjustment_instructions = Profile.objects.get(
         user=request.user
@@ -978,10 +834,6 @@ def adjusted(request):
                 session_scenario.historic_filters = historic_form.cleaned_data
                 session_scenario.save(update_fields=["historic_filters"])
 
-                historic_data = apply_filters(
-                    datacontainer.enriched_view, historic_form.cleaned_data
-                )
-
         # check if it was predict filter form that was submitted
         if "reference_start_date" in request.POST:
             predict_form = PredictFilter(
@@ -994,10 +846,6 @@ def adjusted(request):
                 la=datacontainer.unique_las,
                 ethnicity=datacontainer.unique_ethnicity,
             )
-
-            historic_data = apply_filters(
-                datacontainer.enriched_view, historic_form.initial
-            )
             if predict_form.is_valid():
                 session_scenario.prediction_parameters = predict_form.cleaned_data
                 session_scenario.save(update_fields=["prediction_parameters"])
@@ -1008,10 +856,6 @@ def adjusted(request):
             la=datacontainer.unique_las,
             ethnicity=datacontainer.unique_ethnicity,
         )
-        historic_data = apply_filters(
-            datacontainer.enriched_view, historic_form.initial
-        )
-
         # initialize form with default dates
         predict_form = PredictFilter(
             initial=session_scenario.prediction_parameters,
@@ -1019,7 +863,7 @@ def adjusted(request):
             reference_date_max=datacontainer.data_end_date,
         )
 
-    if historic_data.empty:
+    if computation.is_empty:
         empty_dataframe = True
         chart = None
 
@@ -1032,44 +876,16 @@ def adjusted(request):
     else:
         empty_dataframe = False
 
-        stats = PopulationStats(
-            df=historic_data,
-            data_start_date=datacontainer.data_start_date,
-            data_end_date=datacontainer.data_end_date,
-        )
-
-        original_prediction = predict(
-            stats=stats, **session_scenario.prediction_parameters
-        )
-
         if (
             session_scenario.adjusted_numbers is not None
             or session_scenario.adjusted_rates is not None
         ):
-            adjusted_prediction = predict(
-                stats=stats,
-                **session_scenario.prediction_parameters,
-                rate_adjustment=session_scenario.adjusted_rates,
-                number_adjustment=session_scenario.adjusted_numbers,
-            )
-
-            # build chart
-            chart = compare_forecast(
-                stats,
-                original_prediction,
-                adjusted_prediction,
-                **session_scenario.prediction_parameters,
-            )
-
-            current_prediction = adjusted_prediction
+            chart = "compare"
+            current_prediction = computation.prediction
 
         else:
-            # build chart
-            chart = prediction_chart(
-                stats, original_prediction, **session_scenario.prediction_parameters
-            )
-
-            current_prediction = original_prediction
+            chart = "prediction"
+            current_prediction = computation.base_prediction
 
         transition_rates = transition_rate_table(current_prediction.transition_rates)
 
@@ -1095,10 +911,10 @@ def adjusted(request):
 
 @login_required
 def prediction(request):
-    pk = request.session["session_scenario_id"]
-    session_scenario = get_object_or_404(SessionScenario, pk=pk)
+    session_scenario = request.session_scenario
     # read data
     datacontainer = read_data(source=settings.DATA_SOURCE)
+    computation = ScenarioComputation(session_scenario, datacontainer)
 
     show_filtering_instructions = Profile.objects.get(
         user=request.user
@@ -1120,10 +936,6 @@ def prediction(request):
                 session_scenario.historic_filters = historic_form.cleaned_data
                 session_scenario.save(update_fields=["historic_filters"])
 
-                historic_data = apply_filters(
-                    datacontainer.enriched_view, historic_form.cleaned_data
-                )
-
         if "reference_start_date" in request.POST:
             predict_form = PredictFilter(
                 request.POST,
@@ -1135,10 +947,6 @@ def prediction(request):
                 la=datacontainer.unique_las,
                 ethnicity=datacontainer.unique_ethnicity,
             )
-
-            historic_data = apply_filters(
-                datacontainer.enriched_view, historic_form.initial
-            )
             if predict_form.is_valid():
                 session_scenario.prediction_parameters = predict_form.cleaned_data
                 session_scenario.save(update_fields=["prediction_parameters"])
@@ -1149,10 +957,6 @@ def prediction(request):
             la=datacontainer.unique_las,
             ethnicity=datacontainer.unique_ethnicity,
         )
-        historic_data = apply_filters(
-            datacontainer.enriched_view, historic_form.initial
-        )
-
         # initialize form with default dates
         predict_form = PredictFilter(
             initial=session_scenario.prediction_parameters,
@@ -1160,26 +964,13 @@ def prediction(request):
             reference_date_max=datacontainer.data_end_date,
         )
 
-    if historic_data.empty:
+    if computation.is_empty:
         empty_dataframe = True
         chart = None
 
     else:
         empty_dataframe = False
-
-        stats = PopulationStats(
-            df=historic_data,
-            data_start_date=datacontainer.data_start_date,
-            data_end_date=datacontainer.data_end_date,
-        )
-
-        # Call predict function with default dates
-        prediction = predict(stats=stats, **session_scenario.prediction_parameters)
-
-        # build chart
-        chart = prediction_chart(
-            stats, prediction, **session_scenario.prediction_parameters
-        )
+        chart = "prediction"
 
     return render(
         request,
@@ -1196,8 +987,7 @@ def prediction(request):
 
 @login_required
 def historic_data(request):
-    pk = request.session["session_scenario_id"]
-    session_scenario = get_object_or_404(SessionScenario, pk=pk)
+    session_scenario = request.session_scenario
     # read data
     datacontainer = read_data(source=settings.DATA_SOURCE)
 
@@ -1218,13 +1008,6 @@ def historic_data(request):
             session_scenario.historic_filters = form.cleaned_data
             session_scenario.save(update_fields=["historic_filters"])
 
-            # update reference start and end
-            data = apply_filters(datacontainer.enriched_view, form.cleaned_data)
-        else:
-            data = apply_filters(
-                datacontainer.enriched_view, session_scenario.historic_filters
-            )
-
     else:
         # initialize form with default dates
         form = HistoricDataFilter(
@@ -1232,7 +1015,9 @@ def historic_data(request):
             la=datacontainer.unique_las,
             ethnicity=datacontainer.unique_ethnicity,
         )
-        data = apply_filters(datacontainer.enriched_view, form.initial)
+
+    computation = ScenarioComputation(session_scenario, datacontainer)
+    data = computation.historic_data
 
     if data.empty:
         empty_dataframe = True
@@ -1253,14 +1038,8 @@ def historic_data(request):
             & (data.DEC <= pd.to_datetime(datacontainer.data_end_date))
         ]["CHILD"].count()
 
-        stats = PopulationStats(
-            df=data,
-            data_start_date=datacontainer.data_start_date,
-            data_end_date=datacontainer.data_end_date,
-        )
-
-        chart = historic_chart(stats)
-        plmt_starts_chart = placement_starts_chart(stats)
+        chart = "historic"
+        plmt_starts_chart = "placement_starts"
 
     return render(
         request,
@@ -1277,11 +1056,100 @@ def historic_data(request):
     )
 
 
+@login_required
+def chart_data(request, chart):
+    """
+    Returns the data for a chart of the session scenario, which is rendered in the browser by
+    static/js/charts.js
+    """
+    session_scenario = request.session_scenario
+    computation = ScenarioComputation(
+        session_scenario, read_data(source=settings.DATA_SOURCE)
+    )
+
+    if chart not in CHARTS:
+        raise Http404("No chart found")
+    max_points = chart_points(request)
+
+    # charts are only cached for data with a fingerprint, which changes whenever new data is uploaded
+    key = None
+    if computation.datacontainer.fingerprint is not None:
+        key = stable_hash(
+            "chart",
+            CHART_VERSION,
+            chart,
+            max_points,
+            [computation.key(name) for name in CHARTS[chart]],
+        )
+        content = caches["charts"].get(key)
+        if content is not None:
+            return HttpResponse(content, content_type="application/json")
+
+    if computation.is_empty:
+        raise Http404("No chart found")
+
+    data = downsample_chart(_build_chart(computation, chart), max_points)
+    content = JsonResponse(data).content
+    if key is not None:
+        caches["charts"].set(key, content)
+    return HttpResponse(content, content_type="application/json")
+
+
+def chart_points(request) -> int:
+    """
+    Returns the most points to send for each trace of a chart, from the width of the chart in the browser.
+    Widths are rounded up to a multiple of 200 pixels so that charts of similar widths share a cache entry.
+    """
+    try:
+        width = int(request.GET.get("width", 1000))
+    except ValueError:
+        width = 1000
+    width = min(max(width, 200), 4000)
+    width = -(-width // 200) * 200
+    return max(int(width * settings.CHART_POINTS_PER_PIXEL), 3)
+
+
+def _build_chart(computation: ScenarioComputation, chart: str) -> dict:
+    parameters = computation.scenario.prediction_parameters
+    if chart == "historic":
+        data = historic_chart(computation.stats)
+    elif chart == "placement_starts":
+        data = placement_starts_chart(computation.stats)
+    elif chart == "prediction":
+        data = prediction_chart(
+            computation.stats, computation.base_prediction, **parameters
+        )
+    elif chart == "compare":
+        computation.compute("base_prediction", "prediction")
+        data = compare_forecast(
+            computation.stats,
+            computation.base_prediction,
+            computation.prediction,
+            **parameters,
+        )
+    elif chart == "population":
+        computation.compute("costs")
+        data = area_chart_population(
+            computation.placement_proportions[1], computation.costs
+        )
+    else:
+        computation.compute("costs", "historic_costs")
+        data = area_chart_cost(computation.historic_costs, computation.costs)
+
+    return data
+
+
 @login_required
 def scenarios(request):
     user_la = request.user.profile.la
 
-    scenarios = SavedScenario.objects.filter(user__profile__la=user_la)
+    # only load the fields shown in the table, not the scenario frames
+    scenarios = (
+        SavedScenario.objects.filter(user__profile__la=user_la)
+        .only("name", "description", "user", "updated_at")
+        .select_related("user")
+        .order_by("-updated_at")
+    )
 
     filterset = SavedScenarioFilter(request.GET, queryset=scenarios)
     filtered_scenarios = filterset.qs
@@ -1311,33 +1179,19 @@ def scenarios(request):
 @login_required
 def scenario_detail(request, pk):
     scenario = get_object_or_404(SavedScenario, pk=pk, user=request.user)
+    outputs = load_forecast(scenario, data_fingerprint(settings.DATA_SOURCE))
     return render(
-        request, "dm_regional_app/views/scenario_detail.html", {"scenario": scenario}
+        request,
+        "dm_regional_app/views/scenario_detail.html",
+        {
+            "scenario": scenario,
+            "forecast_cost": None
+            if outputs is None
+            else outputs.costs.costs.sum().sum(),
+        },
     )
 
 
-def validate_with_prediction(files):
-    """Validate files creating a prediction."""
-    try:
-        datacontainer = read_local_data(files)
-        stats = PopulationStats(
-            df=datacontainer.enriched_view,
-            data_start_date=datacontainer.data_start_date,
-            data_end_date=datacontainer.data_end_date,
-        )
-        predict(
-            stats=stats,
-            reference_start_date=datacontainer.data_start_date,
-            reference_end_date=datacontainer.data_end_date,
-            prediction_start_date=datacontainer.data_end_date,
-        )
-    except ValueError as e:
-        log.error(f"Upload validation failed: {e}")
-        return None, "At least one file is invalid."
-    else:
-        return datacontainer, "Successful prediction created."
-
-
 @user_is_admin
 def upload_data_source(request):
     """Allow staff users to upload data.
@@ -1350,33 +1204,42 @@ def upload_data_source(request):
     uploads = DataSource.objects.select_related("uploaded_by").order_by("-uploaded")[
         :10
     ]
+    jobs = UploadJob.objects.select_related("uploaded_by").order_by("-created_at")[:5]
     if request.method == "POST":
         if form.is_valid():
-            files = [files for files in request.FILES.values()]
-            datacontainer, msg = validate_with_prediction(files)
-            if datacontainer:
-                DataSource.objects.create(
-                    uploaded_by=request.user,
-                    data_start_date=datacontainer.data_start_date,
-                    data_end_date=datacontainer.data_end_date,
-                )
-                for filename, file in request.FILES.items():
-                    full_path = Path(settings.DATA_SOURCE, f"{filename}.csv")
-                    # Overwrite files if they already exist
-                    if default_storage.exists(full_path):
-                        default_storage.delete(full_path)
-                    default_storage.save(full_path, file)
+            job = enqueue_upload(request.user, request.FILES)
+            if job.status == UploadJob.Status.SUCCEEDED:
                 messages.success(request, "Data uploaded successfully")
-
-                SessionScenario.objects.all().delete()
                 messages.success(request, "Session scenarios cleared")
+            elif job.status == UploadJob.Status.FAILED:
+                messages.error(
+                    request, f"Data not uploaded successfully: {job.message}"
+                )
             else:
-                messages.error(request, f"Data not uploaded successfully: {msg}")
+                messages.info(
+                    request,
+                    "Upload queued. The data will be replaced once the files have been validated.",
+                )
             return redirect("upload_data")
     return render(
         request,
         "dm_regional_app/views/upload_data_source.html",
-        {"form": form, "uploads": uploads},
+        {"form": form, "uploads": uploads, "jobs": jobs},
+    )
+
+
+@user_is_admin
+def upload_job_status(request, pk):
+    job = get_object_or_404(UploadJob, pk=pk)
+    return JsonResponse(
+        {
+            "status": job.status,
+            "status_label": job.get_status_display(),
+            "stage": job.get_stage_display(),
+            "progress": job.progress,
+            "message": job.message,
+            "finished": job.finished,
+        }
     )
 
 
@@ -1411,3 +1274,15 @@ def faq(request):
         "dm_regional_app/views/faq.html",
         {},
     )
+
+
+def health(request):
+    # warm is false until this process has read the data and prepared the unfiltered statistics,
+    # see gunicorn.conf.py
+    datacontainer = cached_data(settings.DATA_SOURCE)
+    return JsonResponse(
+        {
+            "status": "ok",
+            "warm": datacontainer is not None and is_warm(datacontainer),
+        }
+    )
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 import dj_database_url
@@ -214,6 +215,43 @@ CRISPY_TEMPLATE_PACK = "bootstrap5"
 
 # data source path
 DATA_SOURCE = config("DATA_SOURCE", default="samples/v1")
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # chart data, keyed by the inputs of each chart, which include the fingerprint of the data,
+    # so charts of earlier data are never served after an upload and are left to expire. Use
+    # django.core.cache.backends.filebased.FileBasedCache, with a directory as the location,
+    # to share the charts between processes.
+    "charts": {
+        "BACKEND": config(
+            "CHART_CACHE_BACKEND",
+            default="django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": config("CHART_CACHE_LOCATION", default="charts"),
+        "TIMEOUT": config("CHART_CACHE_TIMEOUT", default=86400, cast=int),
+        "OPTIONS": {
+            "MAX_ENTRIES": config("CHART_CACHE_MAX_ENTRIES", default=500, cast=int),
+        },
+    },
+}
+# where processes share the data they read, one copy for all of them, blank to turn off. Give each
+# deployment a directory of its own: publishing data there removes any other data in it
+SHARED_DATA_DIR = config("SHARED_DATA_DIR", default="")
+# how long, in seconds, processes keep the latest data source before checking for an upload, when
+# the default cache is not shared between them; uploads made by another process are not shown for
+# up to this long (see docs/deployment.md)
+DATA_SOURCE_VERSION_TIMEOUT = config(
+    "DATA_SOURCE_VERSION_TIMEOUT", default=60, cast=int
+)
+# the most points sent for each line of a chart, per pixel of its width
+CHART_POINTS_PER_PIXEL = config("CHART_POINTS_PER_PIXEL", default=1.0, cast=float)
+# where uploaded files are kept while they are validated
+UPLOAD_STAGING_PATH = config("UPLOAD_STAGING_PATH", default="uploads")
+# "local" runs background jobs in the web process as soon as they are queued (forecasts of saved
+# scenarios in a thread, so the request saving them does not wait), "worker" leaves them for the
+# run_jobs command
+JOB_RUNNER = config("JOB_RUNNER", default="local")
 
 MESSAGE_TAGS = {
     messages.DEBUG: "alert-info",
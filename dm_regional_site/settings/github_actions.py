@@ -1,3 +1,6 @@
 from .base import *  # NOQA
 
 # add github actions dedicated settings here
+
+# tests share data through temporary directories of their own
+SHARED_DATA_DIR = ""
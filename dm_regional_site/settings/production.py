@@ -36,6 +36,9 @@ sentry_sdk.init(
     before_send=before_send,
 )
 
+# Uploads are processed by the worker process, see Procfile
+JOB_RUNNER = config("JOB_RUNNER", default="worker")
+
 # Use WhiteNoise's runserver implementation instead of the Django default, for dev-prod parity.
 INSTALLED_APPS = ["whitenoise.runserver_nostatic"] + INSTALLED_APPS + ["storages"]
 
@@ -0,0 +1,39 @@
+"""
+Gunicorn settings for the web process.
+
+The application is loaded and the data prepared in the master process before workers are forked, so
+workers start warm and share the memory holding the data until they change it.
+"""
+import gc
+import logging
+
+import decouple
+
+log = logging.getLogger("gunicorn.error")
+
+preload_app = True
+
+
+def when_ready(server):
+    if not decouple.config("WARM_UP_DATA", default=True, cast=bool):
+        return
+
+    from django.conf import settings
+    from django.db import connections
+
+    from dm_regional_app.forecasts import warm_up
+    from ssda903.reader import read_data
+
+    try:
+        warm_up(read_data(source=settings.DATA_SOURCE))
+        log.info("Data prepared for workers")
+    except Exception:
+        # workers read the data on their first request instead, e.g. before any has been uploaded
+        log.exception("Could not prepare the data for workers")
+    finally:
+        # connections must not be shared with the workers
+        connections.close_all()
+
+    # keep the objects created so far out of garbage collection, which would otherwise write to
+    # their memory and copy the pages shared with the workers
+    gc.freeze()
@@ -0,0 +1,270 @@
+import dataclasses
+import hashlib
+import logging
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable, Hashable, Optional
+
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+
+def _update_hash(hasher, value: Any):
+    """
+    Feeds a canonical representation of value into hasher. Dictionaries are hashed independently
+    of their key order and pandas objects by their content, index and columns.
+    """
+    if value is None:
+        hasher.update(b"N;")
+    elif isinstance(value, dict):
+        hasher.update(b"D%d;" % len(value))
+        for key in sorted(value, key=repr):
+            _update_hash(hasher, key)
+            _update_hash(hasher, value[key])
+    elif isinstance(value, (list, tuple)):
+        hasher.update(b"L%d;" % len(value))
+        for item in value:
+            _update_hash(hasher, item)
+    elif isinstance(value, (pd.Series, pd.DataFrame)):
+        hasher.update(b"P;")
+        if isinstance(value, pd.DataFrame):
+            _update_hash(hasher, [str(column) for column in value.columns])
+        hasher.update(
+            pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes()
+        )
+    elif isinstance(value, np.ndarray):
+        hasher.update(b"A%s;" % str(value.dtype).encode())
+        hasher.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, date):
+        hasher.update(b"T%s;" % value.isoformat().encode())
+    else:
+        hasher.update(b"V%s;" % repr(value).encode())
+
+
+def stable_hash(*values: Any) -> str:
+    """
+    Returns a hash of the values which is stable across processes, so that it can be used as a cache key.
+    """
+    hasher = hashlib.sha256()
+    _update_hash(hasher, values)
+    return hasher.hexdigest()
+
+
+def historic_data_key(
+    data_fingerprint: Optional[str], historic_filters: Optional[dict]
+) -> Optional[str]:
+    """
+    Identifies the historic data left after applying historic_filters to the data with data_fingerprint,
+    or returns None if the data is unknown. Multiple choice filters are sorted so that the same selection
+    always gives the same key.
+    """
+    if data_fingerprint is None:
+        return None
+    filters = {
+        key: sorted(map(str, value)) if isinstance(value, (list, tuple)) else value
+        for key, value in (historic_filters or {}).items()
+    }
+    return stable_hash(data_fingerprint, filters)
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Estimates the number of bytes used by value, looking into dataclasses, containers and pandas objects.
+    """
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        size = value.memory_usage(deep=True)
+        return int(size.sum() if isinstance(size, pd.Series) else size)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return sum(
+            estimate_size(getattr(value, field.name))
+            for field in dataclasses.fields(value)
+        )
+    if isinstance(value, dict):
+        return sum(estimate_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(item) for item in value)
+    # other objects, e.g. PopulationStats, can give their size through __sizeof__
+    return sys.getsizeof(value)
+
+
+# How long, in seconds, to wait for a computation started by another thread before giving up
+WAIT_TIMEOUT = 120.0
+
+
+class _Flight:
+    def __init__(self):
+        self.thread = threading.get_ident()
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent computations. While a key is being computed, other threads asking for
+    it wait for that computation and share its result, or its exception, instead of repeating it.
+    Nothing is kept once the computation finishes, see ComputationCache for keeping results.
+    """
+
+    def __init__(self, name: str, timeout: Optional[float] = WAIT_TIMEOUT):
+        self.name = name
+        self.timeout = timeout
+        self._flights: dict = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Returns the result of compute, or of the computation of key already in progress.
+
+        :raises TimeoutError: If the computation in progress does not finish within the timeout
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if leader:
+            try:
+                flight.value = compute()
+            except BaseException as error:
+                flight.error = error
+                raise
+            finally:
+                with self._lock:
+                    del self._flights[key]
+                flight.done.set()
+            return flight.value
+
+        if flight.thread == threading.get_ident():
+            # computing key needs key itself, which would otherwise wait for ever
+            return compute()
+        if not flight.done.wait(self.timeout):
+            raise TimeoutError(
+                f"{self.name}: gave up waiting {self.timeout}s for another computation"
+            )
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+
+@dataclass
+class CacheInfo:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ComputationCache:
+    """
+    A thread-safe, in-process LRU cache for computed results.
+    Entries are evicted, least recently used first, when there are more than max_entries
+    or when their estimated size exceeds max_bytes. Concurrent misses for the same key are
+    computed once, see SingleFlight.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = 32,
+        max_bytes: Optional[int] = None,
+        sizeof: Callable[[Any], int] = estimate_size,
+        timeout: Optional[float] = WAIT_TIMEOUT,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._entries: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.RLock()
+        self._flights = SingleFlight(name, timeout)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+            self._misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any):
+        size = self._sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            if self.max_bytes is not None and size > self.max_bytes:
+                log.debug("%s cache: entry of %s bytes is too large", self.name, size)
+                return
+            self._entries[key] = (value, size)
+            self._bytes += size
+            self._evict()
+
+    def get_or_set(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Returns the cached value for key, computing and storing it if it is missing. Threads missing
+        the same key at the same time wait for the first of them to compute it.
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = self._flights.do(key, lambda: self._compute(key, compute))
+        return value
+
+    def _compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            # stored by a computation which finished after this thread missed it
+            if key in self._entries:
+                return self._entries[key][0]
+        value = compute()
+        self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                bytes=self._bytes,
+            )
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and self._bytes > self.max_bytes
+        ):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self._evictions += 1
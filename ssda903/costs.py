@@ -1,12 +1,15 @@
 from dataclasses import dataclass
 from decimal import Decimal, getcontext
-from typing import Iterable, Union
+from functools import cached_property
+from typing import Iterable, Optional, Sequence, Union
 
+import numpy as np
 import pandas as pd
 from dateutil.relativedelta import relativedelta
 
 from ssda903.config import Costs, PlacementCategories
-from ssda903.multinomial import Prediction
+from ssda903.multinomial import Equilibrium, Prediction
+from ssda903.periods import QUARTER, PeriodAggregator, period_codes, period_labels
 from ssda903.population_stats import PopulationStats
 
 # Set the precision for decimal operations
@@ -21,6 +24,20 @@ class CostForecast:
     summary_table: pd.DataFrame
     proportional_population: pd.DataFrame
 
+    @cached_property
+    def periods(self) -> PeriodAggregator:
+        """
+        Totals of the daily costs by week, month, quarter, financial year or year, or over any run of days.
+        """
+        return PeriodAggregator(self.costs)
+
+
+@dataclass
+class CostSensitivity:
+    # total and quarterly costs indexed by the position of the cost and proportion adjustments and the inflation rate
+    total: pd.Series
+    quarterly: pd.DataFrame
+
 
 def normalize_proportions(cost_items, historic_proportions, proportion_adjustment):
     """
@@ -90,21 +107,11 @@ def normalize_proportions(cost_items, historic_proportions, proportion_adjustmen
     return normalised_proportions
 
 
-def resample_summary_table(summary_table):
+def resample_summary_table(summary_table, period: str = QUARTER):
     """
-    Takes daily dataframe and resamples to represent quarterly periods.
+    Takes daily dataframe and sums it over periods, quarters by default.
     """
-
-    summary_table.index = pd.to_datetime(summary_table.index)
-    summary_table = summary_table.resample("QE").sum()
-
-    # Convert the DatetimeIndex to a PeriodIndex representing quarters
-    summary_table.index = summary_table.index.to_period("Q")
-
-    # Optionally convert the PeriodIndex to a string format if preferred
-    summary_table.index = summary_table.index.strftime("Q%q-%Y")
-    summary_table = summary_table.round(2)
-    return summary_table
+    return PeriodAggregator(summary_table).by(period).round(2)
 
 
 def apply_inflation_to_cost_item(cost_per_day, inflation_rate):
@@ -114,16 +121,50 @@ def apply_inflation_to_cost_item(cost_per_day, inflation_rate):
     return float(new_cost_per_day)
 
 
-def convert_population_to_cost(
-    data: Union[Prediction, PopulationStats],
-    historic_proportions: Union[pd.Series, Iterable[pd.Series]] = None,
-    cost_adjustment: Union[pd.Series, Iterable[pd.Series]] = None,
-    proportion_adjustment: Union[pd.Series, Iterable[pd.Series]] = None,
-    inflation: Union[bool] = None,
-    inflation_rate: Union[float] = None,
-) -> CostForecast:
+def inflation_periods(dates: pd.Index) -> np.ndarray:
     """
-    This will take a population via a Prediction or PopulationStats object and transform it to a cost.
+    Returns how many times inflation has been applied by each date, inflation being applied
+    on each anniversary of the first date.
+    """
+    periods = np.zeros(len(dates), dtype=int)
+    position = 0
+    while len(dates):
+        anniversary = dates[position] + relativedelta(years=1)
+        matches = np.flatnonzero(dates[position + 1 :] == anniversary)
+        if len(matches) == 0:
+            break
+        position += matches[0] + 1
+        periods[position:] += 1
+    return periods
+
+
+def inflate_cost_per_day(
+    cost_per_day: np.ndarray, inflation_rate: Optional[float], years: int
+) -> np.ndarray:
+    """
+    Returns the cost per day of each cost item in each year, applying inflation once a year.
+    Without an inflation rate, costs stay the same every year.
+    """
+    yearly_cost_per_day = [cost_per_day]
+    for _ in range(years):
+        if inflation_rate is None:
+            yearly_cost_per_day.append(cost_per_day)
+        else:
+            yearly_cost_per_day.append(
+                np.array(
+                    [
+                        apply_inflation_to_cost_item(cost, inflation_rate)
+                        for cost in yearly_cost_per_day[-1]
+                    ]
+                )
+            )
+    return np.array(yearly_cost_per_day).reshape(years + 1, len(cost_per_day))
+
+
+def _in_care_population(data: Union[Prediction, PopulationStats]) -> pd.DataFrame:
+    """
+    Returns the population of a Prediction or PopulationStats object rounded to whole children,
+    without the columns of the population that is not in care.
     """
     if isinstance(data, Prediction):
         input_population = data.population
@@ -132,108 +173,130 @@ def convert_population_to_cost(
 
     input_population = input_population.round()
 
-    proportions = pd.Series(dtype="float64")
-    cost_summary = pd.Series(dtype="float64")
-
     # Filter out columns that contain the not in care population
     columns_to_keep = [
         col for col in input_population.columns if "Not in care" not in col
     ]
     # Return the dataframe with only the in care population
-    input_population = input_population[columns_to_keep]
+    return input_population[columns_to_keep]
 
-    costs = pd.DataFrame(index=input_population.index)
-    proportional_population = pd.DataFrame(index=input_population.index)
-    start_date = input_population.index[0]
 
-    for column in input_population.columns:
-        # for each column, create a new series where we will sum the total cost output
+def cost_item_weights(
+    columns: Iterable[str],
+    historic_proportions: pd.Series,
+    cost_adjustment: pd.Series = None,
+    proportion_adjustment: pd.Series = None,
+) -> tuple[pd.DataFrame, pd.Series, pd.Series]:
+    """
+    Works out how the population in each state is split between cost items.
+
+    Returns a (state x cost item) matrix of the proportion of each state's population placed with each
+    cost item, along with the weekly cost and the proportion of each cost item.
+    """
+    columns = list(columns)
+    proportions = {}
+    cost_per_week = {}
+    memberships = []
 
+    for position, column in enumerate(columns):
         for category in PlacementCategories:
             # for each category, check if the category label is in the column header
-            if category.value.label in column:
-                cost_items = Costs.get_cost_items_for_category(category.value.label)
-
-                if proportion_adjustment is not None:
-                    # Apply proportion adjustments
-                    normalised_proportions = normalize_proportions(
-                        cost_items, historic_proportions, proportion_adjustment
-                    )
-
-                for cost_item in cost_items:
-                    # check if there are cost adjustments and if so, take from this table
-                    if (
-                        cost_adjustment is not None
-                        and cost_item.label in cost_adjustment.index
-                    ):
-                        cost_per_week = cost_adjustment[cost_item.label]
-                    else:
-                        cost_per_week = cost_item.defaults.cost_per_week
-                    # work out daily cost
-                    cost_per_day = cost_per_week / 7
-                    # add original weekly cost to cost_summary output
-                    cost_summary[cost_item.label] = cost_per_week
-
-                    if (
-                        proportion_adjustment is not None
-                        and cost_item.label in normalised_proportions.index
-                    ):
-                        proportion = normalised_proportions[cost_item.label]
-                    elif cost_item.label in historic_proportions.index:
-                        proportion = historic_proportions[cost_item.label]
-                    else:
-                        proportion = 0
-                    # add proportion to proportions output
-                    proportions[cost_item.label] = proportion
-
-                    if inflation is True:
-                        anniversary = start_date
-                        for i, current_date in enumerate(input_population.index):
-                            # for each year that passes, add interest to the cost per day
-                            if current_date == anniversary + relativedelta(years=1):
-                                cost_per_day = apply_inflation_to_cost_item(
-                                    cost_per_day, inflation_rate
-                                )
-                                anniversary = current_date
-
-                            if cost_item.label in costs.columns:
-                                if pd.isna(costs.at[current_date, cost_item.label]):
-                                    costs.at[current_date, cost_item.label] = (
-                                        input_population.at[current_date, column]
-                                        * cost_per_day
-                                        * proportion
-                                    )
-                                else:
-                                    costs.at[current_date, cost_item.label] += (
-                                        input_population.at[current_date, column]
-                                        * cost_per_day
-                                        * proportion
-                                    )
-                            else:
-                                costs.at[current_date, cost_item.label] = (
-                                    input_population.at[current_date, column]
-                                    * cost_per_day
-                                    * proportion
-                                )
-                    else:
-                        # for each cost item, multiply by cost per day and proportion, then sum together
-                        if cost_item.label in costs.columns:
-                            costs[cost_item.label] += (
-                                input_population[column] * cost_per_day * proportion
-                            )
-                        else:
-                            costs[cost_item.label] = (
-                                input_population[column] * cost_per_day * proportion
-                            )
-                    # for each cost item, multiply forecast population by proportion, then sum together for proportioned population
-                    if cost_item.label in proportional_population.columns:
-                        proportional_population[cost_item.label] += (
-                            input_population[column] * proportion
-                        )
-                    else:
-                        proportional_population[cost_item.label] = (
-                            input_population[column] * proportion
-                        )
+            if category.value.label not in column:
+                continue
+
+            cost_items = Costs.get_cost_items_for_category(category.value.label)
+            if proportion_adjustment is not None:
+                normalised_proportions = normalize_proportions(
+                    cost_items, historic_proportions, proportion_adjustment
+                )
+
+            for cost_item in cost_items:
+                # check if there are cost adjustments and if so, take from this table
+                if (
+                    cost_adjustment is not None
+                    and cost_item.label in cost_adjustment.index
+                ):
+                    cost_per_week[cost_item.label] = cost_adjustment[cost_item.label]
+                else:
+                    cost_per_week[cost_item.label] = cost_item.defaults.cost_per_week
+
+                if (
+                    proportion_adjustment is not None
+                    and cost_item.label in normalised_proportions.index
+                ):
+                    proportion = normalised_proportions[cost_item.label]
+                elif cost_item.label in historic_proportions.index:
+                    proportion = historic_proportions[cost_item.label]
+                else:
+                    proportion = 0
+                proportions[cost_item.label] = proportion
+
+                memberships.append((position, cost_item.label))
+
+    labels = list(proportions)
+    weights = np.zeros((len(columns), len(labels)))
+    for position, label in memberships:
+        weights[position, labels.index(label)] += proportions[label]
+
+    proportions = pd.Series(
+        proportions, index=labels, dtype=None if labels else "float64"
+    )
+    cost_per_week = pd.Series(
+        cost_per_week, index=labels, dtype=None if labels else "float64"
+    )
+    return (
+        pd.DataFrame(weights, index=columns, columns=labels),
+        cost_per_week,
+        proportions,
+    )
+
+
+def convert_population_to_cost(
+    data: Union[Prediction, PopulationStats],
+    historic_proportions: Union[pd.Series, Iterable[pd.Series]] = None,
+    cost_adjustment: Union[pd.Series, Iterable[pd.Series]] = None,
+    proportion_adjustment: Union[pd.Series, Iterable[pd.Series]] = None,
+    inflation: Union[bool] = None,
+    inflation_rate: Union[float] = None,
+) -> CostForecast:
+    """
+    This will take a population via a Prediction or PopulationStats object and transform it to a cost.
+    """
+    input_population = _in_care_population(data)
+
+    weights, cost_summary, proportions = cost_item_weights(
+        input_population.columns,
+        historic_proportions,
+        cost_adjustment,
+        proportion_adjustment,
+    )
+    cost_per_day = cost_summary / 7
+
+    population = input_population.to_numpy()
+    proportional_population = pd.DataFrame(
+        population @ weights.to_numpy(),
+        index=input_population.index,
+        columns=weights.columns,
+    )
+
+    if inflation is True:
+        periods = inflation_periods(input_population.index)
+        yearly_cost_per_day = inflate_cost_per_day(
+            cost_per_day.to_numpy(dtype=float),
+            inflation_rate,
+            periods[-1] if len(periods) else 0,
+        )
+        costs = pd.DataFrame(
+            proportional_population.to_numpy() * yearly_cost_per_day[periods],
+            index=input_population.index,
+            columns=weights.columns,
+        )
+    else:
+        costs = pd.DataFrame(
+            population @ (weights * cost_per_day).to_numpy(),
+            index=input_population.index,
+            columns=weights.columns,
+        )
 
     summary_table = resample_summary_table(costs)
     return CostForecast(
@@ -241,6 +304,92 @@ def convert_population_to_cost(
     )
 
 
+def cost_sensitivity(
+    data: Union[Prediction, PopulationStats],
+    historic_proportions: pd.Series,
+    cost_adjustments: Sequence[Optional[pd.Series]] = (None,),
+    proportion_adjustments: Sequence[Optional[pd.Series]] = (None,),
+    inflation_rates: Sequence[Optional[float]] = (None,),
+) -> CostSensitivity:
+    """
+    Works out the cost of a population for every combination of cost adjustment, proportion adjustment and
+    inflation rate, without converting the population to costs for each combination in turn.
+
+    Adjustments are applied as in convert_population_to_cost: a cost adjustment replaces the default weekly cost of
+    the cost items it includes and a proportion adjustment is normalised with the historic proportions.
+    An inflation rate of None means no inflation.
+    """
+    input_population = _in_care_population(data)
+    population = input_population.to_numpy()
+    columns = input_population.columns
+
+    # (proportion adjustment x state x cost item)
+    weights = np.array(
+        [
+            cost_item_weights(columns, historic_proportions, None, adjustment)[
+                0
+            ].to_numpy()
+            for adjustment in proportion_adjustments
+        ]
+    ).reshape(len(proportion_adjustments), len(columns), -1)
+    # (cost adjustment x cost item)
+    cost_per_day = np.array(
+        [
+            cost_item_weights(columns, historic_proportions, adjustment)[1].to_numpy(
+                dtype=float
+            )
+            / 7
+            for adjustment in cost_adjustments
+        ]
+    ).reshape(len(cost_adjustments), weights.shape[2])
+
+    # Costs only change at the start of a quarter or on an inflation anniversary, so the population can be summed
+    # over the days between these before it is costed
+    dates = pd.to_datetime(input_population.index)
+    quarters = period_codes(dates, QUARTER)
+    periods = inflation_periods(input_population.index)
+    changes = np.flatnonzero(
+        np.r_[True, (quarters[1:] != quarters[:-1]) | (periods[1:] != periods[:-1])]
+    )
+    # (proportion adjustment x group of days x cost item)
+    proportional_population = np.add.reduceat(
+        np.einsum("ts,jsm->jtm", population, weights), changes, axis=1
+    )
+
+    # (cost adjustment x inflation rate x group of days x cost item)
+    years = periods[-1] if len(periods) else 0
+    daily_costs = np.array(
+        [
+            [
+                inflate_cost_per_day(cost, inflation_rate, years)[periods[changes]]
+                for inflation_rate in inflation_rates
+            ]
+            for cost in cost_per_day
+        ]
+    ).reshape(len(cost_adjustments), len(inflation_rates), len(changes), -1)
+
+    grouped_costs = np.einsum("jgm,ikgm->ijkg", proportional_population, daily_costs)
+    quarter_starts = np.flatnonzero(
+        np.r_[True, quarters[changes][1:] != quarters[changes][:-1]]
+    )
+    quarterly = np.add.reduceat(grouped_costs, quarter_starts, axis=3)
+
+    index = pd.MultiIndex.from_product(
+        [
+            range(len(cost_adjustments)),
+            range(len(proportion_adjustments)),
+            list(inflation_rates),
+        ],
+        names=["cost_adjustment", "proportion_adjustment", "inflation_rate"],
+    )
+    quarterly = pd.DataFrame(
+        quarterly.reshape(len(index), -1),
+        index=index,
+        columns=period_labels(quarters[changes][quarter_starts], QUARTER),
+    )
+    return CostSensitivity(total=quarterly.sum(axis=1), quarterly=quarterly)
+
+
 def convert_historic_population_to_cost(
     input_population: pd.DataFrame,
     cost_adjustment: Union[pd.Series, Iterable[pd.Series]] = None,
@@ -249,27 +398,53 @@ def convert_historic_population_to_cost(
     This will take a detailed historic population - proportion_population output from placement_proportions - and convert to a cost
     """
 
-    costs = pd.DataFrame(index=input_population.index)
-
+    # the column holding the population of each cost item, keeping the first position of each cost item
+    item_columns = {}
     for column in input_population.columns:
-        # for each column, create a new series where we will sum the total cost output
-
         for cost in Costs:
-            # for each category, check if the category label is in the column header
+            # for each cost item, check if the cost item label is in the column header
             if cost.value.label in column:
-                cost_item = cost.value
-
-                if (
-                    cost_adjustment is not None
-                    and cost_item.label in cost_adjustment.index
-                ):
-                    cost_per_week = cost_adjustment[cost_item.label]
-                else:
-                    cost_per_week = cost_item.defaults.cost_per_week
-                # work out daily cost
-                cost_per_day = cost_per_week / 7
+                item_columns[cost.value.label] = column
+
+    cost_per_week = pd.Series(
+        {
+            cost.value.label: cost.value.defaults.cost_per_week
+            for cost in Costs
+            if cost.value.label in item_columns
+        },
+        dtype="float64",
+    )
+    if cost_adjustment is not None:
+        # check if there are cost adjustments and if so, take from this table
+        adjusted = cost_adjustment.index.intersection(cost_per_week.index)
+        cost_per_week[adjusted] = cost_adjustment[adjusted]
+
+    labels = list(item_columns)
+    return pd.DataFrame(
+        input_population[list(item_columns.values())].to_numpy()
+        * (cost_per_week[labels] / 7).to_numpy(),
+        index=input_population.index,
+        columns=labels,
+    )
 
-                # for each cost item, multiply by cost per day
-                costs[cost_item.label] = input_population[column] * cost_per_day
 
-    return costs
+def convert_equilibrium_to_cost(
+    equilibrium: Equilibrium,
+    historic_proportions: pd.Series,
+    cost_adjustment: pd.Series = None,
+    proportion_adjustment: pd.Series = None,
+) -> pd.Series:
+    """
+    Returns the weekly cost of each cost item once the population has settled at its equilibrium.
+    The equilibrium is a long-run average, so it is neither rounded to whole children nor inflated.
+    """
+    population = equilibrium.population
+    population = population[~population.index.str.contains("Not in care")]
+    weights, cost_per_week, _ = cost_item_weights(
+        population.index, historic_proportions, cost_adjustment, proportion_adjustment
+    )
+    return pd.Series(
+        population.to_numpy() @ (weights * cost_per_week).to_numpy(),
+        index=weights.columns,
+        dtype="float64",
+    )
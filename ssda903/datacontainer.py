@@ -8,6 +8,7 @@ import numpy as np
 import pandas as pd
 from dateutil.relativedelta import relativedelta
 
+from ssda903.cache import SingleFlight
 from ssda903.config import (
     YEAR_IN_DAYS,
     AgeBrackets,
@@ -17,9 +18,13 @@ from ssda903.config import (
 )
 from ssda903.data.ssda903 import SSDA903TableType
 from ssda903.datastore import DataFile, DataStore, TableType
+from ssda903.shared import SharedData, SharedFrames
 
 log = logging.getLogger(__name__)
 
+# Increase when the enriched view changes, so that views shared by earlier versions are not used
+ENRICHED_VIEW_VERSION = "1"
+
 
 class DemandModellingDataContainer:
     """
@@ -27,8 +32,20 @@ class DemandModellingDataContainer:
     merging data to create a single, consistent dataset.
     """
 
-    def __init__(self, datastore: DataStore):
+    def __init__(
+        self,
+        datastore: DataStore,
+        fingerprint: Optional[str] = None,
+        shared: Optional[SharedFrames] = None,
+    ):
+        """
+        :param shared: Where to share the enriched view with other processes reading the same data, which
+                       requires a fingerprint
+        """
         self.__datastore = datastore
+        self.__fingerprint = fingerprint
+        self.__shared = shared if fingerprint is not None else None
+        self.__flights = SingleFlight("enriched view")
 
         self.__file_info = []
         for file_info in datastore.files:
@@ -51,6 +68,13 @@ class DemandModellingDataContainer:
     def file_info(self):
         return self.__file_info
 
+    @property
+    def fingerprint(self) -> Optional[str]:
+        """
+        Identifies the version of the source data this container was read from, or None if unknown.
+        """
+        return self.__fingerprint
+
     def _detect_table_type(self, file_info: DataFile) -> Optional[TableType]:
         """
         Detect the table type of a file by reading the first line of the file and looking for a
@@ -213,6 +237,19 @@ class DemandModellingDataContainer:
 
         return combined
 
+    @property
+    def _generation(self) -> str:
+        return f"{self.fingerprint}-{ENRICHED_VIEW_VERSION}"
+
+    @cached_property
+    def _shared_data(self) -> Optional[SharedData]:
+        """
+        The enriched view, with the values derived from the combined data, as published by any process
+        """
+        if self.__shared is None:
+            return None
+        return self.__shared.load(self._generation)
+
     @cached_property
     def enriched_view(self) -> pd.DataFrame:
         """
@@ -222,6 +259,37 @@ class DemandModellingDataContainer:
         * age_end - the age of the child at the end of the episode
 
         """
+        # threads asking for the view while it is being built wait for it
+        return self.__flights.do("enriched_view", self._enriched_view)
+
+    def _enriched_view(self) -> pd.DataFrame:
+        if "enriched_view" in self.__dict__:
+            # built by a thread which finished after this one asked for it
+            return self.__dict__["enriched_view"]
+        if self._shared_data is not None:
+            return self._shared_data.frames["enriched_view"]
+
+        enriched = self._enrich()
+        if self.__shared is None:
+            return enriched
+
+        shared = self.__shared.publish(
+            self._generation,
+            {"enriched_view": enriched, "las": pd.DataFrame({"LA": self.unique_las})},
+            {
+                "data_start_date": self.data_start_date.isoformat(),
+                "data_end_date": self.data_end_date.isoformat(),
+            },
+        )
+        if shared is None:
+            return enriched
+
+        # only the shared copy is used from now on
+        self._shared_data = shared
+        self.__dict__.pop("combined_data", None)
+        return shared.frames["enriched_view"]
+
+    def _enrich(self) -> pd.DataFrame:
         combined = self.combined_data
 
         # Remove redundant episodes; with logging to detect changes in end date population
@@ -267,6 +335,9 @@ class DemandModellingDataContainer:
         This will always be 1st April
         Note that this method relies on the YEAR field which is only present in data platform outputs and not part of the original SSDA903 returns
         """
+        if self._shared_data is not None:
+            return date.fromisoformat(self._shared_data.attributes["data_start_date"])
+
         # Find the minimum value in the 'YEAR' column
         min_year = self.combined_data["YEAR"].min()
         data_start_date = date(min_year - 1, 4, 1)
@@ -280,6 +351,9 @@ class DemandModellingDataContainer:
         This will always be 31st March
         Note that this may not be the last date shown in the data, as no entry/transition/exit from care may have occurred on this day
         """
+        if self._shared_data is not None:
+            return date.fromisoformat(self._shared_data.attributes["data_end_date"])
+
         max_dec_decom = self.combined_data[["DECOM", "DEC"]].max().max().date()
 
         # Extract the month and year from the max_dec_decom date
@@ -296,6 +370,8 @@ class DemandModellingDataContainer:
 
     @cached_property
     def unique_las(self) -> pd.Series:
+        if self._shared_data is not None:
+            return self._shared_data.frames["las"].LA.unique()
         return self.combined_data.LA.sort_values().unique()
 
     @cached_property
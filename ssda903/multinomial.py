@@ -1,16 +1,32 @@
+import warnings
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from datetime import date, timedelta
-from typing import Iterable, Optional
+from datetime import date
+from functools import lru_cache
+from itertools import product
+from typing import Iterable, Iterator, Optional
 
 import numpy as np
 import pandas as pd
 
+from ssda903.config import AgeBrackets, PlacementCategories
+
 try:
     import tqdm
 except ImportError:
     tqdm = None
 
+try:
+    from scipy import sparse
+    from scipy.sparse import linalg as sparse_linalg
+except ImportError:
+    sparse = None
+    sparse_linalg = None
+
+# The sparse backend is only used for state spaces at least this large and at most this dense
+SPARSE_MIN_STATES = 100
+SPARSE_MAX_DENSITY = 0.1
+
 
 @dataclass
 class Prediction:
@@ -20,53 +36,194 @@ class Prediction:
     entry_rates: pd.Series
 
 
+@dataclass
+class PredictionBlock:
+    """
+    A block of consecutive days of a prediction, as streamed by MultinomialPredictor.iter_predict
+    """
+
+    population: pd.DataFrame
+    variance: pd.DataFrame
+
+
+@dataclass
+class StratifiedPrediction:
+    """
+    Predictions for each stratum (e.g. each LA) and the population and variance summed across them.
+    """
+
+    strata: dict[str, Prediction]
+    population: pd.DataFrame
+    variance: pd.DataFrame
+
+
+@dataclass
+class Equilibrium:
+    """
+    The long-run equilibrium of a prediction.
+    - population: the steady-state population of every state that children can leave
+    - absorption: the daily number of children entering each absorbing state (e.g. leaving care)
+    - spectral_radius: the largest eigenvalue modulus of the transition matrix between the
+      non-absorbing states, which sets how quickly the population settles
+    """
+
+    population: pd.Series
+    absorption: pd.Series
+    spectral_radius: float
+
+    @property
+    def spectral_gap(self) -> float:
+        return 1 - self.spectral_radius
+
+    def days_to_converge(self, tolerance: float = 0.01) -> float:
+        """
+        Number of days after which the distance to the equilibrium has shrunk to the given
+        fraction of the starting distance.
+        """
+        if self.spectral_radius <= 0:
+            return 0.0
+        if self.spectral_radius >= 1:
+            return np.inf
+        return float(np.log(tolerance) / np.log(self.spectral_radius))
+
+
 @dataclass
 class NextPrediction:
     population: np.ndarray
     variance: np.ndarray
 
 
+@lru_cache(maxsize=1)
+def state_space() -> pd.Index:
+    """
+    The fixed universe of model states, i.e. every "<age bracket> - <placement category>" pair.
+    States are sorted in the same order as the matrix axes so the position of a state is its code.
+    """
+    states = [
+        f"{age_bracket.label} - {category.label.capitalize()}"
+        for age_bracket, category in product(
+            AgeBrackets.values(), PlacementCategories.values()
+        )
+    ]
+    return pd.Index(sorted(states))
+
+
+def encode_states(*labels: pd.Index) -> tuple[pd.Index, list[np.ndarray]]:
+    """
+    Returns the integer codes of each group of state labels within a common state index.
+    States are coded against the fixed state_space; any label outside of it (for example when a
+    finer-grained state is used) extends the index so that it can still be coded.
+    """
+    states = state_space()
+    unknown = [l[states.get_indexer(l) == -1] for l in labels]
+    if any(len(u) for u in unknown):
+        states = states.append(unknown).unique().sort_values()
+    return states, [states.get_indexer(l) for l in labels]
+
+
+def prediction_dates(
+    start_date: date, steps: int, step_days: int = 1
+) -> pd.DatetimeIndex:
+    """
+    The date of each predicted step after start_date.
+    """
+    start = np.datetime64(start_date, "D")
+    return pd.DatetimeIndex(start + np.arange(1, steps + 1) * step_days).as_unit("us")
+
+
 def populate_same_state_transition(transition_rates: pd.Series) -> pd.DataFrame:
     """
     Fill transition rates between the same states with 1 minus the sum of all the other rates.
     If the transition rate between the same state is not present, it will be added with the value of 1.
     """
     _transition_rates = transition_rates.copy()
-    for value in _transition_rates.index.get_level_values(0).unique():
-        total = _transition_rates.xs((value)).sum()
-        try:
-            current_value = _transition_rates.xs((value, value))
-        except KeyError:
-            current_value = 0
-        _transition_rates.loc[(value, value)] = 1 - total + current_value
+    origin = _transition_rates.index.get_level_values(0)
+    destination = _transition_rates.index.get_level_values(1)
+    same_state = origin == destination
+
+    totals = _transition_rates.groupby(origin, sort=False).sum()
+    current = _transition_rates[same_state].groupby(origin[same_state]).sum()
+    current = current.reindex(totals.index, fill_value=0)
+    stay_rates = 1 - totals + current
+
+    # Update the existing same state transitions in place...
+    _transition_rates[same_state] = stay_rates.loc[origin[same_state]].values
+
+    # ...and append the ones which were not present
+    missing = stay_rates[~stay_rates.index.isin(origin[same_state])]
+    if not missing.empty:
+        missing.index = pd.MultiIndex.from_arrays(
+            [missing.index, missing.index], names=_transition_rates.index.names
+        )
+        _transition_rates = pd.concat([_transition_rates, missing])
     return _transition_rates
 
 
+@dataclass
+class TransitionEntries:
+    """
+    The non-zero entries of a transition matrix, in coordinate form.
+    rows are the destination states and columns the origin states.
+    """
+
+    states: pd.Index
+    rows: np.ndarray
+    columns: np.ndarray
+    values: np.ndarray
+
+    @property
+    def density(self) -> float:
+        return len(self.values) / max(len(self.states) ** 2, 1)
+
+
+def transition_rates_entries(transition_rates: pd.Series) -> TransitionEntries:
+    """
+    Codes the transition rates against the fixed state_space and returns the matrix entries,
+    adding a value of 1 on the diagonal for the states that are never an origin (absorbing states).
+    Only states that appear in the transition rates are kept.
+    """
+    origin = transition_rates.index.get_level_values(0)
+    destination = transition_rates.index.get_level_values(1)
+    states, (origin_codes, destination_codes) = encode_states(origin, destination)
+
+    # Keep only the states that are used, preserving their order in the state space
+    used = np.zeros(len(states), dtype=bool)
+    used[origin_codes] = True
+    used[destination_codes] = True
+    positions = np.cumsum(used) - 1
+    states = states[used]
+    origin_codes = positions[origin_codes]
+    destination_codes = positions[destination_codes]
+
+    values = np.nan_to_num(transition_rates.to_numpy(dtype="float64"), nan=0.0)
+
+    # States that are never an origin are absorbing, so they stay where they are
+    absorbing = np.ones(len(states), dtype=bool)
+    absorbing[origin_codes] = False
+    absorbing = np.flatnonzero(absorbing)
+
+    return TransitionEntries(
+        states=states,
+        rows=np.concatenate([destination_codes, absorbing]),
+        columns=np.concatenate([origin_codes, absorbing]),
+        values=np.concatenate([values, np.ones(len(absorbing))]),
+    )
+
+
 def build_transition_rates_matrix(transition_rates: pd.Series) -> pd.DataFrame:
     """
     - Convert the transition rates to a matrix format, where the columns are the
       origin states and the index is the destination state.
     - Ensure that the matrix is square by adding the missing states with a value of 1 and 0 for the rest.
     - Sort the matrix by the index and columns.
-    """
-    matrix = transition_rates.unstack(0).fillna(0)
-    for col in matrix.columns:
-        if col not in matrix.index:
-            new_row = pd.DataFrame(
-                [[0] * len(matrix.columns)], columns=matrix.columns, index=[col]
-            )
-            new_row[col] = 1
-            matrix = pd.concat([matrix, new_row])
 
-    for idx in matrix.index:
-        if idx not in matrix.columns:
-            matrix[idx] = 0
-            # tuples causes issues while updating a value in a dataframe with loc
-            # so we need to get the integer locations of the index and columns
-            ilocs = matrix.index.get_loc(idx), matrix.columns.get_loc(idx)
-            matrix.iloc[ilocs] = 1
-
-    return matrix.sort_index(axis=0).sort_index(axis=1)
+    States are coded against the fixed state_space and the rates are scattered into a preallocated
+    array in one step. Only states that appear in the transition rates are kept in the matrix.
+    """
+    entries = transition_rates_entries(transition_rates)
+    matrix = np.zeros((len(entries.states), len(entries.states)))
+    matrix[entries.rows, entries.columns] = entries.values
+    return pd.DataFrame(matrix, index=entries.states, columns=entries.states)
 
 
 def fill_missing_states(series: pd.Series, states: Iterable) -> pd.Series:
@@ -75,11 +232,7 @@ def fill_missing_states(series: pd.Series, states: Iterable) -> pd.Series:
     - Add the missing states with a value of 0.
     - Sort the rates by the index.
     """
-    _series = series.copy()
-    for idx in states:
-        if idx not in _series.index:
-            _series = pd.concat([_series, pd.Series(0, index=[idx])])
-    return _series.sort_index()
+    return series.reindex(series.index.union(pd.Index(states)), fill_value=0)
 
 
 def normalize_rates(group, is_adjusted):
@@ -184,8 +337,13 @@ class MultinomialPredictor(BaseModelPredictor):
         start_date: date = date.today(),
         rate_adjustment: Optional[pd.DataFrame] = None,
         number_adjustment: Optional[pd.DataFrame] = None,
+        backend: Optional[str] = None,
         **kwargs,
     ):
+        """
+        backend can be "dense" or "sparse". If not given, the sparse backend is used when
+        scipy is available and the transition matrix is large and mostly empty.
+        """
         super().__init__(**kwargs)
 
         # initialize rates
@@ -199,11 +357,18 @@ class MultinomialPredictor(BaseModelPredictor):
                 transition_rates = combine_rates(transition_rates, adjustment)
 
         self._transition_rates = populate_same_state_transition(transition_rates)
-        self._matrix = build_transition_rates_matrix(self._transition_rates)
+        entries = transition_rates_entries(self._transition_rates)
+        self._states = entries.states
+        self._backend = self._select_backend(backend, entries)
+        self._matrix_values = self._build_matrix(entries)
+        # elementwise P * (1 - P), written so that it stays sparse for the sparse backend
+        self._variance_values = self._matrix_values - self._multiply(
+            self._matrix_values, self._matrix_values
+        )
 
         # initialize transition numbers
         if transition_numbers is None:
-            self._transition_numbers = pd.Series(0, index=self._matrix.index)
+            self._transition_numbers = pd.Series(0, index=self._states)
         else:
             transition_numbers = transition_numbers.copy()
             transition_numbers.index.names = ["from", "to"]
@@ -223,16 +388,58 @@ class MultinomialPredictor(BaseModelPredictor):
 
             transition_numbers.index = transition_numbers.index.get_level_values("to")
             self._transition_numbers = fill_missing_states(
-                transition_numbers, self._matrix.index
+                transition_numbers, self._states
             )
 
         # initialize population
-        self._initial_population = fill_missing_states(population, self._matrix.index)
+        self._initial_population = fill_missing_states(population, self._states)
         self._start_date = start_date
 
+        # the arrays used on each step are computed once, rather than copied out of the frames
+        self._transition_numbers_values = self._transition_numbers.to_numpy()
+
+    @staticmethod
+    def _select_backend(backend: Optional[str], entries: TransitionEntries) -> str:
+        if backend is None:
+            use_sparse = (
+                sparse is not None
+                and len(entries.states) >= SPARSE_MIN_STATES
+                and entries.density <= SPARSE_MAX_DENSITY
+            )
+            return "sparse" if use_sparse else "dense"
+        if backend not in ("dense", "sparse"):
+            raise ValueError(f"Unknown backend '{backend}', use 'dense' or 'sparse'")
+        if backend == "sparse" and sparse is None:
+            raise ImportError("scipy is required to use the sparse backend")
+        return backend
+
+    def _build_matrix(self, entries: TransitionEntries):
+        n_states = len(entries.states)
+        if self._backend == "sparse":
+            return sparse.csr_matrix(
+                (entries.values, (entries.rows, entries.columns)),
+                shape=(n_states, n_states),
+            )
+        matrix = np.zeros((n_states, n_states))
+        matrix[entries.rows, entries.columns] = entries.values
+        return matrix
+
+    def _multiply(self, a, b):
+        if self._backend == "sparse":
+            return a.multiply(b).tocsr()
+        return a * b
+
+    @property
+    def backend(self) -> str:
+        return self._backend
+
     @property
     def matrix(self) -> pd.DataFrame:
-        return self._matrix.copy()
+        if self._backend == "sparse":
+            values = self._matrix_values.toarray()
+        else:
+            values = self._matrix_values.copy()
+        return pd.DataFrame(values, index=self._states, columns=self._states)
 
     @property
     def transition_rates(self) -> pd.Series:
@@ -257,18 +464,86 @@ class MultinomialPredictor(BaseModelPredictor):
         for _ in range(step_days):
             # Cumulative variance propagation to reflect uncertainty growing linearly with time
             variance = variance + (
-                np.dot(
-                    np.multiply(self.matrix.values, 1 - self.matrix.values), population
-                )
-                + self.transition_numbers.values
+                self._variance_values @ population + self._transition_numbers_values
             )
             population = (
-                np.dot(self.matrix.values, population) + self.transition_numbers.values
+                self._matrix_values @ population + self._transition_numbers_values
             )
         return NextPrediction(population, variance)
 
-    def predict(self, steps: int = 1, step_days: int = 1, progress=False) -> Prediction:
-        predictor = self
+    def equilibrium(self) -> Equilibrium:
+        """
+        Solves (I - P)x = b for the states children can leave, so the long-run population
+        is found with a single linear solve rather than by predicting many steps.
+        Absorbing states (those with a same state rate of 1) never settle as they only
+        accumulate, so the daily number of children entering them is returned instead.
+        """
+        matrix = self._matrix_values
+        diagonal = matrix.diagonal()
+        absorbing = np.isclose(diagonal, 1)
+        transient = np.flatnonzero(~absorbing)
+        absorbing = np.flatnonzero(absorbing)
+        numbers = self._transition_numbers_values.astype("float64")
+
+        if self._backend == "sparse":
+            transient_matrix = matrix[transient][:, transient].tocsc()
+            identity = sparse.identity(len(transient), format="csc")
+            with warnings.catch_warnings():
+                # a singular matrix is reported by the non-finite result
+                warnings.simplefilter("ignore", sparse_linalg.MatrixRankWarning)
+                population = np.atleast_1d(
+                    sparse_linalg.spsolve(
+                        identity - transient_matrix, numbers[transient]
+                    )
+                )
+            if not np.isfinite(population).all():
+                raise ValueError(
+                    "The model has no equilibrium: some states can never be left"
+                )
+            try:
+                # ARPACK needs more than two states
+                if len(transient) < 3:
+                    raise ValueError
+                eigenvalues = sparse_linalg.eigs(
+                    transient_matrix, k=1, which="LM", return_eigenvectors=False
+                )
+            except (ValueError, TypeError, sparse_linalg.ArpackError):
+                eigenvalues = np.linalg.eigvals(transient_matrix.toarray())
+            absorption = matrix[absorbing][:, transient] @ population
+        else:
+            transient_matrix = matrix[np.ix_(transient, transient)]
+            identity = np.eye(len(transient))
+            try:
+                population = np.linalg.solve(
+                    identity - transient_matrix, numbers[transient]
+                )
+            except np.linalg.LinAlgError:
+                raise ValueError(
+                    "The model has no equilibrium: some states can never be left"
+                )
+            eigenvalues = np.linalg.eigvals(transient_matrix)
+            absorption = matrix[np.ix_(absorbing, transient)] @ population
+
+        spectral_radius = float(np.abs(eigenvalues).max()) if len(transient) else 0.0
+        return Equilibrium(
+            population=pd.Series(population, index=self._states[transient]),
+            absorption=pd.Series(
+                absorption + numbers[absorbing], index=self._states[absorbing]
+            ),
+            spectral_radius=spectral_radius,
+        )
+
+    def _predict_steps(
+        self, steps: int, step_days: int = 1, block_size: int = None, progress=False
+    ) -> Iterator[tuple[int, int, pd.DatetimeIndex, np.ndarray, np.ndarray]]:
+        """
+        Predicts each step into preallocated population and variance arrays, yielding
+        (start, stop, dates, populations, variances) every block_size steps so that the
+        caller can use the rows predicted so far.
+        """
+        assert step_days > 0, "'step_days' must be greater than 0"
+        block_size = block_size or max(steps, 1)
+        dates = prediction_dates(self.date, steps, step_days)
 
         if progress and tqdm:
             iterator = tqdm.trange(steps)
@@ -277,36 +552,192 @@ class MultinomialPredictor(BaseModelPredictor):
             iterator = range(steps)
             set_description = lambda x: None
 
-        predictions = []
-        variances = []
-        index = []
-        population = self.initial_population.values
-        variance = 0
+        n_states = len(self._initial_population)
+        populations = np.empty((steps, n_states))
+        variances = np.empty((steps, n_states))
+        numbers = self._transition_numbers_values
+        # one day steps on the dense backend are written straight into the output arrays
+        in_place = step_days == 1 and self._backend == "dense"
+
+        population = self._initial_population.to_numpy(dtype="float64")
+        variance = np.zeros(n_states)
+        start = 0
         for i in iterator:
-            prediction = predictor.next(population, variance, step_days=step_days)
-            population = prediction.population
-            predictions.append(population)
-            variance = prediction.variance
-            variances.append(variance)
+            if in_place:
+                # Cumulative variance propagation to reflect uncertainty growing linearly with time
+                np.dot(self._variance_values, population, out=variances[i])
+                variances[i] += numbers
+                variances[i] += variance
+                np.dot(self._matrix_values, population, out=populations[i])
+                populations[i] += numbers
+            else:
+                prediction = self.next(population, variance, step_days=step_days)
+                populations[i] = prediction.population
+                variances[i] = prediction.variance
+            population = populations[i]
+            variance = variances[i]
+            set_description(f"{dates[i]:%Y-%m}")
+
+            if i + 1 - start == block_size or i + 1 == steps:
+                yield start, i + 1, dates, populations, variances
+                start = i + 1
+
+    def iter_predict(
+        self, steps: int = 1, step_days: int = 1, block_size: int = 365, progress=False
+    ) -> Iterator[PredictionBlock]:
+        """
+        Streams the prediction in blocks of block_size steps. Stopping the iteration early
+        skips the remaining steps.
+        """
+        columns = self._initial_population.index
+        for start, stop, dates, populations, variances in self._predict_steps(
+            steps, step_days, block_size, progress
+        ):
+            yield PredictionBlock(
+                population=pd.DataFrame(
+                    populations[start:stop],
+                    columns=columns,
+                    index=dates[start:stop],
+                    copy=False,
+                ),
+                variance=pd.DataFrame(
+                    variances[start:stop],
+                    columns=columns,
+                    index=dates[start:stop],
+                    copy=False,
+                ),
+            )
 
-            date = self.date + timedelta(days=(i + 1) * step_days)
-            index.append(date)
-            set_description(f"{date:%Y-%m}")
+    def predict(self, steps: int = 1, step_days: int = 1, progress=False) -> Prediction:
+        dates = prediction_dates(self.date, 0)
+        populations = variances = np.empty((0, len(self._initial_population)))
+        for _, _, dates, populations, variances in self._predict_steps(
+            steps, step_days, progress=progress
+        ):
+            pass
 
         df_entry_rates = self.transition_numbers
 
         df_transition_rates = self._transition_rates
 
         df_predictions = pd.DataFrame(
-            predictions,
+            populations,
             columns=self.initial_population.index,
-            index=index,
+            index=dates,
+            copy=False,
         )
         df_variances = pd.DataFrame(
             variances,
             columns=self.initial_population.index,
-            index=index,
+            index=dates,
+            copy=False,
         )
         return Prediction(
             df_predictions, df_variances, df_transition_rates, df_entry_rates
         )
+
+
+class StratifiedMultinomialPredictor(BaseModelPredictor):
+    """
+    Runs several MultinomialPredictors (e.g. one per LA) as a single batched system.
+    The matrices are aligned to the union of the states, so every step is one batched
+    matrix product for all the strata instead of one prediction per stratum.
+    """
+
+    def __init__(self, predictors: dict[str, MultinomialPredictor], **kwargs):
+        super().__init__(**kwargs)
+        assert predictors, "at least one predictor is required"
+        start_dates = {predictor.date for predictor in predictors.values()}
+        assert len(start_dates) == 1, "all predictors must have the same start date"
+
+        self._predictors = predictors
+        self._start_date = start_dates.pop()
+        self._states = pd.Index([]).append(
+            [predictor.initial_population.index for predictor in predictors.values()]
+        )
+        self._states = self._states.unique().sort_values()
+
+        n_states = len(self._states)
+        # states missing from a stratum are absorbing with no population and no entrants
+        self._matrices = np.tile(np.eye(n_states), (len(predictors), 1, 1))
+        self._transition_numbers = np.zeros((len(predictors), n_states))
+        self._initial_population = np.zeros((len(predictors), n_states))
+        for k, predictor in enumerate(predictors.values()):
+            matrix = predictor.matrix
+            positions = self._states.get_indexer(matrix.index)
+            self._matrices[k][np.ix_(positions, positions)] = matrix.to_numpy()
+            numbers = predictor.transition_numbers
+            self._transition_numbers[
+                k, self._states.get_indexer(numbers.index)
+            ] = numbers.to_numpy()
+            population = predictor.initial_population
+            self._initial_population[
+                k, self._states.get_indexer(population.index)
+            ] = population.to_numpy()
+        self._variance_matrices = self._matrices * (1 - self._matrices)
+
+    @property
+    def states(self) -> pd.Index:
+        return self._states.copy()
+
+    @property
+    def date(self) -> date:
+        return self._start_date
+
+    def next(
+        self, population: np.ndarray, variance: np.ndarray, step_days: int = 1
+    ) -> NextPrediction:
+        assert step_days > 0, "'step_days' must be greater than 0"
+        for _ in range(step_days):
+            variance = variance + (
+                np.matmul(self._variance_matrices, population[..., None])[..., 0]
+                + self._transition_numbers
+            )
+            population = (
+                np.matmul(self._matrices, population[..., None])[..., 0]
+                + self._transition_numbers
+            )
+        return NextPrediction(population, variance)
+
+    def predict(
+        self, steps: int = 1, step_days: int = 1, progress=False
+    ) -> StratifiedPrediction:
+        if progress and tqdm:
+            iterator = tqdm.trange(steps)
+        else:
+            iterator = range(steps)
+
+        populations = np.empty((steps, *self._initial_population.shape))
+        variances = np.empty((steps, *self._initial_population.shape))
+        population = self._initial_population
+        variance = np.zeros_like(population)
+        for i in iterator:
+            prediction = self.next(population, variance, step_days=step_days)
+            population = populations[i] = prediction.population
+            variance = variances[i] = prediction.variance
+
+        index = prediction_dates(self.date, steps, step_days)
+
+        strata = {}
+        for k, (key, predictor) in enumerate(self._predictors.items()):
+            columns = predictor.initial_population.index
+            positions = self._states.get_indexer(columns)
+            strata[key] = Prediction(
+                pd.DataFrame(
+                    populations[:, k, positions], columns=columns, index=index
+                ),
+                pd.DataFrame(variances[:, k, positions], columns=columns, index=index),
+                predictor.transition_rates,
+                predictor.transition_numbers,
+            )
+
+        # strata are independent, so both the populations and the variances add up
+        return StratifiedPrediction(
+            strata=strata,
+            population=pd.DataFrame(
+                populations.sum(axis=1), columns=self._states, index=index
+            ),
+            variance=pd.DataFrame(
+                variances.sum(axis=1), columns=self._states, index=index
+            ),
+        )
@@ -0,0 +1,73 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from decimal import getcontext, localcontext
+from typing import Any, Callable, Optional
+
+log = logging.getLogger(__name__)
+
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+_worker = threading.local()
+
+
+@dataclass
+class TaskResult:
+    value: Any
+    seconds: float
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=MAX_WORKERS, thread_name_prefix="forecast"
+            )
+        return _pool
+
+
+def _timed(name: str, task: Callable[[], Any], context) -> TaskResult:
+    _worker.active = True
+    try:
+        # decimal contexts are per thread, so costs are computed with the precision of the caller
+        with localcontext(context):
+            start = time.perf_counter()
+            value = task()
+            seconds = time.perf_counter() - start
+    finally:
+        _worker.active = False
+    log.debug("%s took %.3fs", name, seconds)
+    return TaskResult(value, seconds)
+
+
+def run_concurrently(tasks: dict[str, Callable[[], Any]]) -> dict[str, TaskResult]:
+    """
+    Runs independent tasks on a shared thread pool and waits for them to finish.
+
+    NumPy and pandas release the GIL for much of their work, so a page computing several independent
+    forecasts takes about as long as the slowest of them. A single task, or tasks submitted from
+    within the pool, are run in the calling thread.
+
+    :param tasks: The tasks to run by name
+    :return: The result of each task and the time it took, by name
+    :raises: The exception of the first failed task, once all the tasks have finished
+    """
+    context = getcontext()
+    if len(tasks) <= 1 or getattr(_worker, "active", False) or MAX_WORKERS <= 1:
+        return {name: _timed(name, task, context) for name, task in tasks.items()}
+
+    pool = _get_pool()
+    futures = {
+        name: pool.submit(_timed, name, task, context) for name, task in tasks.items()
+    }
+    errors = [future.exception() for future in futures.values()]
+    for error in errors:
+        if error is not None:
+            raise error
+    return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,122 @@
+from datetime import date
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+WEEK = "week"
+MONTH = "month"
+QUARTER = "quarter"
+FINANCIAL_YEAR = "financial_year"
+YEAR = "year"
+
+PERIODS = (WEEK, MONTH, QUARTER, FINANCIAL_YEAR, YEAR)
+
+# 1970-01-01 was a Thursday, weeks start on a Monday
+_WEEK_OFFSET = 3
+
+
+def period_codes(dates: pd.Index, period: str) -> np.ndarray:
+    """
+    Returns an integer code for the period each date falls in. Codes of consecutive periods are consecutive integers.
+
+    Financial years run from April to March.
+    """
+    dates = pd.DatetimeIndex(pd.to_datetime(dates))
+    if period == WEEK:
+        days = dates.to_numpy().astype("datetime64[D]").astype(np.int64)
+        return (days + _WEEK_OFFSET) // 7
+    year = dates.year.to_numpy()
+    month = dates.month.to_numpy()
+    if period == MONTH:
+        return year * 12 + month - 1
+    if period == QUARTER:
+        return year * 4 + (month - 1) // 3
+    if period == FINANCIAL_YEAR:
+        return year - (month < 4)
+    if period == YEAR:
+        return year
+    raise ValueError(f"Unknown period {period}, expected one of {PERIODS}")
+
+
+def period_labels(codes: np.ndarray, period: str) -> pd.Index:
+    """
+    Returns a label for each period code, e.g. "Q2-2024" for a quarter or "2024-25" for a financial year.
+    """
+    codes = np.asarray(codes)
+    if period == WEEK:
+        starts = (codes * 7 - _WEEK_OFFSET).astype("datetime64[D]")
+        return pd.Index(pd.DatetimeIndex(starts).strftime("%Y-%m-%d"))
+    if period == MONTH:
+        return pd.Index(
+            pd.PeriodIndex.from_fields(
+                year=codes // 12, month=codes % 12 + 1, freq="M"
+            ).strftime("%b-%Y")
+        )
+    if period == QUARTER:
+        return pd.Index([f"Q{code % 4 + 1}-{code // 4}" for code in codes])
+    if period == FINANCIAL_YEAR:
+        return pd.Index([f"{code}-{(code + 1) % 100:02d}" for code in codes])
+    if period == YEAR:
+        return pd.Index([str(code) for code in codes])
+    raise ValueError(f"Unknown period {period}, expected one of {PERIODS}")
+
+
+class PeriodAggregator:
+    """
+    Sums daily values over calendar periods or runs of days.
+
+    The values are summed once into cumulative sums, so that the total for any run of days is a
+    subtraction and totals for every period of a given length are a single reduction.
+    """
+
+    def __init__(self, data: Union[pd.DataFrame, pd.Series]):
+        if isinstance(data, pd.Series):
+            data = data.to_frame()
+        data = data.sort_index()
+        self._dates = pd.DatetimeIndex(pd.to_datetime(data.index))
+        self._columns = data.columns
+        self._values = data.to_numpy(dtype=float)
+        self._cumulative = np.vstack(
+            [np.zeros((1, self._values.shape[1])), np.cumsum(self._values, axis=0)]
+        )
+
+    @property
+    def dates(self) -> pd.DatetimeIndex:
+        return self._dates
+
+    def by(self, period: str) -> pd.DataFrame:
+        """
+        Returns the totals for each period from the first to the last date, including periods without any dates.
+        """
+        if len(self._dates) == 0:
+            return pd.DataFrame(columns=self._columns, dtype="float64")
+
+        codes = period_codes(self._dates, period)
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        all_codes = np.arange(codes[0], codes[-1] + 1)
+
+        totals = np.zeros((len(all_codes), len(self._columns)))
+        totals[codes[starts] - codes[0]] = np.add.reduceat(self._values, starts, axis=0)
+        return pd.DataFrame(
+            totals, index=period_labels(all_codes, period), columns=self._columns
+        )
+
+    def total(
+        self,
+        start: Optional[Union[date, pd.Timestamp]] = None,
+        end: Optional[Union[date, pd.Timestamp]] = None,
+    ) -> pd.Series:
+        """
+        Returns the totals for the dates from start up to but not including end.
+        """
+        first = 0 if start is None else self._dates.searchsorted(pd.Timestamp(start))
+        last = (
+            len(self._dates)
+            if end is None
+            else self._dates.searchsorted(pd.Timestamp(end))
+        )
+        last = max(first, last)
+        return pd.Series(
+            self._cumulative[last] - self._cumulative[first], index=self._columns
+        )
@@ -1,12 +1,33 @@
 from datetime import date
-from functools import cached_property, lru_cache
+from functools import cached_property, lru_cache, wraps
 from itertools import product
+from typing import Optional
 
 import numpy as np
 import pandas as pd
 
+from ssda903.cache import ComputationCache, SingleFlight, estimate_size, stable_hash
 from ssda903.config import Costs, PlacementCategories
 
+# Detailed stock is shared between PopulationStats built from the same episodes, see cache_key
+_detailed_stock_cache = ComputationCache("detailed stock", max_entries=16)
+
+
+def _computed_once(method):
+    """
+    Makes threads asking an instance for the same table at the same time, e.g. concurrent scenario
+    stages, wait for one computation of it instead of each building it. cached_property and lru_cache
+    do not lock, so this goes beneath them.
+    """
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        return self._flights.do(key, lambda: method(self, *args, **kwargs))
+
+    return wrapper
+
+
 def _calculate_raw_transition_rates(
         stock: pd.DataFrame,
         transitions: pd.DataFrame,
@@ -81,16 +102,55 @@ class PopulationStats:
     - entry rates: the rate of entry per day for each model state for a defined reference period
     """
 
-    def __init__(self, df: pd.DataFrame, data_start_date: date, data_end_date: date):
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        data_start_date: date,
+        data_end_date: date,
+        cache_key: Optional[str] = None,
+    ):
+        """
+        :param cache_key: Identifies the episodes in df, e.g. by the fingerprint of the source data and the filters
+                          applied to it, so that results can be shared with other instances built from the same episodes
+        """
         self.__df = df
+        self.__cache_key = cache_key
         self.data_start_date = pd.to_datetime(data_start_date)
         self.data_end_date = pd.to_datetime(data_end_date)
+        self._flights = SingleFlight("population stats", timeout=None)
 
     @property
     def df(self):
         return self.__df
 
+    def __sizeof__(self) -> int:
+        # the episodes and the tables cached on this instance so far, so that caches holding it can
+        # keep to their byte budget
+        return object.__sizeof__(self) + sum(
+            estimate_size(value) for value in vars(self).values()
+        )
+
+    def stratify(self, column: str = "LA") -> dict:
+        """
+        Splits the episodes by the values of a column (by default the LA) and returns a
+        PopulationStats for each value, covering the same data period.
+        """
+        return {
+            str(value): PopulationStats(
+                df=group,
+                data_start_date=self.data_start_date,
+                data_end_date=self.data_end_date,
+                cache_key=(
+                    None
+                    if self.__cache_key is None
+                    else stable_hash(self.__cache_key, column, value)
+                ),
+            )
+            for value, group in self.df.groupby(column, sort=True)
+        }
+
     @cached_property
+    @_computed_once
     def stock(self):
         """
         Calculates the daily transitions for each age bin and placement type by
@@ -140,6 +200,7 @@ class PopulationStats:
         return pops
 
     @lru_cache(maxsize=5)
+    @_computed_once
     def stock_at(self, date) -> pd.Series:
         """
         Returns the stock on a given date
@@ -190,6 +251,7 @@ class PopulationStats:
         return transitions
 
     @cached_property
+    @_computed_once
     def unique_transitions(self):
         """
         Finds all possible transitions between placement types in the data for each age bin
@@ -261,6 +323,7 @@ class PopulationStats:
         return unique_transitions, unique_numbers
 
     @lru_cache(maxsize=5)
+    @_computed_once
     def raw_transition_rates(
         self, reference_start_date: date, reference_end_date: date
     ):
@@ -273,19 +336,21 @@ class PopulationStats:
             reference_end_date = reference_end_date,
         )
 
-    @lru_cache(maxsize=5)
-    def placement_proportions(
-        self, reference_start_date: date, reference_end_date: date, **kwargs
-    ):
+    @cached_property
+    @_computed_once
+    def detailed_stock(self) -> pd.DataFrame:
         """
-        Calculates the proportion of placements in each placement category that were from a more granular set of placements for the historic data over a defined reference period
-        - placement categories from PlacementCategories enum
+        Calculates the daily population in each detailed placement type, from the first episode to the end of the data.
+        Shared between instances with the same cache key.
         """
-        data_start_date = self.data_start_date
-        data_end_date = self.data_end_date
+        if self.__cache_key is None:
+            return self._detailed_stock()
+        return _detailed_stock_cache.get_or_set(
+            stable_hash(self.__cache_key, self.data_end_date), self._detailed_stock
+        )
 
-        prop_start_date = pd.to_datetime(reference_start_date)
-        prop_end_date = pd.to_datetime(reference_end_date)
+    def _detailed_stock(self) -> pd.DataFrame:
+        data_end_date = self.data_end_date
 
         df = self.df.copy()
 
@@ -322,6 +387,24 @@ class PopulationStats:
             .ffill()
             .fillna(0)
         )
+        return pops
+
+    @lru_cache(maxsize=5)
+    @_computed_once
+    def placement_proportions(
+        self, reference_start_date: date, reference_end_date: date, **kwargs
+    ):
+        """
+        Calculates the proportion of placements in each placement category that were from a more granular set of placements for the historic data over a defined reference period
+        - placement categories from PlacementCategories enum
+        """
+        data_start_date = self.data_start_date
+        data_end_date = self.data_end_date
+
+        prop_start_date = pd.to_datetime(reference_start_date)
+        prop_end_date = pd.to_datetime(reference_end_date)
+
+        pops = self.detailed_stock
 
         # Calculate the proportions in each detailed bin
         proportion_population = pops.truncate(
@@ -350,6 +433,7 @@ class PopulationStats:
         return proportion_series, historic_population
 
     @lru_cache(maxsize=5)
+    @_computed_once
     def daily_entrants(
         self, reference_start_date: date, reference_end_date: date
     ) -> pd.Series:
@@ -5,7 +5,44 @@ import pandas as pd
 from dateutil.relativedelta import relativedelta
 
 from ssda903 import PopulationStats
-from ssda903.multinomial import MultinomialPredictor, Prediction
+from ssda903.cache import CacheInfo, ComputationCache, historic_data_key, stable_hash
+from ssda903.multinomial import (
+    Equilibrium,
+    MultinomialPredictor,
+    Prediction,
+    StratifiedMultinomialPredictor,
+    StratifiedPrediction,
+)
+
+# Increase when a change to the model changes its outputs, so that stored forecasts are recomputed
+MODEL_VERSION = "1"
+
+# Predictions are shared between requests and views, keyed by everything that affects them
+_prediction_cache = ComputationCache(
+    "prediction", max_entries=64, max_bytes=128 * 2**20
+)
+
+
+def _build_predictor(
+    stats: PopulationStats,
+    reference_start_date: date,
+    reference_end_date: date,
+    prediction_start_date: date,
+    rate_adjustment: Optional[pd.DataFrame] = None,
+    number_adjustment: Optional[pd.DataFrame] = None,
+) -> MultinomialPredictor:
+    return MultinomialPredictor(
+        population=stats.stock_at(prediction_start_date),
+        transition_rates=stats.raw_transition_rates(
+            reference_start_date, reference_end_date
+        ),
+        transition_numbers=stats.daily_entrants(
+            reference_start_date, reference_end_date
+        ),
+        start_date=prediction_start_date,
+        rate_adjustment=rate_adjustment,
+        number_adjustment=number_adjustment,
+    )
 
 
 def predict(
@@ -27,15 +64,11 @@ def predict(
         f"and predicting from {prediction_start_date} to {prediction_end_date}"
     )
 
-    predictor = MultinomialPredictor(
-        population=stats.stock_at(prediction_start_date),
-        transition_rates=stats.raw_transition_rates(
-            reference_start_date, reference_end_date
-        ),
-        transition_numbers=stats.daily_entrants(
-            reference_start_date, reference_end_date
-        ),
-        start_date=prediction_start_date,
+    predictor = _build_predictor(
+        stats,
+        reference_start_date,
+        reference_end_date,
+        prediction_start_date,
         rate_adjustment=rate_adjustment,
         number_adjustment=number_adjustment,
     )
@@ -43,3 +76,135 @@ def predict(
     prediction = predictor.predict(prediction_days, progress=False)
 
     return prediction
+
+
+def _prediction_key(
+    data_fingerprint: str, historic_filters: Optional[dict], parameters: dict
+) -> str:
+    return stable_hash(
+        MODEL_VERSION, historic_data_key(data_fingerprint, historic_filters), parameters
+    )
+
+
+def cached_predict(
+    stats: PopulationStats,
+    data_fingerprint: Optional[str],
+    historic_filters: Optional[dict],
+    reference_start_date: date,
+    reference_end_date: date,
+    prediction_start_date: date,
+    prediction_end_date: Optional[date] = None,
+    rate_adjustment: Optional[pd.DataFrame] = None,
+    number_adjustment: Optional[pd.DataFrame] = None,
+) -> Prediction:
+    """
+    Same as predict, but reuses an earlier prediction made with the same inputs.
+
+    stats must have been built from the data identified by data_fingerprint with historic_filters applied.
+    The returned prediction may be shared with other callers, so it must not be modified. If the data
+    fingerprint is unknown the prediction is not cached.
+    """
+    parameters = dict(
+        reference_start_date=reference_start_date,
+        reference_end_date=reference_end_date,
+        prediction_start_date=prediction_start_date,
+        prediction_end_date=prediction_end_date,
+        rate_adjustment=rate_adjustment,
+        number_adjustment=number_adjustment,
+    )
+    if data_fingerprint is None:
+        return predict(stats, **parameters)
+
+    key = _prediction_key(data_fingerprint, historic_filters, parameters)
+    return _prediction_cache.get_or_set(key, lambda: predict(stats, **parameters))
+
+
+def cache_prediction(
+    prediction: Prediction,
+    data_fingerprint: str,
+    historic_filters: Optional[dict],
+    reference_start_date: date,
+    reference_end_date: date,
+    prediction_start_date: date,
+    prediction_end_date: Optional[date] = None,
+    rate_adjustment: Optional[pd.DataFrame] = None,
+    number_adjustment: Optional[pd.DataFrame] = None,
+):
+    """
+    Adds a prediction computed earlier, e.g. one stored with a saved scenario, to the cache used by cached_predict.
+    """
+    parameters = dict(
+        reference_start_date=reference_start_date,
+        reference_end_date=reference_end_date,
+        prediction_start_date=prediction_start_date,
+        prediction_end_date=prediction_end_date,
+        rate_adjustment=rate_adjustment,
+        number_adjustment=number_adjustment,
+    )
+    key = _prediction_key(data_fingerprint, historic_filters, parameters)
+    _prediction_cache.set(key, prediction)
+
+
+def prediction_cache_info() -> CacheInfo:
+    """
+    Returns the hit, miss and size statistics of the prediction cache.
+    """
+    return _prediction_cache.info()
+
+
+def predict_equilibrium(
+    stats: PopulationStats,
+    reference_start_date: date,
+    reference_end_date: date,
+    prediction_start_date: date,
+    rate_adjustment: Optional[pd.DataFrame] = None,
+    number_adjustment: Optional[pd.DataFrame] = None,
+) -> Equilibrium:
+    """
+    Analyses source between start and end, and returns the equilibrium of the model starting at
+    prediction_start_date: the population of each state it settles at in the long run, and the daily
+    number of children reaching each absorbing state. Raises ValueError if the model never settles.
+    """
+    predictor = _build_predictor(
+        stats,
+        reference_start_date,
+        reference_end_date,
+        prediction_start_date,
+        rate_adjustment=rate_adjustment,
+        number_adjustment=number_adjustment,
+    )
+    return predictor.equilibrium()
+
+
+def predict_stratified(
+    stats: PopulationStats,
+    reference_start_date: date,
+    reference_end_date: date,
+    prediction_start_date: date,
+    prediction_end_date: Optional[date] = None,
+    rate_adjustment: Optional[pd.DataFrame] = None,
+    number_adjustment: Optional[pd.DataFrame] = None,
+    column: str = "LA",
+) -> StratifiedPrediction:
+    """
+    Same as predict, but splits the population by column (by default the LA) and predicts every
+    stratum at once, returning the prediction for each stratum and the total across them.
+    """
+    if prediction_end_date is None:
+        prediction_end_date = prediction_start_date + relativedelta(months=24)
+
+    predictor = StratifiedMultinomialPredictor(
+        {
+            key: _build_predictor(
+                stratum,
+                reference_start_date,
+                reference_end_date,
+                prediction_start_date,
+                rate_adjustment=rate_adjustment,
+                number_adjustment=number_adjustment,
+            )
+            for key, stratum in stats.stratify(column).items()
+        }
+    )
+    prediction_days = (prediction_end_date - prediction_start_date).days
+    return predictor.predict(prediction_days, progress=False)
@@ -1,9 +1,18 @@
+import threading
+from typing import Optional
+
+from django.conf import settings
 from django.core.files.storage import default_storage
 
+from ssda903.cache import SingleFlight
 from ssda903.datacontainer import DemandModellingDataContainer
 from ssda903.datastore import LocalDataStore, StorageDataStore
+from ssda903.shared import SharedFrames
 
 _container_cache: dict = {}
+_container_lock = threading.Lock()
+# requests arriving together after an upload read the new data once
+_container_flights = SingleFlight("data container")
 
 
 def read_data(source) -> DemandModellingDataContainer:
@@ -12,11 +21,44 @@ def read_data(source) -> DemandModellingDataContainer:
     """
     datastore = StorageDataStore(default_storage, source)
     cache_key = datastore.source_fingerprint
-    if cache_key not in _container_cache:
+    container = _container_cache.get(cache_key)
+    if container is None:
+        container = _container_flights.do(
+            cache_key, lambda: _create_container(datastore, cache_key)
+        )
+    return container
+
+
+def _create_container(datastore: StorageDataStore, cache_key: str):
+    with _container_lock:
+        if cache_key in _container_cache:
+            return _container_cache[cache_key]
+
+    container = DemandModellingDataContainer(
+        datastore,
+        fingerprint=cache_key,
+        shared=SharedFrames(settings.SHARED_DATA_DIR)
+        if settings.SHARED_DATA_DIR
+        else None,
+    )
+    with _container_lock:
         _container_cache.clear()
-        _container_cache[cache_key] = DemandModellingDataContainer(datastore)
+        _container_cache[cache_key] = container
+    return container
+
 
-    return _container_cache[cache_key]
+def cached_data(source) -> Optional[DemandModellingDataContainer]:
+    """
+    Returns the container for the data at source if it has already been read by this process, or None
+    """
+    return _container_cache.get(data_fingerprint(source))
+
+
+def data_fingerprint(source) -> str:
+    """
+    Returns the fingerprint of the data at source, without reading it
+    """
+    return StorageDataStore(default_storage, source).source_fingerprint
 
 
 def read_local_data(files) -> DemandModellingDataContainer:
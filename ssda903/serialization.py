@@ -0,0 +1,163 @@
+import dataclasses
+import io
+import json
+from datetime import date
+from typing import Any, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+
+PandasObject = Union[pd.Series, pd.DataFrame]
+
+
+def _encode_index(index: pd.Index) -> tuple[dict, list[np.ndarray]]:
+    """
+    Splits an index into one array per level, along with what is needed to rebuild it.
+    """
+    kinds, arrays = [], []
+    for level in range(index.nlevels):
+        values = index.get_level_values(level)
+        if isinstance(values, pd.DatetimeIndex):
+            kinds.append("datetime")
+            arrays.append(values.to_numpy())
+        elif len(values) and values.inferred_type == "date":
+            kinds.append("date")
+            arrays.append(pd.to_datetime(values).to_numpy().astype("datetime64[D]"))
+        elif pd.api.types.is_numeric_dtype(values.dtype):
+            kinds.append("numeric")
+            arrays.append(values.to_numpy())
+        else:
+            kinds.append("str")
+            arrays.append(values.astype(str).to_numpy().astype(str))
+    return {"kinds": kinds, "names": list(index.names)}, arrays
+
+
+def _decode_index(meta: dict, arrays: list[np.ndarray]) -> pd.Index:
+    levels = []
+    for kind, values in zip(meta["kinds"], arrays):
+        if kind == "datetime":
+            levels.append(pd.DatetimeIndex(values))
+        elif kind == "date":
+            levels.append(pd.Index(values.astype(date), dtype="object"))
+        else:
+            levels.append(pd.Index(values))
+    if len(levels) == 1:
+        return levels[0].rename(meta["names"][0])
+    return pd.MultiIndex.from_arrays(levels, names=meta["names"])
+
+
+def _encode_values(values: np.ndarray) -> tuple[np.ndarray, Optional[str]]:
+    """
+    Object arrays, such as adjusted rates, cannot be stored without pickling so are stored as numbers.
+    Returns the array to store and the dtype to restore it to, if it differs.
+    """
+    if values.dtype == object:
+        return values.astype(float), "object"
+    return values, None
+
+
+def _decode_values(values: np.ndarray, dtype: Optional[str]) -> np.ndarray:
+    return values if dtype is None else values.astype(dtype)
+
+
+def _encode_pandas(name: str, value: PandasObject, arrays: dict) -> dict:
+    index_meta, index_arrays = _encode_index(value.index)
+    for level, values in enumerate(index_arrays):
+        arrays[f"{name}/index/{level}"] = values
+    meta = {"index": index_meta, "name": value.name if value.ndim == 1 else None}
+    if isinstance(value, pd.DataFrame):
+        meta["type"] = "frame"
+        meta["dtypes"] = []
+        arrays[f"{name}/columns"] = value.columns.astype(str).to_numpy().astype(str)
+        for position in range(value.shape[1]):
+            values, dtype = _encode_values(value.iloc[:, position].to_numpy())
+            arrays[f"{name}/values/{position}"] = values
+            meta["dtypes"].append(dtype)
+    else:
+        meta["type"] = "series"
+        arrays[f"{name}/values"], meta["dtype"] = _encode_values(value.to_numpy())
+    return meta
+
+
+def _decode_pandas(name: str, meta: dict, arrays) -> PandasObject:
+    index = _decode_index(
+        meta["index"],
+        [
+            arrays[f"{name}/index/{level}"]
+            for level in range(len(meta["index"]["kinds"]))
+        ],
+    )
+    if meta["type"] == "frame":
+        columns = arrays[f"{name}/columns"]
+        return pd.DataFrame(
+            {
+                column: _decode_values(
+                    arrays[f"{name}/values/{position}"], meta["dtypes"][position]
+                )
+                for position, column in enumerate(columns)
+            },
+            index=index,
+            columns=pd.Index(columns, dtype=str),
+        )
+    return pd.Series(
+        _decode_values(arrays[f"{name}/values"], meta["dtype"]),
+        index=index,
+        name=meta["name"],
+    )
+
+
+def dumps(objects: dict[str, Any]) -> bytes:
+    """
+    Stores pandas objects, or dataclasses of pandas objects, in a compressed binary format
+    with one array per column.
+
+    :param objects: The objects to store, by name
+    :return: The encoded objects
+    """
+    arrays, meta = {}, {}
+    for name, value in objects.items():
+        if dataclasses.is_dataclass(value):
+            meta[name] = {
+                "type": "dataclass",
+                "fields": {
+                    field.name: _encode_pandas(
+                        f"{name}.{field.name}", getattr(value, field.name), arrays
+                    )
+                    for field in dataclasses.fields(value)
+                },
+            }
+        else:
+            meta[name] = _encode_pandas(name, value, arrays)
+
+    arrays["__meta__"] = np.array(
+        json.dumps({"version": FORMAT_VERSION, "objects": meta})
+    )
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def loads(data: bytes) -> dict[str, Any]:
+    """
+    Reads objects stored with dumps. Dataclasses are returned as dictionaries of their fields.
+
+    :param data: The encoded objects
+    :return: The objects by name
+    """
+    with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+        meta = json.loads(str(arrays["__meta__"]))
+        if meta["version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported format version {meta['version']}")
+
+        objects = {}
+        for name, object_meta in meta["objects"].items():
+            if object_meta["type"] == "dataclass":
+                objects[name] = {
+                    field: _decode_pandas(f"{name}.{field}", field_meta, arrays)
+                    for field, field_meta in object_meta["fields"].items()
+                }
+            else:
+                objects[name] = _decode_pandas(name, object_meta, arrays)
+    return objects
@@ -0,0 +1,191 @@
+import json
+import logging
+import os
+import shutil
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+
+@dataclass
+class SharedData:
+    frames: dict[str, pd.DataFrame]
+    attributes: dict[str, Any]
+
+
+def _write_array(path: Path, values: Union[pd.Series, pd.Index]) -> dict:
+    """
+    Writes the values of a column or index to path. Numeric, boolean and datetime values are stored as
+    they are, so that they can be mapped into memory. Other values are stored as codes into a list of
+    categories, which must be JSON serializable.
+    """
+    if isinstance(values.dtype, np.dtype) and values.dtype.kind in "biufcmM":
+        np.save(path, values.to_numpy(), allow_pickle=False)
+        return {"dtype": None}
+
+    dtype = str(values.dtype)
+    if dtype not in ("object", "str"):
+        raise TypeError(f"Cannot share values of dtype {dtype}")
+    codes, categories = pd.factorize(values)
+    np.save(path, codes.astype(np.int32), allow_pickle=False)
+    return {"dtype": dtype, "categories": categories.tolist()}
+
+
+def _read_array(path: Path, meta: dict):
+    # mapped copy-on-write: pages are shared until this process changes them, and the file is never
+    # written
+    values = np.load(path, mmap_mode="c", allow_pickle=False).view(np.ndarray)
+    if meta["dtype"] is None:
+        return values
+
+    categories = np.empty(len(meta["categories"]) + 1, dtype=object)
+    categories[:-1] = meta["categories"]
+    # missing values have code -1, which takes the last category
+    categories[-1] = np.nan
+    values = categories[values]
+    return (
+        values if meta["dtype"] == "object" else pd.array(values, dtype=meta["dtype"])
+    )
+
+
+def _write_frame(path: Path, df: pd.DataFrame) -> dict:
+    path.mkdir()
+    meta = {"columns": [], "index": None, "index_name": df.index.name}
+    for position, column in enumerate(df.columns):
+        column_meta = _write_array(path / f"{position}.npy", df[column])
+        meta["columns"].append({"name": column, **column_meta})
+    if isinstance(df.index, pd.RangeIndex):
+        meta["range"] = [df.index.start, df.index.stop, df.index.step]
+    else:
+        meta["index"] = _write_array(path / "index.npy", df.index)
+    return meta
+
+
+def _read_frame(path: Path, meta: dict) -> pd.DataFrame:
+    if meta["index"] is None:
+        index = pd.RangeIndex(*meta["range"], name=meta["index_name"])
+    else:
+        index = pd.Index(
+            _read_array(path / "index.npy", meta["index"]), name=meta["index_name"]
+        )
+    return pd.DataFrame(
+        {
+            column["name"]: _read_array(path / f"{position}.npy", column)
+            for position, column in enumerate(meta["columns"])
+        },
+        index=index,
+        copy=False,
+    )
+
+
+class SharedFrames:
+    """
+    Publishes DataFrames to files under directory which every process then maps into memory, so that
+    processes working on the same data hold one copy of it between them.
+
+    Frames are published in generations, e.g. one for each version of the source data. A generation is
+    written once, by the first process to publish it, and never changed. Publishing a generation
+    removes the earlier ones, which processes that have already mapped them can carry on using.
+
+    The directory is created readable only by the current user, and is not used if other users can
+    write to it, as they could then plant or remove generations.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def _is_private(self) -> bool:
+        try:
+            self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+            stat = self.directory.stat()
+        except OSError:
+            log.warning("Could not create %s", self.directory, exc_info=True)
+            return False
+        owner = getattr(os, "getuid", lambda: stat.st_uid)()
+        if stat.st_uid != owner or stat.st_mode & 0o022:
+            log.warning(
+                "Not sharing data through %s as other users can write to it",
+                self.directory,
+            )
+            return False
+        return True
+
+    def load(self, generation: str) -> Optional[SharedData]:
+        """
+        Returns the frames and attributes of a generation, or None if it has not been published.
+        """
+        if not self._is_private():
+            return None
+        path = self.directory / generation
+        try:
+            with open(path / "meta.json") as file:
+                meta = json.load(file)
+            if meta["version"] != FORMAT_VERSION:
+                return None
+            return SharedData(
+                frames={
+                    name: _read_frame(path / name, frame_meta)
+                    for name, frame_meta in meta["frames"].items()
+                },
+                attributes=meta["attributes"],
+            )
+        except FileNotFoundError:
+            return None
+
+    def publish(
+        self,
+        generation: str,
+        frames: dict[str, pd.DataFrame],
+        attributes: Optional[dict[str, Any]] = None,
+    ) -> Optional[SharedData]:
+        """
+        Publishes frames and JSON serializable attributes as a generation, unless another process has
+        already done so, and returns them as published. Returns None if they could not be published.
+        """
+        if not self._is_private():
+            return None
+        # written to a temporary directory and renamed, so that other processes never see part of it
+        staging = self.directory / f".{generation}-{uuid.uuid4().hex}"
+        try:
+            staging.mkdir(mode=0o700)
+            meta = {
+                "version": FORMAT_VERSION,
+                "frames": {
+                    name: _write_frame(staging / name, df)
+                    for name, df in frames.items()
+                },
+                "attributes": attributes or {},
+            }
+            with open(staging / "meta.json", "w") as file:
+                json.dump(meta, file)
+            os.rename(staging, self.directory / generation)
+        except (OSError, TypeError):
+            shared = self.load(generation)
+            if shared is None:
+                log.warning(
+                    "Could not publish generation %s", generation, exc_info=True
+                )
+            return shared
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        self._remove_earlier(generation)
+        return self.load(generation)
+
+    def _remove_earlier(self, generation: str):
+        # only generations are removed, anything else in the directory is left alone
+        for path in self.directory.iterdir():
+            if (
+                path.name != generation
+                and not path.name.startswith(".")
+                and (path / "meta.json").is_file()
+            ):
+                shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,205 @@
+import threading
+import unittest
+from datetime import date
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pandas as pd
+
+from ssda903 import predictor
+from ssda903.cache import ComputationCache, SingleFlight, estimate_size, stable_hash
+from ssda903.population_stats import PopulationStats
+
+
+class TestStableHash(unittest.TestCase):
+    def test_dict_order_does_not_matter(self):
+        self.assertEqual(
+            stable_hash({"a": 1, "b": [1, 2]}), stable_hash({"b": [1, 2], "a": 1})
+        )
+
+    def test_values_matter(self):
+        self.assertNotEqual(stable_hash([1, 2]), stable_hash([2, 1]))
+        self.assertNotEqual(stable_hash(date(2020, 1, 1)), stable_hash("2020-01-01"))
+        self.assertNotEqual(stable_hash(None), stable_hash("None"))
+
+    def test_dataframes_hashed_by_content(self):
+        df = pd.DataFrame({"a": [1.0, np.nan]}, index=["x", "y"])
+        self.assertEqual(stable_hash(df), stable_hash(df.copy()))
+        self.assertNotEqual(stable_hash(df), stable_hash(df.rename(columns={"a": "b"})))
+        self.assertNotEqual(stable_hash(df), stable_hash(df.fillna(0)))
+
+
+class TestComputationCache(unittest.TestCase):
+    def test_get_or_set(self):
+        cache = ComputationCache("test")
+        compute = Mock(return_value=1)
+        self.assertEqual(cache.get_or_set("a", compute), 1)
+        self.assertEqual(cache.get_or_set("a", compute), 1)
+        compute.assert_called_once()
+
+        info = cache.info()
+        self.assertEqual((info.hits, info.misses, info.entries), (1, 1, 1))
+        self.assertEqual(info.hit_rate, 0.5)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = ComputationCache("test", max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(cache.info().evictions, 1)
+
+    def test_byte_budget(self):
+        cache = ComputationCache("test", max_bytes=2000)
+        cache.set("a", np.zeros(100))
+        cache.set("b", np.zeros(100))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.info().bytes, 1600)
+
+        cache.set("c", np.zeros(100))
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn("a", cache)
+
+        # entries larger than the budget are not stored
+        cache.set("d", np.zeros(1000))
+        self.assertNotIn("d", cache)
+        self.assertEqual(len(cache), 2)
+
+
+class TestEstimateSize(unittest.TestCase):
+    def test_containers(self):
+        self.assertEqual(estimate_size((np.zeros(100), [np.zeros(10)])), 880)
+
+    def test_population_stats(self):
+        df = pd.DataFrame({"CHILD": np.arange(1000)})
+        stats = PopulationStats(df, date(2020, 1, 1), date(2020, 12, 31))
+        self.assertGreater(estimate_size(stats), estimate_size(df))
+
+
+class TestSingleFlight(unittest.TestCase):
+    def setUp(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def slow(self, value=1):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def run_in_thread(self, target):
+        results = []
+
+        def run():
+            try:
+                results.append(target())
+            except Exception as error:
+                results.append(error)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread, results
+
+    def test_concurrent_calls_share_one_computation(self):
+        flights = SingleFlight("test")
+        leader, leader_results = self.run_in_thread(lambda: flights.do("a", self.slow))
+        self.started.wait(5)
+        follower, follower_results = self.run_in_thread(
+            lambda: flights.do("a", self.slow)
+        )
+        self.release.set()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual((leader_results, follower_results), ([1], [1]))
+        self.assertEqual(self.calls, 1)
+
+    def test_errors_are_shared(self):
+        flights = SingleFlight("test")
+        error = ValueError("invalid")
+        leader, leader_results = self.run_in_thread(
+            lambda: flights.do("a", lambda: self.slow(error))
+        )
+        self.started.wait(5)
+        follower, follower_results = self.run_in_thread(
+            lambda: flights.do("a", self.slow)
+        )
+        self.release.set()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual((leader_results, follower_results), ([error], [error]))
+
+        # failed computations are not remembered
+        self.assertEqual(flights.do("a", lambda: 2), 2)
+
+    def test_timeout(self):
+        flights = SingleFlight("test", timeout=0.01)
+        leader, _ = self.run_in_thread(lambda: flights.do("a", self.slow))
+        self.started.wait(5)
+        with self.assertRaises(TimeoutError):
+            flights.do("a", self.slow)
+        self.release.set()
+        leader.join(5)
+
+    def test_nested_call_for_the_same_key(self):
+        flights = SingleFlight("test", timeout=1)
+        self.assertEqual(flights.do("a", lambda: flights.do("a", lambda: 1)), 1)
+
+    def test_cache_computes_concurrent_misses_once(self):
+        cache = ComputationCache("test")
+        leader, _ = self.run_in_thread(lambda: cache.get_or_set("a", self.slow))
+        self.started.wait(5)
+        follower, results = self.run_in_thread(lambda: cache.get_or_set("a", self.slow))
+        self.release.set()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual(results, [1])
+        self.assertEqual(self.calls, 1)
+        self.assertIn("a", cache)
+
+
+class TestCachedPredict(unittest.TestCase):
+    def setUp(self):
+        self.parameters = dict(
+            reference_start_date=date(2020, 1, 1),
+            reference_end_date=date(2021, 1, 1),
+            prediction_start_date=date(2021, 1, 1),
+        )
+        predictor._prediction_cache.clear()
+
+    def test_same_inputs_reuse_prediction(self):
+        with patch.object(predictor, "predict", side_effect=lambda *a, **k: object()):
+            first = predictor.cached_predict(
+                None, "abc", {"la": ["B", "A"], "uasc": "all"}, **self.parameters
+            )
+            second = predictor.cached_predict(
+                None, "abc", {"uasc": "all", "la": ["A", "B"]}, **self.parameters
+            )
+            self.assertIs(first, second)
+
+            other_data = predictor.cached_predict(
+                None, "def", {"la": ["A", "B"], "uasc": "all"}, **self.parameters
+            )
+            self.assertIsNot(first, other_data)
+
+            adjusted = predictor.cached_predict(
+                None,
+                "abc",
+                {"la": ["A", "B"], "uasc": "all"},
+                **self.parameters,
+                number_adjustment=pd.Series({"1 to 5 - Fostering": 0.1}),
+            )
+            self.assertIsNot(first, adjusted)
+
+    def test_unknown_fingerprint_is_not_cached(self):
+        with patch.object(predictor, "predict", side_effect=lambda *a, **k: object()):
+            first = predictor.cached_predict(None, None, {}, **self.parameters)
+            second = predictor.cached_predict(None, None, {}, **self.parameters)
+            self.assertIsNot(first, second)
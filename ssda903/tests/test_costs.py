@@ -1,7 +1,18 @@
 import unittest
 
+import pandas as pd
+import pandas.testing as pdt
+
 from ssda903.config._costs import Costs
 from ssda903.config._placement_categories import PlacementCategories
+from ssda903.costs import (
+    convert_equilibrium_to_cost,
+    convert_historic_population_to_cost,
+    convert_population_to_cost,
+    cost_sensitivity,
+    inflation_periods,
+)
+from ssda903.multinomial import Equilibrium, Prediction
 
 
 class TestCosts(unittest.TestCase):
@@ -26,3 +37,197 @@ class TestCosts(unittest.TestCase):
             Costs.FOSTER_IFA,
         ]
         self.assertEqual(foster_costs, expected_foster_costs)
+
+
+class PopulationCostTestCase(unittest.TestCase):
+    def setUp(self):
+        index = pd.date_range("2024-01-01", periods=800, freq="D")
+        population = pd.DataFrame(
+            {
+                "1 to 5 - Fostering": 10.0,
+                "1 to 5 - Not in care": 100.0,
+                "5 to 10 - Fostering": 4.0,
+                "5 to 10 - Residential": 2.0,
+            },
+            index=index,
+        )
+        self.prediction = Prediction(
+            population=population,
+            variance=population * 0,
+            transition_rates=pd.Series(dtype="float64"),
+            entry_rates=pd.Series(dtype="float64"),
+        )
+        self.historic_proportions = pd.Series(
+            {
+                "Fostering (Friend/Relative)": 0.5,
+                "Fostering (In-house)": 0.5,
+                "Fostering (IFA)": 0.0,
+                "Residential (In-house)": 1.0,
+                "Residential (External)": 0.0,
+            }
+        )
+
+
+class TestConvertPopulationToCost(PopulationCostTestCase):
+    def test_costs(self):
+        forecast = convert_population_to_cost(
+            self.prediction, self.historic_proportions
+        )
+        self.assertEqual(
+            list(forecast.costs.columns),
+            [
+                "Fostering (Friend/Relative)",
+                "Fostering (In-house)",
+                "Fostering (IFA)",
+                "Residential (In-house)",
+                "Residential (External)",
+            ],
+        )
+        day = forecast.costs.iloc[0]
+        self.assertAlmostEqual(day["Fostering (Friend/Relative)"], 14 * 0.5 * 100 / 7)
+        self.assertAlmostEqual(day["Fostering (In-house)"], 14 * 0.5 * 150 / 7)
+        self.assertEqual(day["Fostering (IFA)"], 0)
+        self.assertAlmostEqual(day["Residential (In-house)"], 2 * 1000 / 7)
+
+        self.assertEqual(
+            forecast.proportional_population.iloc[0]["Fostering (In-house)"], 7
+        )
+        self.assertEqual(forecast.cost_summary["Fostering (IFA)"], 250)
+        self.assertEqual(forecast.proportions["Fostering (IFA)"], 0)
+
+    def test_adjustments(self):
+        forecast = convert_population_to_cost(
+            self.prediction,
+            self.historic_proportions,
+            cost_adjustment=pd.Series({"Fostering (In-house)": 700.0}),
+            proportion_adjustment=pd.Series({"Fostering (In-house)": 0.25}),
+        )
+        day = forecast.costs.iloc[0]
+        self.assertAlmostEqual(day["Fostering (In-house)"], 14 * 0.25 * 100)
+        self.assertAlmostEqual(day["Fostering (Friend/Relative)"], 14 * 0.75 * 100 / 7)
+        self.assertEqual(forecast.cost_summary["Fostering (In-house)"], 700)
+
+    def test_inflation(self):
+        forecast = convert_population_to_cost(
+            self.prediction,
+            self.historic_proportions,
+            inflation=True,
+            inflation_rate=0.1,
+        )
+        costs = forecast.costs["Residential (In-house)"]
+        daily_cost = 2 * 1000 / 7
+        self.assertAlmostEqual(costs["2024-12-31"], daily_cost)
+        # costs go up on each anniversary of the start of the forecast
+        self.assertAlmostEqual(costs["2025-01-01"], 2 * 157.143, places=3)
+        self.assertAlmostEqual(costs["2026-01-01"], 2 * 172.857, places=3)
+        self.assertEqual(costs["2025-01-01"], costs["2025-12-31"])
+
+
+class TestConvertEquilibriumToCost(PopulationCostTestCase):
+    def setUp(self):
+        super().setUp()
+        self.equilibrium = Equilibrium(
+            population=pd.Series(
+                {
+                    "1 to 5 - Fostering": 10.4,
+                    "5 to 10 - Fostering": 3.6,
+                    "5 to 10 - Residential": 2.2,
+                }
+            ),
+            absorption=pd.Series({"1 to 5 - Not in care": 0.5}),
+            spectral_radius=0.9,
+        )
+
+    def test_costs(self):
+        costs = convert_equilibrium_to_cost(self.equilibrium, self.historic_proportions)
+        # the population is not rounded
+        expected = pd.Series(
+            {
+                "Fostering (Friend/Relative)": 14 * 0.5 * 100,
+                "Fostering (In-house)": 14 * 0.5 * 150,
+                "Fostering (IFA)": 0.0,
+                "Residential (In-house)": 2.2 * 1000,
+                "Residential (External)": 0.0,
+            }
+        )
+        pdt.assert_series_equal(costs, expected)
+
+    def test_adjustments(self):
+        costs = convert_equilibrium_to_cost(
+            self.equilibrium,
+            self.historic_proportions,
+            cost_adjustment=pd.Series({"Fostering (In-house)": 700.0}),
+            proportion_adjustment=pd.Series({"Fostering (In-house)": 0.25}),
+        )
+        self.assertAlmostEqual(costs["Fostering (In-house)"], 14 * 0.25 * 700)
+        self.assertAlmostEqual(costs["Fostering (Friend/Relative)"], 14 * 0.75 * 100)
+
+
+class TestInflationPeriods(unittest.TestCase):
+    def test_periods_step_on_anniversaries(self):
+        dates = pd.date_range("2024-02-29", periods=800, freq="D")
+        periods = pd.Series(inflation_periods(dates), index=dates)
+        self.assertEqual(periods["2025-02-27"], 0)
+        # anniversaries count from the previous anniversary
+        self.assertEqual(periods["2025-02-28"], 1)
+        self.assertEqual(periods["2026-02-27"], 1)
+        self.assertEqual(periods["2026-02-28"], 2)
+
+    def test_no_inflation_without_anniversary(self):
+        dates = pd.date_range("2024-01-01", periods=100, freq="7D")
+        self.assertEqual(inflation_periods(dates).max(), 0)
+
+
+class TestCostSensitivity(PopulationCostTestCase):
+    def test_grid_matches_individual_costs(self):
+        cost_adjustments = [None, pd.Series({"Fostering (IFA)": 300.0})]
+        proportion_adjustments = [None, pd.Series({"Fostering (IFA)": 0.5})]
+        inflation_rates = [None, 0.1]
+
+        sensitivity = cost_sensitivity(
+            self.prediction,
+            self.historic_proportions,
+            cost_adjustments,
+            proportion_adjustments,
+            inflation_rates,
+        )
+        self.assertEqual(len(sensitivity.total), 8)
+
+        for i, cost_adjustment in enumerate(cost_adjustments):
+            for j, proportion_adjustment in enumerate(proportion_adjustments):
+                for k, inflation_rate in enumerate(inflation_rates):
+                    forecast = convert_population_to_cost(
+                        self.prediction,
+                        self.historic_proportions,
+                        cost_adjustment,
+                        proportion_adjustment,
+                        inflation=inflation_rate is not None,
+                        inflation_rate=inflation_rate,
+                    )
+                    position = (i * 2 + j) * 2 + k
+                    self.assertAlmostEqual(
+                        sensitivity.total.iloc[position],
+                        forecast.costs.sum().sum(),
+                    )
+                    pdt.assert_series_equal(
+                        sensitivity.quarterly.iloc[position].round(2),
+                        forecast.summary_table.sum(axis=1).round(2),
+                        check_names=False,
+                        atol=0.05,
+                    )
+
+
+class TestConvertHistoricPopulationToCost(unittest.TestCase):
+    def test_costs(self):
+        population = pd.DataFrame(
+            {"Fostering (IFA)": [7.0, 14.0], "Secure home": [1.0, 2.0]},
+            index=pd.date_range("2024-01-01", periods=2),
+        )
+        costs = convert_historic_population_to_cost(
+            population, pd.Series({"Secure home": 70.0, "Other": 1.0})
+        )
+        expected = pd.DataFrame(
+            {"Fostering (IFA)": [250.0, 500.0], "Secure home": [10.0, 20.0]},
+            index=population.index,
+        )
+        pdt.assert_frame_equal(costs, expected)
@@ -0,0 +1,341 @@
+import unittest
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+
+from ssda903.multinomial import (
+    MultinomialPredictor,
+    StratifiedMultinomialPredictor,
+    build_transition_rates_matrix,
+    fill_missing_states,
+    populate_same_state_transition,
+    sparse,
+    state_space,
+)
+from ssda903.population_stats import PopulationStats
+from ssda903.predictor import predict, predict_equilibrium, predict_stratified
+
+
+class TestStateSpace(unittest.TestCase):
+    def test_state_space_covers_all_states(self):
+        states = state_space()
+        self.assertEqual(len(states), 25)
+        self.assertIn("Birth to 1 - Fostering", states)
+        self.assertIn("16 to 18+ - Not in care", states)
+        self.assertTrue(states.is_monotonic_increasing)
+
+
+class TestTransitionRatesMatrix(unittest.TestCase):
+    def setUp(self):
+        self.rates = pd.Series(
+            {
+                ("1 to 5 - Fostering", "1 to 5 - Residential"): 0.1,
+                ("1 to 5 - Fostering", "1 to 5 - Not in care"): 0.2,
+                ("1 to 5 - Residential", "1 to 5 - Fostering"): 0.3,
+                ("1 to 5 - Residential", "1 to 5 - Residential"): 0.5,
+            }
+        )
+        self.rates.index.names = ["from", "to"]
+
+    def test_populate_same_state_transition(self):
+        rates = populate_same_state_transition(self.rates)
+        self.assertAlmostEqual(rates[("1 to 5 - Fostering", "1 to 5 - Fostering")], 0.7)
+        self.assertAlmostEqual(
+            rates[("1 to 5 - Residential", "1 to 5 - Residential")], 0.7
+        )
+        # existing entries keep their order and new entries are appended
+        self.assertEqual(list(rates.index[:4]), list(self.rates.index))
+
+    def test_build_matrix(self):
+        matrix = build_transition_rates_matrix(
+            populate_same_state_transition(self.rates)
+        )
+        states = [
+            "1 to 5 - Fostering",
+            "1 to 5 - Not in care",
+            "1 to 5 - Residential",
+        ]
+        expected = pd.DataFrame(
+            [
+                [0.7, 0.0, 0.3],
+                [0.2, 1.0, 0.0],
+                [0.1, 0.0, 0.7],
+            ],
+            index=states,
+            columns=states,
+        )
+        pdt.assert_frame_equal(matrix, expected)
+
+    def test_build_matrix_columns_sum_to_one(self):
+        matrix = build_transition_rates_matrix(
+            populate_same_state_transition(self.rates)
+        )
+        np.testing.assert_allclose(matrix.sum(axis=0).values, 1)
+
+    def test_build_matrix_with_unknown_states(self):
+        rates = pd.Series({("A", "B"): 0.25, ("A", "A"): 0.75})
+        matrix = build_transition_rates_matrix(rates)
+        expected = pd.DataFrame(
+            [[0.75, 0.0], [0.25, 1.0]], index=["A", "B"], columns=["A", "B"]
+        )
+        pdt.assert_frame_equal(matrix, expected)
+
+    def test_fill_missing_states(self):
+        series = pd.Series({"b": 1.0, "a": 2.0})
+        filled = fill_missing_states(series, ["c", "a"])
+        pdt.assert_series_equal(filled, pd.Series({"a": 2.0, "b": 1.0, "c": 0.0}))
+
+
+def _chain_rates(n_states: int) -> tuple[pd.Series, pd.Series]:
+    """
+    Transition rates for a chain of states where each state can only move to the next one.
+    """
+    states = [f"state {i:03d}" for i in range(n_states)]
+    rates = pd.Series(
+        0.05,
+        index=pd.MultiIndex.from_arrays([states[:-1], states[1:]]),
+    )
+    return rates, pd.Series(1.0, index=states)
+
+
+@unittest.skipIf(sparse is None, "scipy is not installed")
+class TestSparseBackend(unittest.TestCase):
+    def test_backend_selected_by_density(self):
+        rates, population = _chain_rates(200)
+        predictor = MultinomialPredictor(population, rates)
+        self.assertEqual(predictor.backend, "sparse")
+
+        rates, population = _chain_rates(10)
+        predictor = MultinomialPredictor(population, rates)
+        self.assertEqual(predictor.backend, "dense")
+
+    def test_sparse_matches_dense(self):
+        rates, population = _chain_rates(200)
+        dense = MultinomialPredictor(population, rates.copy(), backend="dense")
+        sparse_ = MultinomialPredictor(population, rates.copy(), backend="sparse")
+
+        pdt.assert_frame_equal(dense.matrix, sparse_.matrix)
+
+        dense_prediction = dense.predict(30)
+        sparse_prediction = sparse_.predict(30)
+        pdt.assert_frame_equal(
+            dense_prediction.population, sparse_prediction.population
+        )
+        pdt.assert_frame_equal(dense_prediction.variance, sparse_prediction.variance)
+
+    def test_unknown_backend(self):
+        rates, population = _chain_rates(10)
+        with self.assertRaises(ValueError):
+            MultinomialPredictor(population, rates, backend="gpu")
+
+
+class TestStratifiedMultinomialPredictor(unittest.TestCase):
+    def setUp(self):
+        rates, population = _chain_rates(5)
+        self.predictors = {
+            "LA 1": MultinomialPredictor(population, rates.copy()),
+            # the second stratum only uses some of the states
+            "LA 2": MultinomialPredictor(population[:3] * 2, rates[:2].copy() * 2),
+        }
+
+    def test_strata_match_individual_predictions(self):
+        prediction = StratifiedMultinomialPredictor(self.predictors).predict(20)
+        for key, predictor in self.predictors.items():
+            expected = predictor.predict(20)
+            pdt.assert_frame_equal(
+                prediction.strata[key].population, expected.population
+            )
+            pdt.assert_frame_equal(prediction.strata[key].variance, expected.variance)
+
+    def test_total_is_sum_of_strata(self):
+        prediction = StratifiedMultinomialPredictor(self.predictors).predict(20)
+        population = sum(
+            p.population.reindex(columns=prediction.population.columns, fill_value=0)
+            for p in prediction.strata.values()
+        )
+        pdt.assert_frame_equal(prediction.population, population)
+
+
+def _episodes(la: str) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "CHILD": [f"{la}1", f"{la}1", f"{la}2", f"{la}3", f"{la}4"],
+            "LA": la,
+            "DECOM": pd.to_datetime(
+                ["2020-01-10", "2020-06-01", "2020-03-01", "2020-08-15", "2020-11-01"]
+            ),
+            "DEC": pd.to_datetime(
+                ["2020-06-01", None, "2020-09-30", None, "2021-02-01"]
+            ),
+            "age_bin": "10 to 16",
+            "end_age_bin": "10 to 16",
+            "placement_type": [
+                "Fostering",
+                "Residential",
+                "Fostering",
+                "Fostering",
+                "Residential",
+            ],
+            "placement_type_before": [
+                "Not in care",
+                "Fostering",
+                "Not in care",
+                "Not in care",
+                "Not in care",
+            ],
+            "placement_type_after": [
+                "Residential",
+                None,
+                "Not in care",
+                None,
+                "Not in care",
+            ],
+        }
+    )
+
+
+class TestPredictStratified(unittest.TestCase):
+    dates = (date(2020, 1, 1), date(2021, 3, 31), date(2021, 3, 31))
+
+    def setUp(self):
+        # both LAs have the same episodes, so they have the same rates as the pooled data
+        self.stats = PopulationStats(
+            pd.concat([_episodes("A"), _episodes("B")], ignore_index=True),
+            date(2020, 1, 1),
+            date(2021, 3, 31),
+        )
+
+    def test_strata(self):
+        prediction = predict_stratified(self.stats, *self.dates)
+        self.assertEqual(list(prediction.strata), ["A", "B"])
+        pdt.assert_frame_equal(
+            prediction.strata["A"].population, prediction.strata["B"].population
+        )
+
+    def test_total_matches_pooled_prediction(self):
+        prediction = predict_stratified(self.stats, *self.dates)
+        pooled = predict(self.stats, *self.dates)
+        pdt.assert_frame_equal(
+            prediction.population, pooled.population, check_freq=False
+        )
+
+
+class TestEquilibrium(unittest.TestCase):
+    def setUp(self):
+        rates = pd.Series(
+            {
+                ("A", "B"): 0.05,
+                ("A", "Exit"): 0.05,
+                ("B", "Exit"): 0.2,
+            }
+        )
+        entrants = pd.Series({((), "A"): 1.0})
+        self.predictor = MultinomialPredictor(
+            pd.Series({"A": 0.0, "B": 0.0, "Exit": 0.0}), rates, entrants
+        )
+
+    def test_equilibrium_population(self):
+        equilibrium = self.predictor.equilibrium()
+        # A: 1 entrant a day staying 1 / 0.1 days; B: 0.5 a day staying 1 / 0.2 days
+        pdt.assert_series_equal(
+            equilibrium.population, pd.Series({"A": 10.0, "B": 2.5})
+        )
+        pdt.assert_series_equal(equilibrium.absorption, pd.Series({"Exit": 1.0}))
+
+    def test_equilibrium_matches_long_prediction(self):
+        equilibrium = self.predictor.equilibrium()
+        prediction = self.predictor.predict(1000)
+        pdt.assert_series_equal(
+            prediction.population.iloc[-1][equilibrium.population.index],
+            equilibrium.population,
+            check_names=False,
+        )
+
+    def test_convergence_time(self):
+        equilibrium = self.predictor.equilibrium()
+        self.assertAlmostEqual(equilibrium.spectral_radius, 0.9)
+        self.assertAlmostEqual(equilibrium.spectral_gap, 0.1)
+        self.assertAlmostEqual(
+            equilibrium.days_to_converge(0.01), np.log(0.01) / np.log(0.9)
+        )
+
+    def test_no_equilibrium(self):
+        # children move between A and B forever, so the population only grows
+        rates = pd.Series({("A", "B"): 1.0, ("B", "A"): 1.0})
+        entrants = pd.Series({((), "A"): 1.0})
+        population = pd.Series({"A": 0.0, "B": 0.0})
+        for backend in ["dense", "sparse"]:
+            if backend == "sparse" and sparse is None:
+                continue
+            with self.subTest(backend=backend):
+                predictor = MultinomialPredictor(
+                    population, rates.copy(), entrants, backend=backend
+                )
+                with self.assertRaises(ValueError):
+                    predictor.equilibrium()
+
+    @unittest.skipIf(sparse is None, "scipy is not installed")
+    def test_sparse_matches_dense(self):
+        sparse_ = MultinomialPredictor(
+            pd.Series({"A": 0.0, "B": 0.0, "Exit": 0.0}),
+            pd.Series({("A", "B"): 0.05, ("A", "Exit"): 0.05, ("B", "Exit"): 0.2}),
+            pd.Series({((), "A"): 1.0}),
+            backend="sparse",
+        )
+        dense = self.predictor.equilibrium()
+        equilibrium = sparse_.equilibrium()
+        pdt.assert_series_equal(equilibrium.population, dense.population)
+        pdt.assert_series_equal(equilibrium.absorption, dense.absorption)
+        self.assertAlmostEqual(equilibrium.spectral_radius, dense.spectral_radius)
+
+
+class TestPredictEquilibrium(unittest.TestCase):
+    def setUp(self):
+        self.stats = PopulationStats(
+            _episodes("A"), date(2020, 1, 1), date(2021, 3, 31)
+        )
+
+    def test_matches_long_prediction(self):
+        dates = (date(2020, 1, 1), date(2021, 3, 31), date(2021, 3, 31))
+        equilibrium = predict_equilibrium(self.stats, *dates)
+        prediction = predict(self.stats, *dates, prediction_end_date=date(2041, 3, 31))
+        pdt.assert_series_equal(
+            prediction.population.iloc[-1][equilibrium.population.index],
+            equilibrium.population,
+            check_names=False,
+            atol=1e-3,
+        )
+        self.assertEqual(list(equilibrium.absorption.index), ["10 to 16 - Not in care"])
+
+
+class TestStreamingPrediction(unittest.TestCase):
+    def setUp(self):
+        rates, population = _chain_rates(5)
+        self.predictor = MultinomialPredictor(population, rates)
+
+    def test_blocks_match_predict(self):
+        prediction = self.predictor.predict(50)
+        blocks = list(self.predictor.iter_predict(50, block_size=20))
+        self.assertEqual([len(block.population) for block in blocks], [20, 20, 10])
+        pdt.assert_frame_equal(
+            pd.concat([block.population for block in blocks]), prediction.population
+        )
+        pdt.assert_frame_equal(
+            pd.concat([block.variance for block in blocks]), prediction.variance
+        )
+
+    def test_dates(self):
+        prediction = self.predictor.predict(3, step_days=7)
+        self.assertIsInstance(prediction.population.index, pd.DatetimeIndex)
+        self.assertEqual(
+            list(prediction.population.index),
+            list(pd.Timestamp(self.predictor.date) + pd.to_timedelta([7, 14, 21], "D")),
+        )
+
+    def test_stop_early(self):
+        blocks = self.predictor.iter_predict(1000, block_size=10)
+        first = next(blocks)
+        blocks.close()
+        pdt.assert_frame_equal(first.population, self.predictor.predict(10).population)
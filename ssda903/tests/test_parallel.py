@@ -0,0 +1,55 @@
+import threading
+import unittest
+from decimal import Decimal, localcontext
+from unittest.mock import patch
+
+from ssda903 import parallel
+from ssda903.parallel import run_concurrently
+
+
+@patch.object(parallel, "MAX_WORKERS", 2)
+class TestRunConcurrently(unittest.TestCase):
+    def test_results_and_timings(self):
+        results = run_concurrently({"a": lambda: 1, "b": lambda: 2})
+        self.assertEqual(
+            {name: r.value for name, r in results.items()}, {"a": 1, "b": 2}
+        )
+        self.assertTrue(all(r.seconds >= 0 for r in results.values()))
+
+    def test_tasks_run_on_pool(self):
+        results = run_concurrently(
+            {"a": threading.current_thread, "b": threading.current_thread}
+        )
+        for result in results.values():
+            self.assertIsNot(result.value, threading.current_thread())
+
+    def test_decimal_precision_of_caller(self):
+        with localcontext() as context:
+            context.prec = 3
+            results = run_concurrently(
+                {
+                    "a": lambda: Decimal(1) / Decimal(3),
+                    "b": lambda: Decimal(2) / Decimal(3),
+                }
+            )
+        self.assertEqual(results["a"].value, Decimal("0.333"))
+        self.assertEqual(results["b"].value, Decimal("0.667"))
+
+    def test_errors_are_raised(self):
+        def fail():
+            raise ValueError("failed")
+
+        with self.assertRaises(ValueError):
+            run_concurrently({"a": lambda: 1, "b": fail})
+
+    def test_nested_tasks_run_inline(self):
+        results = run_concurrently(
+            {
+                "outer": lambda: run_concurrently(
+                    {"a": threading.current_thread, "b": threading.current_thread}
+                ),
+                "other": lambda: None,
+            }
+        )
+        inner = results["outer"].value
+        self.assertIs(inner["a"].value, inner["b"].value)
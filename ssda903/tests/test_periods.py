@@ -0,0 +1,91 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from ssda903.periods import (
+    FINANCIAL_YEAR,
+    MONTH,
+    QUARTER,
+    WEEK,
+    YEAR,
+    PeriodAggregator,
+    period_codes,
+    period_labels,
+)
+
+
+class TestPeriodCodes(unittest.TestCase):
+    def test_labels(self):
+        dates = pd.to_datetime(["2024-03-31", "2024-04-01"])
+        expected = {
+            WEEK: ["2024-03-25", "2024-04-01"],
+            MONTH: ["Mar-2024", "Apr-2024"],
+            QUARTER: ["Q1-2024", "Q2-2024"],
+            FINANCIAL_YEAR: ["2023-24", "2024-25"],
+            YEAR: ["2024", "2024"],
+        }
+        for period, labels in expected.items():
+            with self.subTest(period=period):
+                self.assertEqual(
+                    list(period_labels(period_codes(dates, period), period)), labels
+                )
+
+    def test_consecutive_periods_have_consecutive_codes(self):
+        dates = pd.date_range("2023-12-25", "2024-01-08", freq="7D")
+        for period, step in [(WEEK, 1), (MONTH, 1), (QUARTER, 1), (YEAR, 1)]:
+            with self.subTest(period=period):
+                codes = period_codes(dates[:2], period)
+                self.assertEqual(codes[1] - codes[0], step)
+
+    def test_unknown_period(self):
+        with self.assertRaises(ValueError):
+            period_codes(pd.to_datetime(["2024-01-01"]), "fortnight")
+
+
+class TestPeriodAggregator(unittest.TestCase):
+    def setUp(self):
+        index = pd.date_range("2023-01-01", "2024-12-31", freq="D")
+        self.data = pd.DataFrame(
+            {
+                "a": np.arange(len(index), dtype=float),
+                "b": np.random.default_rng(0).random(len(index)),
+            },
+            index=index,
+        )
+        self.aggregator = PeriodAggregator(self.data)
+
+    def test_quarters_match_resample(self):
+        expected = self.data.resample("QE").sum()
+        expected.index = expected.index.to_period("Q").strftime("Q%q-%Y")
+        pd.testing.assert_frame_equal(
+            self.aggregator.by(QUARTER), expected, check_names=False
+        )
+
+    def test_financial_years(self):
+        totals = self.aggregator.by(FINANCIAL_YEAR)
+        self.assertEqual(list(totals.index), ["2022-23", "2023-24", "2024-25"])
+        self.assertAlmostEqual(
+            totals.loc["2023-24", "b"],
+            self.data.loc["2023-04-01":"2024-03-31", "b"].sum(),
+        )
+
+    def test_periods_without_dates_are_zero(self):
+        data = self.data.iloc[[0, -1]]
+        totals = PeriodAggregator(data).by(QUARTER)
+        self.assertEqual(len(totals), 8)
+        self.assertEqual(totals.iloc[1:-1].to_numpy().sum(), 0)
+
+    def test_total(self):
+        total = self.aggregator.total(
+            pd.Timestamp("2023-02-01"), pd.Timestamp("2023-03-01")
+        )
+        pd.testing.assert_series_equal(
+            total,
+            self.data.loc["2023-02-01":"2023-02-28"].sum(),
+            check_names=False,
+        )
+        pd.testing.assert_series_equal(
+            self.aggregator.total(), self.data.sum(), check_names=False
+        )
+        self.assertEqual(self.aggregator.total(pd.Timestamp("2030-01-01")).sum(), 0)
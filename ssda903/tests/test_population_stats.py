@@ -1,11 +1,14 @@
+import threading
+import time
 import unittest
 from datetime import date
+from unittest.mock import patch
 
 import numpy as np
 import pandas as pd
 import pandas.testing as pdt
 
-from ssda903.population_stats import _calculate_raw_transition_rates
+from ssda903.population_stats import PopulationStats, _calculate_raw_transition_rates
 
 class TestCalculateRawTransitionRates(unittest.TestCase):
     def setUp(self):
@@ -185,3 +188,97 @@ class TestCalculateRawTransitionRates(unittest.TestCase):
 
         self.assertIn(("A", "C"), out.index)
         self.assertEqual(out.loc[("A", "C")], 0.0)
+
+
+class TestDetailedStock(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame(
+            {
+                "DECOM": pd.to_datetime(["2020-01-01", "2020-01-03"]),
+                "DEC": pd.to_datetime(["2020-01-05", pd.NaT]),
+                "placement_type_detail": ["Fostering (IFA)", "Secure home"],
+            }
+        )
+
+    def test_detailed_stock(self):
+        stats = PopulationStats(self.df, date(2020, 1, 1), date(2020, 1, 6))
+        stock = stats.detailed_stock
+        self.assertEqual(list(stock["Fostering (IFA)"]), [1, 1, 1, 1, 0, 0])
+        self.assertEqual(list(stock["Secure home"]), [0, 0, 1, 1, 1, 1])
+
+    def test_shared_by_cache_key(self):
+        first = PopulationStats(self.df, date(2020, 1, 1), date(2020, 1, 6), "key")
+        second = PopulationStats(self.df, date(2020, 1, 1), date(2020, 1, 6), "key")
+        other = PopulationStats(self.df, date(2020, 1, 1), date(2020, 1, 6), "other")
+        self.assertIs(first.detailed_stock, second.detailed_stock)
+        self.assertIsNot(first.detailed_stock, other.detailed_stock)
+
+    def test_concurrent_threads_compute_once(self):
+        stats = PopulationStats(self.df, date(2020, 1, 1), date(2020, 1, 6))
+        compute = stats._detailed_stock
+        calls = []
+
+        def slow_compute():
+            calls.append(threading.get_ident())
+            time.sleep(0.1)
+            return compute()
+
+        results = []
+        with patch.object(stats, "_detailed_stock", slow_compute):
+            threads = [
+                threading.Thread(target=lambda: results.append(stats.detailed_stock))
+                for _ in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(result is results[0] for result in results))
+
+
+class TestStratify(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame(
+            {
+                "DECOM": pd.to_datetime(["2020-01-01", "2020-01-03", "2020-01-02"]),
+                "DEC": pd.to_datetime(["2020-01-05", pd.NaT, pd.NaT]),
+                "placement_type_detail": [
+                    "Fostering (IFA)",
+                    "Secure home",
+                    "Secure home",
+                ],
+                "LA": ["Southwark", "Bromley", "Southwark"],
+            }
+        )
+
+    def stats(self, cache_key=None):
+        return PopulationStats(self.df, date(2020, 1, 1), date(2020, 1, 6), cache_key)
+
+    def test_stratify(self):
+        strata = self.stats().stratify()
+        self.assertEqual(list(strata), ["Bromley", "Southwark"])
+        pdt.assert_frame_equal(strata["Southwark"].df, self.df.iloc[[0, 2]])
+        self.assertEqual(strata["Bromley"].data_start_date, pd.Timestamp(2020, 1, 1))
+        self.assertEqual(strata["Bromley"].data_end_date, pd.Timestamp(2020, 1, 6))
+
+    def test_strata_are_shared_by_cache_key(self):
+        first = self.stats("key").stratify()
+        second = self.stats("key").stratify()
+        pooled = self.stats("key")
+        self.assertIs(
+            first["Bromley"].detailed_stock, second["Bromley"].detailed_stock
+        )
+        self.assertIsNot(
+            first["Bromley"].detailed_stock, first["Southwark"].detailed_stock
+        )
+        self.assertIsNot(first["Bromley"].detailed_stock, pooled.detailed_stock)
+
+    def test_strata_without_cache_key(self):
+        first = self.stats().stratify()
+        second = self.stats().stratify()
+        self.assertIsNot(
+            first["Bromley"].detailed_stock, second["Bromley"].detailed_stock
+        )
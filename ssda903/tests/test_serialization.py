@@ -0,0 +1,49 @@
+import unittest
+from dataclasses import dataclass
+from datetime import date
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+
+from ssda903 import serialization
+
+
+@dataclass
+class Output:
+    table: pd.DataFrame
+    values: pd.Series
+
+
+class TestSerialization(unittest.TestCase):
+    def test_round_trip(self):
+        frame = pd.DataFrame(
+            {"a": [1.0, np.nan], "b": [0.5, 2.0]},
+            index=pd.DatetimeIndex(["2024-01-01", "2024-01-02"]).as_unit("us"),
+        )
+        series = pd.Series(
+            [0.1, 0.2],
+            index=pd.MultiIndex.from_tuples(
+                [("x", "y"), ("y", "x")], names=["from", "to"]
+            ),
+            name="rates",
+            dtype=object,
+        )
+        dated = pd.DataFrame(
+            {"a": [1, 2]}, index=pd.Index([date(2024, 1, 1), date(2024, 1, 2)])
+        )
+
+        objects = serialization.loads(
+            serialization.dumps({"frame": frame, "output": Output(dated, series)})
+        )
+
+        pdt.assert_frame_equal(objects["frame"], frame)
+        pdt.assert_frame_equal(objects["output"]["table"], dated)
+        pdt.assert_series_equal(objects["output"]["values"], series)
+
+    def test_unsupported_version(self):
+        data = serialization.dumps({"series": pd.Series([1.0])})
+        with patch.object(serialization, "FORMAT_VERSION", 2):
+            with self.assertRaises(ValueError):
+                serialization.loads(data)
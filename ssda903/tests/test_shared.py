@@ -0,0 +1,131 @@
+import mmap
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+
+from ssda903.datacontainer import DemandModellingDataContainer
+from ssda903.shared import SharedFrames
+
+
+class TestSharedFrames(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.shared = SharedFrames(directory.name)
+        self.frame = pd.DataFrame(
+            {
+                "CHILD": [1, 2, 3],
+                "age": [1.5, np.nan, 3.0],
+                "DEC": pd.to_datetime(["2020-01-01", None, "2021-06-30"]).as_unit("us"),
+                "placement_type": pd.array(
+                    ["Fostering", None, "Fostering"], dtype="str"
+                ),
+                "UASC": np.array([True, False, True], dtype=object),
+                "skip_episode": [False, True, False],
+            }
+        )
+
+    def test_round_trip(self):
+        labelled = self.frame.set_index(pd.Index(["a", "b", "c"], name="id"))
+        shared = self.shared.publish(
+            "1", {"episodes": self.frame, "labelled": labelled}, {"end": "2021-03-31"}
+        )
+        pdt.assert_frame_equal(shared.frames["episodes"], self.frame)
+        pdt.assert_frame_equal(shared.frames["labelled"], labelled)
+        self.assertEqual(shared.attributes, {"end": "2021-03-31"})
+
+    def test_numbers_are_mapped(self):
+        df = self.shared.publish("1", {"episodes": self.frame}).frames["episodes"]
+        values = df["age"].to_numpy()
+        while not isinstance(values, mmap.mmap):
+            values = values.base
+
+        # changes are made to this process's copy
+        df.loc[0, "age"] = 10.0
+        self.assertEqual(self.shared.load("1").frames["episodes"].loc[0, "age"], 1.5)
+
+    def test_load_unpublished(self):
+        self.assertIsNone(self.shared.load("1"))
+
+    def test_first_publication_is_kept(self):
+        self.shared.publish("1", {"episodes": self.frame})
+        shared = self.shared.publish("1", {"episodes": self.frame.head(1)})
+        self.assertEqual(len(shared.frames["episodes"]), 3)
+
+    def test_earlier_generations_are_removed(self):
+        self.shared.publish("1", {"episodes": self.frame})
+        self.shared.publish("2", {"episodes": self.frame})
+        self.assertIsNone(self.shared.load("1"))
+        self.assertEqual(
+            [path.name for path in Path(self.shared.directory).iterdir()], ["2"]
+        )
+
+    def test_other_directories_are_kept(self):
+        (self.shared.directory / "notes").mkdir()
+        self.shared.publish("1", {"episodes": self.frame})
+        self.shared.publish("2", {"episodes": self.frame})
+        self.assertEqual(
+            sorted(path.name for path in self.shared.directory.iterdir()),
+            ["2", "notes"],
+        )
+
+    def test_directory_is_private(self):
+        shared = SharedFrames(self.shared.directory / "shared")
+        shared.publish("1", {"episodes": self.frame})
+        self.assertEqual(shared.directory.stat().st_mode & 0o777, 0o700)
+
+    def test_directory_writable_by_others_is_not_used(self):
+        self.shared.publish("1", {"episodes": self.frame})
+        self.shared.directory.chmod(0o777)
+        with self.assertLogs("ssda903.shared", "WARNING"):
+            self.assertIsNone(self.shared.load("1"))
+        with self.assertLogs("ssda903.shared", "WARNING"):
+            self.assertIsNone(self.shared.publish("2", {"episodes": self.frame}))
+
+    def test_unsupported_values(self):
+        frame = pd.DataFrame({"bin": pd.Categorical(["a", "b"])})
+        with self.assertLogs("ssda903.shared", "WARNING"):
+            self.assertIsNone(self.shared.publish("1", {"episodes": frame}))
+
+
+class TestSharedEnrichedView(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.shared = SharedFrames(directory.name)
+
+    def container(self) -> DemandModellingDataContainer:
+        return DemandModellingDataContainer(
+            MagicMock(files=[]), fingerprint="data", shared=self.shared
+        )
+
+    def test_view_is_read_once(self):
+        enriched = pd.DataFrame({"CHILD": [1, 2], "age": [1.5, 2.5]})
+        first = self.container()
+        first.combined_data = pd.DataFrame(
+            {
+                "LA": pd.array(["Southwark", "Bromley"], dtype="str"),
+                "YEAR": [2019, 2020],
+                "DECOM": pd.to_datetime(["2018-06-01", "2019-05-01"]),
+                "DEC": pd.to_datetime(["2019-01-01", None]),
+            }
+        )
+        with patch.object(
+            DemandModellingDataContainer, "_enrich", return_value=enriched
+        ):
+            pdt.assert_frame_equal(first.enriched_view, enriched)
+        self.assertNotIn("combined_data", vars(first))
+
+        second = self.container()
+        with patch.object(DemandModellingDataContainer, "_enrich") as enrich:
+            pdt.assert_frame_equal(second.enriched_view, enriched)
+        enrich.assert_not_called()
+        self.assertEqual(second.data_start_date, date(2018, 4, 1))
+        self.assertEqual(second.data_end_date, date(2020, 3, 31))
+        self.assertEqual(list(second.unique_las), ["Bromley", "Southwark"])
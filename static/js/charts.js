@@ -0,0 +1,42 @@
+// Renders the charts returned by the chart_data view with plotly.js.
+// Traces refer to a column of "dates" by position, so that traces over the same dates share them.
+
+// The parts of plotly.py's default "plotly" template used by the charts
+const chartTemplate = {
+    layout: {
+        colorway: ["#636efa", "#EF553B", "#00cc96", "#ab63fa", "#FFA15A", "#19d3f3", "#FF6692", "#B6E880", "#FF97FF", "#FECB52"],
+        font: {color: "#2a3f5f"},
+        hovermode: "closest",
+        hoverlabel: {align: "left"},
+        paper_bgcolor: "white",
+        plot_bgcolor: "#E5ECF6",
+        xaxis: {gridcolor: "white", linecolor: "white", ticks: "", title: {standoff: 15}, zerolinecolor: "white", automargin: true, zerolinewidth: 2},
+        yaxis: {gridcolor: "white", linecolor: "white", ticks: "", title: {standoff: 15}, zerolinecolor: "white", automargin: true, zerolinewidth: 2},
+        shapedefaults: {line: {color: "#2a3f5f"}},
+        title: {x: 0.05},
+    }
+};
+
+function renderChart(element) {
+    // the server limits the points sent for each line by the width of the chart
+    const url = `${element.dataset.chartUrl}?width=${Math.round(element.clientWidth)}`;
+    fetch(url, {credentials: "same-origin"})
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`Chart request failed with status ${response.status}`);
+            }
+            return response.json();
+        })
+        .then(chart => {
+            const traces = chart.traces.map(trace => ({...trace, x: chart.dates[trace.x]}));
+            Plotly.newPlot(element, traces, {...chart.layout, template: chartTemplate}, {responsive: true});
+        })
+        .catch(error => {
+            console.error(error);
+            element.textContent = "The chart could not be loaded.";
+        });
+}
+
+document.addEventListener("DOMContentLoaded", function() {
+    document.querySelectorAll("[data-chart-url]").forEach(renderChart);
+});